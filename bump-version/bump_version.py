@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import fnmatch
+import json
 import os
 import re
+import subprocess
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from common.conventional import parse_commit
+from common.gha import ActionIO
+
 # Sections that define a package/workspace version we own (not [dependencies]).
 VERSION_SECTIONS = ("package", "workspace.package")
 
@@ -73,273 +81,350 @@ def bump_semver(old: str, bump: str) -> str:
     return f"{x}.{y}.{z}"
 
 
-def get_current_version_go(content: str) -> str:
-    # Format: var Version = "0.1.0"
-    match = re.search(r'var Version = "(.*?)"', content)
-    if not match:
-        raise ValueError("Could not find 'var Version' string")
-    return match.group(1)
+# --- Automatic bump from conventional commits ---
 
+_BUMP_RANK = {"patch": 0, "minor": 1, "major": 2}
 
-def get_current_version_rust(content: str) -> str:
-    # Look for [package] or [workspace.package] followed by version = "..."
-    # This is a heuristic. For source of truth, we expect it in the [package] or [workspace.package] section.
-    # We will iterate lines to be safe.
-    lines = content.splitlines()
-    in_sec = False
-    for line in lines:
-        s = line.strip()
-        if s.startswith("["):
-            in_sec = s.strip("[]").strip() in VERSION_SECTIONS
+
+def classify_commit(message: str) -> str:
+    """major for `type!:` or a BREAKING CHANGE footer, minor for feat, otherwise patch.
+
+    Parsed by common.conventional, as the release notes sections are, so both agree on every commit.
+    """
+    parsed = parse_commit(message)
+    if parsed is None:
+        return "patch"
+    if parsed["breaking"]:
+        return "major"
+    return "minor" if parsed["type"] == "feat" else "patch"
+
+
+def _boundary_tag(cwd: Path | None = None) -> str | None:
+    """Nearest tag that is an ancestor of HEAD, ignoring tags on HEAD itself (the release being cut)."""
+    at_head = subprocess.run(
+        ["git", "tag", "--points-at", "HEAD"], cwd=cwd, capture_output=True, text=True, check=False
+    ).stdout.split()
+    result = subprocess.run(
+        ["git", "describe", "--tags", "--abbrev=0", *(f"--exclude={tag}" for tag in at_head), "HEAD"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        return None  # no tagged ancestor
+    return result.stdout.strip() or None
+
+
+def iter_commits_since_tag(cwd: Path | None = None):
+    """Yield commit messages in <tag>..HEAD, tag being the nearest tagged ancestor (all history without one).
+
+    Walking the range rather than stopping at the first tagged record in date
+    order keeps commits from branches started before the tag and merged after it.
+    One streamed `git log -z`; git is stopped when the caller stops iterating.
+    """
+    tag = _boundary_tag(cwd)
+    proc = subprocess.Popen(
+        ["git", "log", "-z", "--format=%B", f"refs/tags/{tag}..HEAD" if tag else "HEAD"],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        buf = b""
+        while chunk := proc.stdout.read(65536):
+            *records, buf = (buf + chunk).split(b"\0")
+            for record in records:
+                yield record.decode("utf-8", errors="replace")
+    finally:
+        proc.stdout.close()
+        proc.kill()
+        proc.wait()
+
+
+def auto_bump(current_version: str, cwd: Path | None = None) -> str:
+    """Bump type implied by the commits since the last tag; rc while on a release candidate."""
+    if re.search(r"-rc\.\d+$", current_version):
+        return "rc"
+    bump = "patch"
+    for message in iter_commits_since_tag(cwd):
+        kind = classify_commit(message)
+        if _BUMP_RANK[kind] > _BUMP_RANK[bump]:
+            bump = kind
+            if bump == "major":
+                break  # nothing outranks it; stop reading history
+    return bump
+
+
+# --- Format-preserving version spans ---
+# Each locator scans the file text once with a precompiled scanner and returns
+# the (start, end) span of the project version string, or None. Editors splice
+# the new version into that span and leave every other byte untouched.
+
+_TOML_LINE = re.compile(
+    r"^[ \t]*(?:\[\[?[ \t]*(?P<table>[^\]\n]+?)[ \t]*\]"
+    r"""|(?P<key>version|name)[ \t]*=[ \t]*(?P<q>["'])(?P<value>[^"'\n]*)(?P=q))""",
+    re.MULTILINE,
+)
+_XML_TOKEN = re.compile(
+    r"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<[?!][^>]*>|<(?P<close>/)?(?P<tag>[\w:.-]+)[^>]*?(?P<empty>/)?>",
+    re.DOTALL,
+)
+_JSON_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]')
+_GO_VERSION = re.compile(r'var Version = "(.*?)"')
+_DOTNET_VERSION = re.compile(r"<Version>(.*?)</Version>")
+_GRADLE_PROPERTIES_VERSION = re.compile(r"^version\s*=\s*(.*?)\s*$", re.MULTILINE)
+_GRADLE_BUILD_VERSION = re.compile(r"""version\s*=?\s*["'](.*?)["']""")
+
+# TOML sections holding the project version per mode ("" is the root table; None is any section).
+PYTHON_VERSION_SECTIONS = ("", "project", "tool.poetry")
+
+
+def toml_version_spans(
+    text: str, sections: tuple[str, ...] | None = VERSION_SECTIONS, key: str = "version"
+) -> list[tuple[int, int]]:
+    """Spans of every `version = "..."` key inside one of `sections` ([dependencies] etc. are skipped).
+
+    A root Cargo.toml can declare both [workspace.package] and [package] versions; both are returned.
+    """
+    spans = []
+    section = ""
+    for m in _TOML_LINE.finditer(text):
+        if m.group("table") is not None:
+            section = m.group("table")
+        elif m.group("key") == key and (sections is None or section in sections):
+            spans.append(m.span("value"))
+    return spans
+
+
+def toml_version_span(
+    text: str, sections: tuple[str, ...] | None = VERSION_SECTIONS, key: str = "version"
+) -> tuple[int, int] | None:
+    """Span of the first `version = "..."` key inside one of `sections`."""
+    spans = toml_version_spans(text, sections, key)
+    return spans[0] if spans else None
+
+
+# Elements whose groupId/artifactId/version can point at a reactor module.
+POM_REFERENCE_TAGS = ("parent", "dependency", "plugin", "extension")
+
+
+def scan_pom(text: str) -> dict:
+    """One streaming pass over a POM (format untouched; only spans are recorded).
+
+    Returns {"project": {tag: (value, span)} for direct children of <project>,
+    "modules": [module paths, incl. profiles], "references": [{"kind": tag, field: (value, span)}]}
+    for <parent>, dependencies, plugins and extensions.
+    """
+    stack: list[str] = []
+    content_start = -1
+    project: dict[str, tuple[str, tuple[int, int]]] = {}
+    modules: list[str] = []
+    references: list[dict] = []
+    ref: dict | None = None
+    ref_depth = 0
+    for m in _XML_TOKEN.finditer(text):
+        tag = m.group("tag")
+        if tag is None or m.group("empty"):
             continue
-        if in_sec:
-            m = re.match(r'^\s*version\s*=\s*"v?(\d+\.\d+\.\d+(?:-[\w.-]+)?)"', line)
-            if m:
-                return m.group(1)
-    raise ValueError("Could not find [package] version")
+        name = tag.rpartition(":")[2]
+        if not m.group("close"):
+            stack.append(name)
+            content_start = m.end()
+            if ref is None and name in POM_REFERENCE_TAGS and stack[0] == "project":
+                ref, ref_depth = {"kind": name}, len(stack)
+            continue
+        if content_start >= 0:
+            raw = text[content_start : m.start()]
+            lead = len(raw) - len(raw.lstrip())
+            span = (content_start + lead, content_start + len(raw.rstrip()))
+            value = text[span[0] : span[1]]
+            if stack[:1] == ["project"] and len(stack) == 2:
+                project[name] = (value, span)
+            elif name == "module" and len(stack) >= 2 and stack[-2] == "modules":
+                modules.append(value)
+            elif ref is not None and len(stack) == ref_depth + 1:
+                ref[name] = (value, span)
+        if ref is not None and len(stack) == ref_depth:
+            references.append(ref)
+            ref = None
+        content_start = -1
+        if stack:
+            stack.pop()
+        if not stack:
+            break
+    return {"project": project, "modules": modules, "references": references}
+
+
+def pom_version_span(text: str) -> tuple[int, int] | None:
+    """Span of the <version> that is a direct child of <project> (never <parent>'s or a dependency's)."""
+    version = scan_pom(text)["project"].get("version")
+    return version[1] if version else None
+
+
+def json_version_span(text: str) -> tuple[int, int] | None:
+    """Span of the top-level "version" string value (nested "version" keys are skipped)."""
+    depth = 0
+    prev = ""
+    key = None
+    for m in _JSON_TOKEN.finditer(text):
+        tok = m.group()
+        c = tok[0]
+        if c == '"':
+            if depth == 1 and prev == ":" and key == '"version"':
+                return m.start() + 1, m.end() - 1
+            key = tok
+        elif c in "{[":
+            depth += 1
+        elif c in "}]":
+            depth -= 1
+        prev = c
+    return None
+
+
+def _regex_span(pattern: re.Pattern[str]):
+    def locate(text: str) -> tuple[int, int] | None:
+        m = pattern.search(text)
+        return m.span(1) if m else None
+
+    return locate
+
+
+go_version_span = _regex_span(_GO_VERSION)
+dotnet_version_span = _regex_span(_DOTNET_VERSION)
+
+
+def gradle_version_span(text: str, filename: str) -> tuple[int, int] | None:
+    pattern = _GRADLE_PROPERTIES_VERSION if filename.endswith(".properties") else _GRADLE_BUILD_VERSION
+    return _regex_span(pattern)(text)
+
+
+def _version_at(content: str, span: tuple[int, int] | None, error: str) -> str:
+    if span is None:
+        raise ValueError(error)
+    return content[span[0] : span[1]]
+
+
+def patch_version(path: Path, locate, old: str, new: str) -> bool:
+    """Replace the located version span in path when it holds `old` (or `v<old>`).
+
+    One read and one write; the file is handled as bytes decoded verbatim, so
+    line endings and everything outside the span survive unchanged.
+    """
+    return patch_versions(path, lambda text: [span] if (span := locate(text)) else [], old, new)
 
 
-def replace_version_in_file(path: Path, old: str, new: str, mode: str) -> bool:
+def patch_versions(path: Path, locate_all, old: str, new: str) -> bool:
+    """patch_version for a locator returning every version span; those holding `old` are replaced."""
     try:
-        text = path.read_text(encoding="utf-8")
+        text = path.read_bytes().decode("utf-8")
     except Exception as e:
         print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
         return False
-
-    if mode == "go":
-        # Simple replacement for Go
-        new_content = text.replace(f'var Version = "{old}"', f'var Version = "{new}"')
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
+    spans = [(start, end) for start, end in locate_all(text) if text[start:end] in (old, f"v{old}")]
+    if not spans:
         return False
+    for start, end in reversed(spans):
+        text = text[:start] + new + text[end:]
+    path.write_bytes(text.encode("utf-8"))
+    return True
 
-    elif mode == "rust":
-        # Regex replacement for Rust [package] logic
-        lines = text.splitlines(keepends=True)
-        out = []
-        in_sec = False
-        replaced = False
-        for line in lines:
-            s = line.strip()
-            if s.startswith("["):
-                in_sec = s.strip("[]").strip() in VERSION_SECTIONS
-                out.append(line)
-                continue
-            if in_sec:
-                # Match version = "old" or "vold"
-                pat = r'(\s*version\s*=\s*")v?' + re.escape(old) + r'"'
-                if re.search(pat, line):
-                    new_line = re.sub(pat, lambda m: m.group(1) + new + '"', line, count=1)
-                    out.append(new_line)
-                    replaced = True
-                    continue
-            out.append(line)
-
-        if replaced:
-            path.write_text("".join(out), encoding="utf-8")
-        return replaced
 
+def get_current_version_go(content: str) -> str:
+    # Format: var Version = "0.1.0"
+    return _version_at(content, go_version_span(content), "Could not find 'var Version' string")
+
+
+def get_current_version_rust(content: str) -> str:
+    # version = "..." in [package] or [workspace.package]; [dependencies] versions are never read.
+    version = _version_at(content, toml_version_span(content), "Could not find [package] version")
+    return version.lstrip("v")
+
+
+def replace_version_in_file(path: Path, old: str, new: str, mode: str) -> bool:
+    if mode == "go":
+        return patch_version(path, go_version_span, old, new)
+    elif mode == "rust":
+        return patch_versions(path, toml_version_spans, old, new)
     return False
 
 
 def get_current_version_maven(content: str) -> str:
-    # Match <version>...</version> inside <project>...<version>...</version>...</project>
-    # Simple regex approach: find the first <version> tag that is NOT inside a <dependency>, <parent>, or <plugin>.
-    # However, standard practice is <project>...<version>X.Y.Z</version>...
-    # We will look for <version> at the top level of project.
-    # A safe heuristic for simple poms: The project version is usually the first <version> tag,
-    # unless there is a <parent> tag. If there is a parent, the project version might be inherited (no version tag)
-    # or explicitly defined.
-    # To be robust without full XML parsing (which destroys formatting), we search for:
-    # <version>X.Y.Z</version> that is NOT indented more than the project tag (roughly).
-    # Actually, a better heuristic used by tools: <project> ... <version>...</version>
-    # We'll search for <version>...</version> and check if it looks like the main version.
-
-    # Strategy:
-    # 1. Look for <version> after <artifactId> but before <dependencies>, <build>, <profiles> etc.
-    # 2. Or just find matches and return the first one that is a SemVer.
-    # Let's try to match <version>X.Y.Z</version> taking indentation into account? No, XML is free-form.
-
-    # Refined Strategy:
-    # Look for <version> match. Ignore if it follows <parent>.
-    # Keep it simple for now: We assume standard Maven layout where project version is
-    # early in the file, possibly after <parent> (if inheriting) or standalone.
-    # Wait, if <parent> exists, the project might NOT have a version.
-    # We will look for <version> with regex.
-
-    matches = list(re.finditer(r"<version>(.*?)</version>", content))
-    if not matches:
-        raise ValueError("Could not find <version> tag in pom.xml")
-
-    # Filter out potential parent/dependency versions?
-    # Usually the project version is defined near top.
-    # If <parent> exists, the first version tag might be parent's version.
-    if "<parent>" in content:
-        # If parent block ends before our match, then our match is likely project version.
-        # Or if match is inside parent block.
-        # This regex approach is fragile for complex XML.
-        # Let's try to find <project> ... <version>
-        pass
-
-    # Fallback to first match for MVP, user can provide specific file path if needed.
-    # Actually, let's look at the indentation?
-    # Or just assume the standard convention.
-    return matches[0].group(1)
+    # The project's own <version> (direct child of <project>). A <parent> block's version,
+    # dependency and plugin versions are skipped; a POM inheriting its version has none.
+    return _version_at(content, pom_version_span(content), "Could not find project <version> tag in pom.xml")
 
 
 def get_current_version_gradle(content: str, filename: str) -> str:
     # gradle.properties: version=1.2.3
-    if filename.endswith(".properties"):
-        match = re.search(r"^version\s*=\s*(.*?)\s*$", content, re.MULTILINE)
-        if match:
-            return match.group(1)
-
     # build.gradle / build.gradle.kts: version = '1.2.3' or version '1.2.3'
-    else:
-        # version = "..." or version = '...'
-        match = re.search(r"""version\s*=?\s*["'](.*?)["']""", content)
-        if match:
-            return match.group(1)
-
-    raise ValueError(f"Could not find version in {filename}")
+    return _version_at(content, gradle_version_span(content, filename), f"Could not find version in {filename}")
 
 
 def replace_version_in_file_maven(path: Path, old: str, new: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
-
-    # Replace <version>old</version> -> <version>new</version>
-    # We replace the *first* matching occurrence of the OLD version in a version tag.
-    # This assumes we want to update the one we found earlier.
-    pat = r"(<version>)" + re.escape(old) + r"(</version>)"
-    if re.search(pat, text):
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1)
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
-    return False
+    return patch_version(path, pom_version_span, old, new)
 
 
 def replace_version_in_file_gradle(path: Path, old: str, new: str, filename: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
-
-    if filename.endswith(".properties"):
-        # version=old
-        pat = r"^(version\s*=\s*)" + re.escape(old) + r"(\s*)$"
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1, flags=re.MULTILINE)
-    else:
-        # available patterns: version = 'old', version 'old', version = "old", version "old"
-        pat = r"""(version\s*=?\s*["'])""" + re.escape(old) + r"""(["'])"""
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1)
-
-    if text != new_content:
-        path.write_text(new_content, encoding="utf-8")
-        return True
-    return False
+    return patch_version(path, lambda text: gradle_version_span(text, filename), old, new)
 
 
 def get_current_version_node(content: str) -> str:
-    # "version": "1.2.3"
-    match = re.search(r'"version"\s*:\s*"(.*?)"', content)
-    if not match:
-        raise ValueError("Could not find 'version' in package.json")
-    return match.group(1)
+    # Top-level "version": "1.2.3"
+    return _version_at(content, json_version_span(content), "Could not find 'version' in package.json")
 
 
 def replace_version_in_file_node(path: Path, old: str, new: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
+    return patch_version(path, json_version_span, old, new)
 
-    pat = r'("version"\s*:\s*")' + re.escape(old) + r'(")'
-    if re.search(pat, text):
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1)
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
-    return False
+
+def _python_version_span(text: str) -> tuple[int, int] | None:
+    return toml_version_span(text, PYTHON_VERSION_SECTIONS)
 
 
 def get_current_version_python(content: str) -> str:
-    # pyproject.toml: version = "1.2.3"
-    match = re.search(r'^version\s*=\s*"(.*?)"', content, re.MULTILINE)
-    if not match:
-        raise ValueError("Could not find 'version' in pyproject.toml")
-    return match.group(1)
+    # pyproject.toml: version = "1.2.3" in [project] or [tool.poetry]
+    return _version_at(content, _python_version_span(content), "Could not find 'version' in pyproject.toml")
 
 
 def replace_version_in_file_python(path: Path, old: str, new: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
-
-    pat = r'^(version\s*=\s*")' + re.escape(old) + r'(")'
-    if re.search(pat, text, re.MULTILINE):
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1, flags=re.MULTILINE)
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
-    return False
+    return patch_version(path, _python_version_span, old, new)
 
 
 def get_current_version_dotnet(content: str) -> str:
     # <Version>1.2.3</Version>
-    match = re.search(r"<Version>(.*?)</Version>", content)
-    if not match:
-        raise ValueError("Could not find <Version> in .csproj")
-    return match.group(1)
+    return _version_at(content, dotnet_version_span(content), "Could not find <Version> in .csproj")
 
 
 def replace_version_in_file_dotnet(path: Path, old: str, new: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
+    return patch_version(path, dotnet_version_span, old, new)
 
-    pat = r"(<Version>)" + re.escape(old) + r"(</Version>)"
-    if re.search(pat, text):
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1)
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
-    return False
+
+def _buildpack_version_span(text: str) -> tuple[int, int] | None:
+    # buildpack.toml: version = "0.1.9" (any section, first match)
+    return toml_version_span(text, None)
 
 
 def get_current_version_buildpack(content: str) -> str:
-    # buildpack.toml: version = "0.1.9" (any section, first match)
-    match = re.search(r'\s*version\s*=\s*"(\d+\.\d+\.\d+(?:-[\w.-]+)?)"', content)
-    if not match:
-        raise ValueError("Could not find version in buildpack.toml")
-    return match.group(1)
+    return _version_at(content, _buildpack_version_span(content), "Could not find version in buildpack.toml")
 
 
 def replace_version_in_file_buildpack(path: Path, old: str, new: str) -> bool:
-    try:
-        text = path.read_text(encoding="utf-8")
-    except Exception as e:
-        print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
-        return False
+    return patch_version(path, _buildpack_version_span, old, new)
 
-    pat = r'(\s*version\s*=\s*")' + re.escape(old) + r'(")'
-    if re.search(pat, text):
-        new_content = re.sub(pat, lambda m: m.group(1) + new + m.group(2), text, count=1)
-        if text != new_content:
-            path.write_text(new_content, encoding="utf-8")
-            return True
-    return False
+
+_HELM_CHART_VERSION = re.compile(r"""^version:[ \t]*["']?([^"'\s#]+)""", re.MULTILINE)
+helm_version_span = _regex_span(_HELM_CHART_VERSION)
+
+
+def get_current_version_helm(content: str) -> str:
+    # Chart.yaml: top-level version: 1.2.3 (appVersion and dependency versions are indented or differently keyed)
+    return _version_at(content, helm_version_span(content), "Could not find version in Chart.yaml")
+
+
+def _text_version_span(text: str) -> tuple[int, int] | None:
+    m = re.search(r"\S[^\r\n]*", text)
+    return (m.start(), m.start() + len(m.group().rstrip())) if m else None
 
 
 def get_current_version_text(content: str) -> str:
@@ -357,11 +442,121 @@ def replace_version_in_file_text(path: Path, old: str, new: str) -> bool:
         return False
 
 
-def _cargo_toml_paths(project_root: Path) -> list[Path]:
+_CARGO_LOCK_PACKAGE = re.compile(r"^(?=\[\[package\]\])", re.MULTILINE)
+_CARGO_LOCK_FIELD = re.compile(r'^(name|version|source) = "([^"\n]*)"', re.MULTILINE)
+
+
+def cargo_package_name(path: Path) -> str | None:
+    try:
+        text = path.read_bytes().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return None
+    span = toml_version_span(text, ("package",), key="name")
+    return text[span[0] : span[1]] if span else None
+
+
+_CARGO_TABLE_HEADER = re.compile(r"^[ \t]*\[", re.MULTILINE)
+_CARGO_PACKAGE_HEADER = re.compile(r"^[ \t]*\[[ \t]*package[ \t]*\][ \t]*(?:#.*)?$", re.MULTILINE)
+_INHERITED_VERSION = re.compile(
+    r"^[ \t]*version[ \t]*(?:\.[ \t]*workspace[ \t]*=[ \t]*true|=[ \t]*\{[^}\n]*\bworkspace[ \t]*=[ \t]*true)",
+    re.MULTILINE,
+)
+
+
+def cargo_inherits_workspace_version(path: Path) -> bool:
+    """True for a member whose [package] says `version.workspace = true` (or `version = { workspace = true }`)."""
+    try:
+        text = path.read_bytes().decode("utf-8")
+    except (OSError, UnicodeDecodeError):
+        return False
+    header = _CARGO_PACKAGE_HEADER.search(text)
+    if header is None:
+        return False
+    end = _CARGO_TABLE_HEADER.search(text, header.end())
+    return _INHERITED_VERSION.search(text, header.end(), end.start() if end else len(text)) is not None
+
+
+def update_cargo_lock(lock_path: Path, names: set[str], old: str, new: str) -> bool:
+    """Move workspace members `names` from old to new in Cargo.lock, without cargo or network.
+
+    Only [[package]] entries with no `source` (path/workspace crates) are touched, plus
+    the "name old" references other entries use when a crate name is ambiguous. The rest
+    of the file is copied byte for byte.
+    """
+    try:
+        text = lock_path.read_bytes().decode("utf-8")
+    except FileNotFoundError:
+        return False
+    ref = re.compile(r'"([\w-]+) ' + re.escape(old) + r'"')
     out = []
-    # Use Path.rglob which is available in Python 3.12 (action uses 3.12)
-    # We need to manually filter skip parts
-    for p in project_root.rglob("Cargo.toml"):
+    for block in _CARGO_LOCK_PACKAGE.split(text):
+        fields = {m.group(1): m for m in _CARGO_LOCK_FIELD.finditer(block)}
+        name, version = fields.get("name"), fields.get("version")
+        if name and version and "source" not in fields and name.group(2) in names and version.group(2) == old:
+            block = block[: version.start(2)] + new + block[version.end(2) :]
+        block = ref.sub(lambda m: f'"{m.group(1)} {new}"' if m.group(1) in names else m.group(0), block)
+        out.append(block)
+    new_text = "".join(out)
+    if new_text == text:
+        return False
+    _write_atomic(lock_path, new_text.encode("utf-8"))
+    return True
+
+
+def _git_cargo_toml_paths(project_root: Path) -> list[Path] | None:
+    """Cargo.toml files git knows about (tracked or untracked-but-not-ignored), or None outside a repo.
+
+    git answers from its index, so gitignored build outputs (target/) are never walked.
+    """
+    try:
+        out = subprocess.run(
+            [
+                "git",
+                "ls-files",
+                "-z",
+                "--cached",
+                "--others",
+                "--exclude-standard",
+                "--",
+                "Cargo.toml",
+                ":(glob)**/Cargo.toml",
+            ],
+            cwd=project_root,
+            capture_output=True,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [project_root / rel.decode() for rel in out.split(b"\0") if rel]
+
+
+def _walk_cargo_toml_paths(project_root: Path) -> list[Path]:
+    """os.scandir walk that prunes SKIP_PARTS directories before descending into them."""
+    out = []
+    stack = [str(project_root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in SKIP_PARTS:
+                        stack.append(entry.path)
+                elif entry.name == "Cargo.toml":
+                    out.append(Path(entry.path))
+    return out
+
+
+def _cargo_toml_paths(project_root: Path, use_git: bool = True) -> list[Path]:
+    # Cost scales with the number of manifests, not the size of build outputs:
+    # prefer git's index, else a walk that never enters SKIP_PARTS directories.
+    candidates = _git_cargo_toml_paths(project_root) if use_git else None
+    if candidates is None:
+        candidates = _walk_cargo_toml_paths(project_root)
+    out = []
+    for p in candidates:
         try:
             rel = p.relative_to(project_root)
         except ValueError:
@@ -373,9 +568,494 @@ def _cargo_toml_paths(project_root: Path) -> list[Path]:
     return sorted(out)
 
 
+# --- Maven reactor ---
+
+
+def _pom_path(module_dir: Path, module: str) -> Path:
+    target = module_dir / module
+    return target if target.suffix == ".xml" else target / "pom.xml"
+
+
+def _load_pom(path: Path) -> tuple[Path, str, dict]:
+    text = path.read_bytes().decode("utf-8")
+    return path, text, scan_pom(text)
+
+
+def maven_reactor(root_pom: Path) -> dict[Path, tuple[str, dict]]:
+    """Every POM reachable from root_pom through <modules> (recursively), each read and scanned once.
+
+    Levels of the module tree are loaded concurrently.
+    """
+    poms: dict[Path, tuple[str, dict]] = {}
+    level = [root_pom.resolve()]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        while level:
+            found = [p for p in dict.fromkeys(level) if p not in poms and p.is_file()]
+            level = []
+            for path, text, model in pool.map(_load_pom, found):
+                poms[path] = (text, model)
+                level.extend(_pom_path(path.parent, mod).resolve() for mod in model["modules"])
+    return poms
+
+
+def _field(element: dict, name: str) -> str:
+    return element[name][0] if name in element else ""
+
+
+def _pom_coordinates(model: dict) -> tuple[str, str]:
+    project = model["project"]
+    parent = next((r for r in model["references"] if r["kind"] == "parent"), {})
+    return _field(project, "groupId") or _field(parent, "groupId"), _field(project, "artifactId")
+
+
+def _resolve_group(value: str, coords: tuple[str, str]) -> str:
+    return coords[0] if value in ("${project.groupId}", "${project.parent.groupId}", "${pom.groupId}") else value
+
+
+def bump_maven_reactor(root_pom: Path, old: str, new: str) -> list[Path]:
+    """Bump the aggregator and every module reachable from it in one pass; returns the rewritten POMs.
+
+    Rewrites project versions, <parent><version> and dependency/plugin versions that point at a
+    reactor module and hold `old`. Versions given as ${...} properties are left alone.
+    """
+    poms = maven_reactor(root_pom)
+    coords = {path: _pom_coordinates(model) for path, (_text, model) in poms.items()}
+    reactor = set(coords.values())
+
+    edits: dict[Path, list[tuple[int, int]]] = {}
+    for path, (_text, model) in poms.items():
+        spans = []
+        version = model["project"].get("version")
+        if version and version[0] in (old, f"v{old}"):
+            spans.append(version[1])
+        for ref in model["references"]:
+            if _field(ref, "version") not in (old, f"v{old}"):
+                continue
+            if (_resolve_group(_field(ref, "groupId"), coords[path]), _field(ref, "artifactId")) in reactor:
+                spans.append(ref["version"][1])
+        if spans:
+            edits[path] = spans
+
+    def rewrite(path: Path) -> Path:
+        text = poms[path][0]
+        for start, end in sorted(edits[path], reverse=True):
+            text = text[:start] + new + text[end:]
+        _write_atomic(path, text.encode("utf-8"))
+        return path
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        return list(pool.map(rewrite, edits))
+
+
+# --- Version reference sweep ---
+
+# Declared patterns for stale references that are safe to rewrite; {version} marks the version.
+SWEEP_PATTERNS = (
+    r"""appVersion:\s*["']?v?{version}""",
+    r"""\btag:\s*["']?v?{version}""",
+    r"""newTag:\s*["']?v?{version}""",
+    r"""image:\s*["']?[^\s"':]+(?::\d+)?/?[^\s"':]*:v?{version}""",
+    r"""badge/version-v?{version}""",
+)
+SWEEP_MAX_BYTES = 1 << 20
+SWEEP_BINARY_PROBE = 8192
+
+
+def _sweep_candidates(root: Path, globs: list[str]) -> list[Path]:
+    """Tracked files (ignore-aware via git; SKIP_PARTS-pruned walk outside a repo) matching globs."""
+    try:
+        out = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root,
+            capture_output=True,
+            check=True,
+        ).stdout
+        rels = [rel.decode() for rel in out.split(b"\0") if rel]
+    except (OSError, subprocess.CalledProcessError):
+        rels = []
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name not in SKIP_PARTS:
+                                    stack.append(Path(entry.path))
+                            elif entry.is_file(follow_symlinks=False):
+                                rels.append(Path(entry.path).relative_to(root).as_posix())
+                        except OSError as e:
+                            print(f"Warning: Skipping {entry.path}: {e}", file=sys.stderr)
+            except OSError as e:
+                print(f"Warning: Could not read {directory}: {e}", file=sys.stderr)
+
+    def wanted(rel: str) -> bool:
+        return any(
+            fnmatch.fnmatch(rel, pat) or (pat.startswith("**/") and fnmatch.fnmatch(rel, pat[3:])) for pat in globs
+        )
+
+    return [root / rel for rel in sorted(rels) if wanted(rel)]
+
+
+def sweep_version_references(
+    root: Path, globs: list[str], old: str, new: str, patterns: tuple[str, ...] = SWEEP_PATTERNS
+) -> tuple[list[tuple[Path, int, str, bool]], list[Path]]:
+    """Find exact occurrences of `old` in files matching globs and rewrite those inside a declared pattern.
+
+    Files are scanned in parallel; binaries (NUL in the first 8 KiB) and files over 1 MiB are skipped.
+    Returns (hits as (path, line, text, rewritten), rewritten files).
+    """
+    # Exact: not part of a longer version (1.2.30, 11.2.3, 1.2.3.4) or of a prerelease of it (1.2.3-rc.1).
+    boundary = r"(?![\w]|\.\d|-[0-9A-Za-z]+\.\d)"
+    occurrence = re.compile(r"(?<![\d.])" + re.escape(old) + boundary)
+    rewrites = [re.compile(p.replace("{version}", f"(?P<version>{re.escape(old)}){boundary}")) for p in patterns]
+
+    def scan(path: Path):
+        try:
+            if path.stat().st_size > SWEEP_MAX_BYTES:
+                return path, None, [], []
+            data = path.read_bytes()
+        except OSError:
+            return path, None, [], []
+        if b"\0" in data[:SWEEP_BINARY_PROBE] or old.encode() not in data:
+            return path, None, [], []
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return path, None, [], []
+        spans = sorted({m.span("version") for rx in rewrites for m in rx.finditer(text)})
+        return path, text, list(occurrence.finditer(text)), spans
+
+    hits: list[tuple[Path, int, str, bool]] = []
+    written: list[Path] = []
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        for path, text, found, spans in pool.map(scan, _sweep_candidates(root, globs)):
+            if not found:
+                continue
+            starts = {start for start, _end in spans}
+            for m in found:
+                line_start = text.rfind("\n", 0, m.start()) + 1
+                line_end = text.find("\n", m.end())
+                line = text[line_start : line_end if line_end >= 0 else len(text)].strip()
+                hits.append((path, text.count("\n", 0, m.start()) + 1, line, m.start() in starts))
+            if spans:
+                for start, end in reversed(spans):
+                    text = text[:start] + new + text[end:]
+                _write_atomic(path, text.encode("utf-8"))
+                written.append(path)
+    return hits, written
+
+
+def sweep_patterns(patterns_spec: str) -> tuple[str, ...]:
+    """Sweep patterns from the input (one per line; defaults when empty); exits on a pattern without {version}."""
+    patterns = tuple(p.strip() for p in patterns_spec.splitlines() if p.strip()) or SWEEP_PATTERNS
+    for pattern in patterns:
+        if "{version}" not in pattern:
+            print(f"Error: Sweep pattern '{pattern}' has no {{version}} placeholder.", file=sys.stderr)
+            sys.exit(1)
+        try:
+            re.compile(pattern.replace("{version}", "(?P<version>x)"))
+        except re.error as e:
+            print(f"Error: Invalid sweep pattern '{pattern}': {e}", file=sys.stderr)
+            sys.exit(1)
+    return patterns
+
+
+def main_sweep(globs_spec: str, patterns_spec: str, old: str, new: str) -> list[Path]:
+    globs = [g.strip() for g in globs_spec.splitlines() if g.strip() and not g.strip().startswith("#")]
+    patterns = sweep_patterns(patterns_spec)
+    hits, written = sweep_version_references(Path.cwd(), globs, old, new, patterns)
+    print(f"Sweep: {len(hits)} references to {old} in {len({h[0] for h in hits})} files")
+    for path, line_no, line, rewritten in hits:
+        marker = "rewritten" if rewritten else "left as is"
+        print(f"  {path.relative_to(Path.cwd())}:{line_no} ({marker}): {line}")
+    return written
+
+
+# --- Fleet-wide action pin rewrite ---
+
+PIN_REPOSITORY = "octopilot/actions"
+_PIN_USES = re.compile(
+    r"""(?P<head>\buses:[ \t]*["']?""" + re.escape(PIN_REPOSITORY) + r"""(?:/[^@\s"']*)?@)(?P<ref>[^\s"'#]+)"""
+)
+_PIN_ACTIONS_REF = re.compile(r"""(?P<head>^[ \t]*actions_ref:[ \t]*["']?)(?P<ref>[^\s"'#]+)""", re.MULTILINE)
+
+
+def _workflow_files(repo: Path) -> list[Path]:
+    """YAML files under .github/ (workflows and local composite actions)."""
+    out = []
+    stack = [repo / ".github"]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.name.endswith((".yml", ".yaml")):
+                    out.append(Path(entry.path))
+    return sorted(out)
+
+
+def rewrite_pins(text: str, to_ref: str, from_ref: str = "") -> tuple[str, int]:
+    """Point `uses: octopilot/actions/...@ref` and `actions_ref:` pins at to_ref; returns (text, count).
+
+    Only the ref is replaced, so quoting, comments and indentation stay as they were. With
+    from_ref, only pins currently at that ref move.
+    """
+    count = 0
+
+    def repl(m: re.Match[str]) -> str:
+        nonlocal count
+        if m.group("ref") == to_ref or (from_ref and m.group("ref") != from_ref):
+            return m.group(0)
+        count += 1
+        return m.group("head") + to_ref
+
+    text = _PIN_USES.sub(repl, text)
+    text = _PIN_ACTIONS_REF.sub(repl, text)
+    return text, count
+
+
+def rewrite_repo_pins(repo: Path, to_ref: str, from_ref: str = "") -> dict:
+    changed = []
+    pins = 0
+    for path in _workflow_files(repo):
+        try:
+            text = path.read_bytes().decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Warning: Could not read {path}: {e}", file=sys.stderr)
+            continue
+        new_text, count = rewrite_pins(text, to_ref, from_ref)
+        if count:
+            _write_atomic(path, new_text.encode("utf-8"))
+            changed.append(path.relative_to(repo).as_posix())
+            pins += count
+    return {"changed": changed, "pins": pins}
+
+
+def rewrite_fleet_pins(repos: list[Path], to_ref: str, from_ref: str = "", jobs: int = 8) -> dict:
+    """Rewrite pins across many local checkouts with a bounded worker pool; returns {repo: summary}."""
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        results = pool.map(lambda repo: rewrite_repo_pins(repo, to_ref, from_ref), repos)
+        return {str(repo): result for repo, result in zip(repos, results, strict=True)}
+
+
+def main_pins() -> None:
+    to_ref = (os.environ.get("INPUT_PIN_TO") or "").strip()
+    if not to_ref:
+        print("Error: pins mode requires input 'pin-to' (e.g. v2).", file=sys.stderr)
+        sys.exit(1)
+    from_ref = (os.environ.get("INPUT_PIN_FROM") or "").strip()
+    try:
+        jobs = max(1, int((os.environ.get("INPUT_JOBS") or "").strip() or "8"))
+    except ValueError:
+        print(f"Error: Invalid jobs '{os.environ['INPUT_JOBS']}'; expected a number.", file=sys.stderr)
+        sys.exit(1)
+    root = Path.cwd()
+    repos: list[Path] = []
+    for line in (os.environ.get("INPUT_REPOS") or ".").splitlines():
+        pattern = line.strip()
+        if not pattern:
+            continue
+        matches = sorted(root.glob(pattern)) if any(c in pattern for c in "*?[") else [root / pattern]
+        repos.extend(p for p in matches if p.is_dir())
+    summary = rewrite_fleet_pins(list(dict.fromkeys(repos)), to_ref, from_ref, jobs)
+    changed = {repo: result for repo, result in summary.items() if result["changed"]}
+    print(f"Pins -> {to_ref}: {sum(r['pins'] for r in changed.values())} pins in {len(changed)}/{len(summary)} repos")
+    print(json.dumps(summary, indent=2))
+    with ActionIO() as io:
+        io.output("pins", json.dumps(summary))
+
+
+# --- Multi-target mode ---
+
+# Locator per mode for multi-target bumps; gradle picks its scanner from the file name.
+MODE_LOCATORS = {
+    "go": lambda text, name: go_version_span(text),
+    "rust": lambda text, name: toml_version_span(text),
+    "maven": lambda text, name: pom_version_span(text),
+    "gradle": gradle_version_span,
+    "node": lambda text, name: json_version_span(text),
+    "python": lambda text, name: _python_version_span(text),
+    "dotnet": lambda text, name: dotnet_version_span(text),
+    "text": lambda text, name: _text_version_span(text),
+    "buildpack": lambda text, name: _buildpack_version_span(text),
+    "helm": lambda text, name: helm_version_span(text),
+}
+
+# Mode inferred from a target's file name when the target line gives none.
+MODE_BY_FILENAME = {
+    "Cargo.toml": "rust",
+    "pom.xml": "maven",
+    "gradle.properties": "gradle",
+    "build.gradle": "gradle",
+    "build.gradle.kts": "gradle",
+    "package.json": "node",
+    "pyproject.toml": "python",
+    "buildpack.toml": "buildpack",
+    "Chart.yaml": "helm",
+    "VERSION": "text",
+}
+
+
+def _infer_mode(path: Path) -> str | None:
+    if path.name in MODE_BY_FILENAME:
+        return MODE_BY_FILENAME[path.name]
+    if path.suffix == ".csproj":
+        return "dotnet"
+    if path.suffix == ".go":
+        return "go"
+    return None
+
+
+def parse_targets(spec: str, root: Path) -> list[tuple[str, Path]]:
+    """Expand INPUT_TARGETS lines (`[mode:]path-or-glob`, `#` comments) into (mode, path) pairs.
+
+    Globs are resolved against root; a literal path that does not exist is an error.
+    """
+    targets: list[tuple[str, Path]] = []
+    seen: set[Path] = set()
+    for raw in spec.splitlines():
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        mode, sep, pattern = line.partition(":")
+        if not sep or mode not in MODE_LOCATORS:
+            mode, pattern = "", line
+        pattern = pattern.strip()
+        if any(c in pattern for c in "*?["):
+            paths = sorted(p for p in root.glob(pattern) if p.is_file())
+            if not paths:
+                print(f"Warning: Target '{pattern}' matched no files.", file=sys.stderr)
+        else:
+            paths = [root / pattern]
+            if not paths[0].is_file():
+                print(f"Error: Target '{pattern}' not found.", file=sys.stderr)
+                sys.exit(1)
+        for p in paths:
+            rel = p.relative_to(root) if p.is_relative_to(root) else p
+            if any(part in rel.parts for part in SKIP_PARTS) or p in seen:
+                continue
+            m = mode or _infer_mode(p)
+            if m is None:
+                print(f"Error: Cannot infer mode for target '{p}'; prefix it with '<mode>:'.", file=sys.stderr)
+                sys.exit(1)
+            seen.add(p)
+            targets.append((m, p))
+    return targets
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, path.stat().st_mode & 0o7777)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def bump_targets(targets: list[tuple[str, Path]], bump: str) -> tuple[str, str, str, list[Path]]:
+    """Bump every target to one new version in a single pass; returns (old, new, bump, updated paths).
+
+    Files are read concurrently and must all agree on the current version. Writes
+    go through a temp file + rename per file; if any write fails, files already
+    replaced are restored from their original bytes, so the tree is all-or-nothing.
+    """
+
+    def read(target: tuple[str, Path]) -> tuple[bytes, str]:
+        path = target[1]
+        try:
+            data = path.read_bytes()
+            return data, data.decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error: Could not read {path}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    with ThreadPoolExecutor(max_workers=min(16, len(targets) or 1)) as pool:
+        contents = list(pool.map(read, targets))
+
+    located = []
+    for (mode, path), (data, text) in zip(targets, contents, strict=True):
+        span = MODE_LOCATORS[mode](text, path.name)
+        if span is None:
+            print(f"Error: Could not find version in {path} ({mode})", file=sys.stderr)
+            sys.exit(1)
+        spans = [span]
+        if mode == "rust":  # [workspace.package] and [package] move together
+            spans = [s for s in toml_version_spans(text) if text[s[0] : s[1]] == text[span[0] : span[1]]]
+        located.append((path, data, text, spans, text[span[0] : span[1]].lstrip("v")))
+
+    versions = {version for *_, version in located}
+    if len(versions) != 1:
+        print("Error: Targets disagree on the current version:", file=sys.stderr)
+        for path, *_, version in located:
+            print(f"  {path}: {version}", file=sys.stderr)
+        sys.exit(1)
+    current = versions.pop()
+    if bump == "auto":
+        bump = auto_bump(current)
+        print(f"Auto bump from commits since last tag: {bump}")
+    new = bump_semver(current, bump)
+
+    written: list[tuple[Path, bytes]] = []
+    try:
+        for path, data, text, spans, _version in located:
+            for start, end in reversed(spans):
+                text = text[:start] + new + text[end:]
+            _write_atomic(path, text.encode("utf-8"))
+            written.append((path, data))
+    except OSError as e:
+        for path, data in reversed(written):
+            _write_atomic(path, data)
+        print(f"Error: Write failed ({e}); restored {len(written)} already-updated files.", file=sys.stderr)
+        sys.exit(1)
+    return current, new, bump, [path for path, _ in written]
+
+
+def _write_outputs(current_version: str, new_version: str, bump_type: str) -> None:
+    with ActionIO() as io:
+        io.output("old_version", current_version)
+        io.output("version", new_version)
+        io.output("bump", bump_type)
+
+
+def main_targets(spec: str, bump_type: str) -> None:
+    targets = parse_targets(spec, Path.cwd())
+    if not targets:
+        print("Error: INPUT_TARGETS matched no files.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Bumping {len(targets)} targets ({bump_type})...")
+    current_version, new_version, bump_type, updated_files = bump_targets(targets, bump_type)
+    print(f"Current version: {current_version}")
+    print(f"Target version: {new_version} ({bump_type})")
+    sweep = (os.environ.get("INPUT_SWEEP") or "").strip()
+    if sweep:
+        updated_files += main_sweep(sweep, os.environ.get("INPUT_SWEEP_PATTERNS") or "", current_version, new_version)
+    print(f"Updated {len(updated_files)} files:")
+    for p in updated_files:
+        print(f"  {p}")
+    _write_outputs(current_version, new_version, bump_type)
+
+
 def main():
     mode = os.environ.get("INPUT_MODE", "go")
     bump_type = os.environ.get("INPUT_BUMP", "patch")
+    if mode == "pins":
+        main_pins()
+        return
+    if (os.environ.get("INPUT_SWEEP") or "").strip():
+        sweep_patterns(os.environ.get("INPUT_SWEEP_PATTERNS") or "")  # fail before any file is bumped
+    targets_spec = (os.environ.get("INPUT_TARGETS") or "").strip()
+    if targets_spec:
+        main_targets(targets_spec, bump_type)
+        return
     file_path_str = (os.environ.get("INPUT_FILE") or "").strip() or ""
     # buildpack: always use ./buildpack.toml (checkout is the buildpack repo; ignore INPUT_FILE)
     if mode == "buildpack":
@@ -415,6 +1095,8 @@ def main():
             file_path_str = "VERSION"
         elif mode == "buildpack":
             file_path_str = "buildpack.toml"
+        elif mode == "helm":
+            file_path_str = "Chart.yaml"
 
     # buildpack: always use buildpack.toml (avoids "." or "" from omitted INPUT_FILE in older images)
     if mode == "buildpack":
@@ -447,6 +1129,8 @@ def main():
             current_version = get_current_version_text(content)
         elif mode == "buildpack":
             current_version = get_current_version_buildpack(content)
+        elif mode == "helm":
+            current_version = get_current_version_helm(content)
         else:
             print(f"Error: Unsupported mode '{mode}'", file=sys.stderr)
             sys.exit(1)
@@ -456,6 +1140,9 @@ def main():
 
     print(f"Current version: {current_version}")
 
+    if bump_type == "auto":
+        bump_type = auto_bump(current_version)
+        print(f"Auto bump from commits since last tag: {bump_type}")
     new_version = bump_semver(current_version, bump_type)
     print(f"Target version: {new_version} ({bump_type})")
 
@@ -465,8 +1152,9 @@ def main():
         if replace_version_in_file(file_path, current_version, new_version, mode):
             updated_files.append(file_path)
     elif mode == "maven":
-        if replace_version_in_file_maven(file_path, current_version, new_version):
-            updated_files.append(file_path)
+        # Multi-module builds: the aggregator, every module's <parent> and inter-module
+        # dependency versions move together (a single-module POM is just its own reactor).
+        updated_files.extend(bump_maven_reactor(file_path, current_version, new_version))
     elif mode == "gradle":
         if replace_version_in_file_gradle(file_path, current_version, new_version, file_path.name):
             updated_files.append(file_path)
@@ -485,6 +1173,9 @@ def main():
     elif mode == "buildpack":
         if replace_version_in_file_buildpack(file_path, current_version, new_version):
             updated_files.append(file_path)
+    elif mode == "helm":
+        if patch_version(file_path, helm_version_span, current_version, new_version):
+            updated_files.append(file_path)
     elif mode == "rust":
         # For Rust, we walk the whole workspace
         project_root = Path.cwd()
@@ -494,13 +1185,28 @@ def main():
 
         # Then walk others
         print("Scanning workspace for Cargo.toml files to update...")
-        for p in _cargo_toml_paths(project_root):
+        manifests = _cargo_toml_paths(project_root)
+        for p in manifests:
             if p.resolve() == file_path.resolve():
                 continue  # Already processed
 
             if replace_version_in_file(p, current_version, new_version, mode):
                 updated_files.append(p)
 
+        # Keep Cargo.lock in step so `cargo build --locked` works without a re-resolve: only crates whose
+        # manifest was rewritten, plus members inheriting a [workspace.package] version that was.
+        bumped = set(updated_files)
+        if any(toml_version_span(p.read_bytes().decode("utf-8"), ("workspace.package",)) for p in bumped):
+            bumped.update(p for p in manifests if cargo_inherits_workspace_version(p))
+        names = {n for p in bumped if (n := cargo_package_name(p))}
+        lock_path = file_path.parent / "Cargo.lock"
+        if update_cargo_lock(lock_path, names, current_version, new_version):
+            updated_files.append(lock_path)
+
+    sweep = (os.environ.get("INPUT_SWEEP") or "").strip()
+    if sweep:
+        updated_files += main_sweep(sweep, os.environ.get("INPUT_SWEEP_PATTERNS") or "", current_version, new_version)
+
     if not updated_files:
         print("Warning: No files were updated.", file=sys.stderr)
     else:
@@ -508,10 +1214,7 @@ def main():
         for p in updated_files:
             print(f"  {p}")
 
-    if "GITHUB_OUTPUT" in os.environ:
-        with open(os.environ["GITHUB_OUTPUT"], "a") as f:
-            f.write(f"old_version={current_version}\n")
-            f.write(f"version={new_version}\n")
+    _write_outputs(current_version, new_version, bump_type)
 
 
 if __name__ == "__main__":
@@ -1,5 +1,12 @@
 """Shared code for octopilot-actions."""
 
-from common.notes import run as run_release_notes
-
 __all__ = ["run_release_notes"]
+
+
+def __getattr__(name: str):
+    # Lazy, so the stdlib-only modules (gha, history) import without common.notes' dependencies.
+    if name == "run_release_notes":
+        from common.notes import run
+
+        return run
+    raise AttributeError(f"module 'common' has no attribute {name!r}")
@@ -0,0 +1,131 @@
+"""Content-addressed on-disk cache for AI provider responses (one JSON file per key), plus a latency log.
+
+The directory is plain files, so it can ride on actions/cache between workflow runs.
+Entries expire after a TTL; when the directory grows past its size budget, the least
+recently used entries (by mtime, refreshed on every hit) are evicted.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def cache_key(*parts: str) -> str:
+    """sha256 over the parts, length-prefixed so ("ab", "c") and ("a", "bc") differ."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        h.update(f"{len(data)}:".encode())
+        h.update(data)
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """Get/put text values by key under `directory`, with TTL and size-based LRU eviction."""
+
+    def __init__(self, directory: Path, *, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        """Cached value, or None when missing, unreadable or older than the TTL (then it is dropped)."""
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - float(entry.get("created", 0)) > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(path)  # LRU: a hit makes the entry recent again
+        return entry.get("value")
+
+    def put(self, key: str, value: str, **meta: str) -> None:
+        """Store value atomically (temp file + rename), then evict down to the size budget."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"created": time.time(), "value": value, **meta}, f)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Drop entries unused for longer than the TTL, then least recently used ones until the total fits max_bytes."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = 0
+        live = []
+        for mtime, size, path in entries:
+            if now - mtime > self.ttl:
+                path.unlink(missing_ok=True)
+            else:
+                live.append((mtime, size, path))
+                total += size
+        for _mtime, size, path in sorted(live):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+# Serialises the read-modify-write of latency.json across threads (hedged attempts, backfill workers).
+_LATENCY_LOCK = threading.Lock()
+
+
+def record_latency(directory: Path, name: str, seconds: float, keep: int = 50) -> None:
+    """Append a latency sample for name (e.g. "anthropic/<model>") to directory/latency.json (last `keep` kept).
+
+    The file is rewritten through a temp file + rename under a lock, so concurrent
+    recorders neither lose samples nor leave a half-written file for readers.
+    """
+    path = Path(directory) / "latency.json"
+    with _LATENCY_LOCK:
+        try:
+            samples = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            samples = {}
+        samples[name] = ([*samples.get(name, []), round(seconds, 3)])[-keep:]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=path.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(samples, f)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def latency_percentile(directory: Path, name: str, percentile: float, min_samples: int = 5) -> float | None:
+    """The percentile (0-100, nearest rank) of recorded latencies for name, or None with too few samples."""
+    try:
+        samples = sorted(json.loads((Path(directory) / "latency.json").read_text(encoding="utf-8")).get(name, []))
+    except (OSError, ValueError):
+        return None
+    if len(samples) < min_samples:
+        return None
+    rank = max(1, math.ceil(percentile / 100 * len(samples)))
+    return float(samples[rank - 1])
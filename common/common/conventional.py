@@ -0,0 +1,180 @@
+"""Offline conventional-commit classifier for release notes.
+
+Commits following `type(scope)!: description` are sorted into the Features, Fixes and Other
+sections of a notes template without a provider call; reverts cancel the commit they revert
+when both are in range. Whatever does not parse is left for the provider (or listed as is).
+"""
+
+from __future__ import annotations
+
+import re
+
+SECTIONS = ("Features", "Fixes", "Other")
+
+TYPE_SECTIONS = {
+    "feat": "Features",
+    "fix": "Fixes",
+    **dict.fromkeys(("perf", "refactor", "docs", "chore", "build", "ci", "test", "style", "revert"), "Other"),
+}
+
+_SUBJECT = re.compile(r"^(?P<type>[A-Za-z]+)(?:\((?P<scope>[^)\n]*)\))?(?P<breaking>!)?:\s*(?P<description>\S.*)$")
+_BREAKING_FOOTER = re.compile(r"^BREAKING[ -]CHANGE:", re.MULTILINE)
+_GIT_REVERT = re.compile(r'^Revert "(?P<subject>.+)"$')
+_HEADING = re.compile(r"^#{1,6}\s+(?P<title>.+?)\s*#*\s*$")
+_BULLET = re.compile(r"^\s*[-*]\s+(?P<text>\S.*)$")
+_PLACEHOLDER = re.compile(r"^\s*(?:[-*]\s*)?\[[^\]]*\]\s*$")
+
+
+def parse_commit(message: str) -> dict | None:
+    """type, scope, breaking, description and subject of a conventional commit; None if it is not one.
+
+    Types outside TYPE_SECTIONS (e.g. `wip:`) do not count as conventional.
+    """
+    subject, _, body = message.strip().partition("\n")
+    m = _SUBJECT.match(subject.strip())
+    if not m or m.group("type").lower() not in TYPE_SECTIONS:
+        return None
+    return {
+        "type": m.group("type").lower(),
+        "scope": (m.group("scope") or "").strip() or None,
+        "breaking": bool(m.group("breaking") or _BREAKING_FOOTER.search(body)),
+        "description": m.group("description").strip(),
+        "subject": subject.strip(),
+    }
+
+
+def _reverted_subject(subject: str) -> str | None:
+    m = _GIT_REVERT.match(subject)
+    if m:
+        return m.group("subject")
+    parsed = parse_commit(subject)
+    if parsed and parsed["type"] == "revert":
+        return parsed["description"].strip('"')
+    return None
+
+
+def drop_revert_pairs(messages: list[str]) -> list[str]:
+    """Messages (newest first, as git log lists them) minus commits reverted in the same range and their reverts."""
+    kept: list[str] = []
+    for message in reversed(messages):
+        subject = message.strip().partition("\n")[0].strip()
+        target = _reverted_subject(subject)
+        match = next((i for i, k in enumerate(kept) if k.partition("\n")[0].strip() == target), None)
+        if match is not None:
+            del kept[match]
+        else:
+            kept.append(message.strip())
+    return kept[::-1]
+
+
+def classify_commits(messages: list[str]) -> tuple[dict[str, list[dict]], list[str]]:
+    """Return ({section: parsed commits}, unclassified subjects), after dropping revert pairs.
+
+    Duplicate subjects are listed once.
+    """
+    sections: dict[str, list[dict]] = {name: [] for name in SECTIONS}
+    unclassified: list[str] = []
+    seen: set[str] = set()
+    for message in drop_revert_pairs(messages):
+        subject = message.partition("\n")[0].strip()
+        if not subject or subject in seen:
+            continue
+        seen.add(subject)
+        parsed = parse_commit(message)
+        if parsed is None:
+            unclassified.append(subject)
+        else:
+            sections[TYPE_SECTIONS[parsed["type"]]].append(parsed)
+    return sections, unclassified
+
+
+def bullet(commit: dict) -> str:
+    """Markdown bullet for a parsed commit: `- **Breaking:** **scope:** description`."""
+    text = commit["description"]
+    if commit["scope"]:
+        text = f"**{commit['scope']}:** {text}"
+    if commit["breaking"]:
+        text = f"**Breaking:** {text}"
+    return f"- {text}"
+
+
+def _count(n: int, singular: str, plural: str) -> str:
+    return f"{n} {singular if n == 1 else plural}"
+
+
+def offline_summary(sections: dict[str, list[dict]], unclassified: list[str]) -> str:
+    """One-sentence summary counted from the classified commits, for notes written without a provider."""
+    features, fixes = len(sections["Features"]), len(sections["Fixes"])
+    other = len(sections["Other"]) + len(unclassified)
+    parts = [
+        _count(n, singular, plural)
+        for n, singular, plural in (
+            (features, "new feature", "new features"),
+            (fixes, "fix", "fixes"),
+            (other, "other change", "other changes"),
+        )
+        if n
+    ]
+    if not parts:
+        return "This release has no changes."
+    listed = parts[0] if len(parts) == 1 else f"{', '.join(parts[:-1])} and {parts[-1]}"
+    breaking = sum(c["breaking"] for entries in sections.values() for c in entries)
+    suffix = f", including {_count(breaking, 'breaking change', 'breaking changes')}" if breaking else ""
+    return f"This release has {listed}{suffix}."
+
+
+def split_sections(markdown: str) -> tuple[str, dict[str, list[str]]]:
+    """(text before the first heading or under a Summary heading, {heading: bullets}) of a Markdown body."""
+    summary: list[str] = []
+    sections: dict[str, list[str]] = {}
+    current = None
+    for line in markdown.splitlines():
+        m = _HEADING.match(line)
+        if m:
+            title = m.group("title")
+            current = None if title.lower() == "summary" else title
+            if current is not None:
+                sections.setdefault(current, [])
+            continue
+        if current is None:
+            summary.append(line)
+        elif b := _BULLET.match(line):
+            sections[current].append(f"- {b.group('text')}")
+    return "\n".join(summary).strip(), sections
+
+
+def prefill(template: str, content: dict[str, list[str]]) -> str:
+    """Fill the template's sections by heading title (case-insensitive).
+
+    A filled section's placeholder lines (`[...]` or `- [...]`) are replaced with its content
+    lines; a section given no lines is dropped with its placeholders. Content whose heading is
+    not in the template is appended under a new `###` heading.
+    """
+    wanted = {title.lower(): (title, lines) for title, lines in content.items()}
+    out: list[str] = []
+    filling = dropping = False
+    for line in template.splitlines():
+        m = _HEADING.match(line)
+        if m:
+            filling = dropping = False
+            key = m.group("title").lower()
+            if key in wanted:
+                _title, lines = wanted.pop(key)
+                if not lines:
+                    dropping = True
+                    continue
+                out.append(line)
+                out.extend(lines)
+                filling = True
+                continue
+        elif (filling or dropping) and _PLACEHOLDER.match(line):
+            continue
+        elif dropping:
+            dropping = False
+            if not line.strip():
+                continue
+        out.append(line)
+    for title, lines in wanted.values():
+        if lines:
+            out.extend(["", f"### {title}", *lines])
+    return "\n".join(out).strip()
@@ -0,0 +1,109 @@
+"""Buffered GitHub Actions step outputs and environment variables.
+
+Entries are collected and appended to $GITHUB_OUTPUT / $GITHUB_ENV in one write per file on
+flush. Multi-line values use a random heredoc delimiter (`ghadelimiter_<uuid>`, as
+@actions/core does), so a value containing `EOF` cannot end itself early. Bodies over
+spill_bytes go to a file and only its path is emitted.
+
+Stdlib only, so composite actions can use it with PYTHONPATH pointing at common/.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+from typing import TextIO
+
+DEFAULT_SPILL_BYTES = 64 * 1024
+
+
+def format_entry(name: str, value: object) -> str:
+    """`name=value` line, or a `name<<delimiter` heredoc when value spans lines. Raises ValueError on a bad name."""
+    if not name or any(c in name for c in "=\r\n") or name.strip() != name:
+        raise ValueError(f"Invalid output or environment variable name: {name!r}")
+    text = str(value)
+    if "\n" not in text and "\r" not in text:
+        return f"{name}={text}\n"
+    delimiter = f"ghadelimiter_{uuid.uuid4()}"
+    while delimiter in text:
+        delimiter = f"ghadelimiter_{uuid.uuid4()}"
+    return f"{name}<<{delimiter}\n{text}\n{delimiter}\n"
+
+
+class ActionIO:
+    """
+    Collect outputs and env entries, then append each kind to its file in one write.
+
+    Paths default to $GITHUB_OUTPUT and $GITHUB_ENV; when one is unset (local runs), its
+    entries are printed to `fallback` (stdout) in the same format instead. Use as a context
+    manager to flush when the block completes; a block that raises (sys.exit included)
+    publishes nothing, so a failing step leaves no partial outputs.
+    """
+
+    def __init__(
+        self,
+        output_path: str | os.PathLike | None = None,
+        env_path: str | os.PathLike | None = None,
+        *,
+        spill_bytes: int = DEFAULT_SPILL_BYTES,
+        spill_dir: str | os.PathLike | None = None,
+        fallback: TextIO | None = None,
+    ) -> None:
+        self.output_path = output_path if output_path is not None else os.environ.get("GITHUB_OUTPUT")
+        self.env_path = env_path if env_path is not None else os.environ.get("GITHUB_ENV")
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self.fallback = fallback
+        self._outputs: dict[str, str] = {}
+        self._env: dict[str, str] = {}
+
+    def output(self, name: str, value: object) -> None:
+        """Set step output name (a later value for the same name replaces the earlier one)."""
+        self._outputs[name] = format_entry(name, value)
+
+    def env(self, name: str, value: object) -> None:
+        """Export name to the environment of the following steps."""
+        self._env[name] = format_entry(name, value)
+
+    def body(self, name: str, value: str, *, path: str | os.PathLike | None = None) -> str | None:
+        """
+        Output a possibly large text: `name` itself while it fits in spill_bytes, plus
+        `<name>_file` with its path when it is in a file. Returns that path, or None.
+
+        path is a file that already holds value (it is not rewritten); otherwise a body over
+        spill_bytes is written to `<name>.txt` under spill_dir ($RUNNER_TEMP, else the temp dir).
+        """
+        if path is None and len(value.encode("utf-8")) > self.spill_bytes:
+            directory = Path(self.spill_dir or os.environ.get("RUNNER_TEMP") or tempfile.gettempdir())
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{name}.txt"
+            Path(path).write_text(value, encoding="utf-8")
+        if len(value.encode("utf-8")) <= self.spill_bytes:
+            self.output(name, value)
+        if path is None:
+            return None
+        self.output(f"{name}_file", path)
+        return str(path)
+
+    def flush(self) -> None:
+        """Append the buffered entries to their files (or the fallback stream) and clear the buffer."""
+        for path, entries in ((self.output_path, self._outputs), (self.env_path, self._env)):
+            if not entries:
+                continue
+            text = "".join(entries.values())
+            if path:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(text)
+            else:
+                (self.fallback or sys.stdout).write(text)
+            entries.clear()
+
+    def __enter__(self) -> ActionIO:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *exc: object) -> None:
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,221 @@
+"""Fetch just enough git history for release notes in a shallow checkout.
+
+The previous tag comes from one tag listing (`git ls-remote --tags` against the remote, or
+`git for-each-ref` locally), sorted by version; only the commits after it are then fetched,
+blobless, with `--shallow-exclude`, instead of checking out the full history.
+
+Stdlib only (outputs go through common.gha), so the previous-tag composite action can run it
+with any python3:
+
+    PYTHONPATH=common python3 -m common.history [--fallback v0.0.0] [--remote origin]
+"""
+
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+from common.gha import ActionIO
+
+DEFAULT_REMOTE = "origin"
+
+
+class HistoryError(Exception):
+    """A git command needed to list tags or fetch history failed."""
+
+
+def _git(cwd: Path, *args: str) -> str:
+    try:
+        result = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=False)
+    except OSError as e:
+        raise HistoryError(f"git {args[0]} failed: {e}") from e
+    if result.returncode != 0:
+        raise HistoryError(f"git {args[0]} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def is_shallow(cwd: Path) -> bool:
+    """True if cwd is inside a shallow clone; False for full clones and outside a git repository."""
+    try:
+        return _git(cwd, "rev-parse", "--is-shallow-repository").strip() == "true"
+    except HistoryError:
+        return False
+
+
+def list_tags(cwd: Path, remote: str | None = None, *, merged: str | None = None) -> list[tuple[str, str]]:
+    """(tag, commit sha) pairs, highest version first, from a single git call.
+
+    With remote, the tags are listed by `git ls-remote` (nothing is fetched); otherwise from the
+    local refs, only those in the history of `merged` when given. Annotated tags are peeled to
+    the commit they point at.
+    """
+    if remote:
+        out = _git(cwd, "ls-remote", "--tags", "--sort=-v:refname", remote)
+        rows = [line.split("\t") for line in out.splitlines() if "\t" in line]
+        pairs = [(ref.removeprefix("refs/tags/"), sha) for sha, ref in rows]
+    else:
+        fmt = "--format=%(refname)%09%(objectname)%09%(*objectname)"
+        scope = [f"--merged={merged}"] if merged else []
+        out = _git(cwd, "for-each-ref", "--sort=-v:refname", fmt, *scope, "refs/tags")
+        rows = [line.split("\t") for line in out.splitlines() if line]
+        pairs = [(ref.removeprefix("refs/tags/"), peeled or sha) for ref, sha, peeled in rows]
+    commits: dict[str, str] = {}
+    for tag, sha in pairs:
+        if tag.endswith("^{}"):
+            commits[tag[:-3]] = sha  # peeled line: the commit, not the tag object
+        else:
+            commits.setdefault(tag, sha)
+    return list(commits.items())
+
+
+def previous_tag(tags: list[tuple[str, str]], head: str, *, include_head: bool = False) -> str | None:
+    """The first of tags (highest version first, as from list_tags) not on HEAD; None if there is none.
+
+    With include_head, a tag on HEAD itself counts. Ancestry is the caller's concern
+    (list_tags(merged="HEAD") locally; is_ancestor after fetching).
+    """
+    return next((tag for tag, sha in tags if include_head or sha != head), None)
+
+
+def has_commit(cwd: Path, ref: str) -> bool:
+    """True if ref resolves to a commit present in the local repository."""
+    try:
+        _git(cwd, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}")
+    except HistoryError:
+        return False
+    return True
+
+
+def _shallow_cuts(cwd: Path, tag: str, head: str) -> dict[str, list[str]]:
+    """{sha: parents as recorded in the commit} for the shallow-boundary commits in tag..head."""
+    path = Path(cwd) / _git(cwd, "rev-parse", "--git-path", "shallow").strip()
+    try:
+        boundary = set(path.read_text().split())
+    except OSError:
+        return {}
+    cuts = {}
+    for sha in boundary & set(_git(cwd, "rev-list", f"refs/tags/{tag}..{head}").split()):
+        header = _git(cwd, "cat-file", "commit", sha).split("\n\n", 1)[0]
+        cuts[sha] = [line.split()[1] for line in header.splitlines() if line.startswith("parent ")]
+    return cuts
+
+
+def _merge_base_is_ancestor(cwd: Path, ancestor: str, descendant: str) -> bool:
+    try:
+        _git(cwd, "merge-base", "--is-ancestor", ancestor, descendant)
+    except HistoryError:
+        return False
+    return True
+
+
+def is_ancestor(cwd: Path, tag: str, head: str) -> bool:
+    """True if tag's commit is in head's history, counting parents hidden by the shallow boundary."""
+    if not has_commit(cwd, f"refs/tags/{tag}"):
+        return False
+    commit = _git(cwd, "rev-parse", f"refs/tags/{tag}^{{commit}}").strip()
+    if _merge_base_is_ancestor(cwd, commit, head):
+        return True
+    return any(commit in parents for parents in _shallow_cuts(cwd, tag, head).values())
+
+
+def range_complete(cwd: Path, tag: str, head: str) -> bool:
+    """
+    True if the tag is here and tag..head has no shallow cut other than right after it, so
+    `git log tag..head` lists every commit. A clone can hold the tag without the commits
+    between it and HEAD; cuts whose parents are missing count as gaps.
+    """
+    if not has_commit(cwd, f"refs/tags/{tag}") or not is_ancestor(cwd, tag, head):
+        return False
+    return all(
+        has_commit(cwd, parent) and _merge_base_is_ancestor(cwd, parent, f"refs/tags/{tag}")
+        for parents in _shallow_cuts(cwd, tag, head).values()
+        for parent in parents
+    )
+
+
+def fetch_range(cwd: Path, tag: str, head: str, remote: str = DEFAULT_REMOTE) -> bool:
+    """Fetch the tag (depth 1) and the commits of tag..head (blobless); False if the range was already complete.
+
+    `--shallow-exclude` stops the history at tag, so `git log tag..HEAD` has both ends
+    without the commits before it. Merged branches started before the tag also end in a cut
+    (their fork point is not fetched), so such ranges are fetched again on each call.
+    """
+    if range_complete(cwd, tag, head):
+        return False
+    _git(cwd, "fetch", "--no-tags", "--filter=blob:none", "--depth=1", remote, f"+refs/tags/{tag}:refs/tags/{tag}")
+    if not range_complete(cwd, tag, head):
+        _git(cwd, "fetch", "--no-tags", "--filter=blob:none", f"--shallow-exclude=refs/tags/{tag}", remote, head)
+    return True
+
+
+def fetch_all(cwd: Path, remote: str = DEFAULT_REMOTE) -> None:
+    """Unshallow (blobless) with all tags, for ranges that --shallow-exclude cannot bound."""
+    _git(cwd, "fetch", "--filter=blob:none", "--tags", "--unshallow", remote)
+
+
+def prepare_range(
+    cwd: Path, since_tag: str | None = None, remote: str = DEFAULT_REMOTE, *, include_head: bool = False
+) -> str | None:
+    """
+    Return the base ref of the release (since_tag, else the previous tag) after fetching the
+    commits after it into this shallow checkout; None if there is no previous tag.
+
+    The previous tag is the highest version on the remote not on HEAD (include_head: HEAD's own
+    counts) once it proves to be an ancestor of HEAD. When it is not (a release or hotfix branch
+    behind a newer tag on main), the full history is fetched and the highest tag in HEAD's history
+    is used. A since_tag that is not a tag on the remote (a sha, a branch, or the v0.0.0
+    first-release fallback) cannot bound a shallow fetch either, so the full history is fetched.
+    """
+    head = _git(cwd, "rev-parse", "HEAD").strip()
+    tags = list_tags(cwd, remote)
+    if since_tag:
+        tag = since_tag.removeprefix("refs/tags/")
+        if tag in dict(tags):
+            fetch_range(cwd, tag, head, remote)
+        else:
+            fetch_all(cwd, remote)
+        return since_tag
+    base = previous_tag(tags, head, include_head=include_head)
+    if base is not None:
+        fetch_range(cwd, base, head, remote)
+        if is_ancestor(cwd, base, head):
+            return base
+    fetch_all(cwd, remote)
+    return previous_tag(list_tags(cwd, merged="HEAD"), head, include_head=include_head)
+
+
+def find_previous_tag(cwd: Path, remote: str = DEFAULT_REMOTE, *, include_head: bool = False) -> str | None:
+    """
+    The highest-version tag in HEAD's history, skipping tags on HEAD unless include_head; in a
+    shallow checkout, with the commits since it fetched.
+    """
+    if is_shallow(cwd):
+        return prepare_range(cwd, remote=remote, include_head=include_head)
+    head = _git(cwd, "rev-parse", "HEAD").strip()
+    return previous_tag(list_tags(cwd, merged="HEAD"), head, include_head=include_head)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Find the previous tag and fetch the commits since it.")
+    parser.add_argument("--fallback", default="", help="value to output when there is no previous tag")
+    parser.add_argument("--remote", default=DEFAULT_REMOTE)
+    args = parser.parse_args(argv)
+    try:
+        tag = find_previous_tag(Path.cwd(), args.remote)
+    except HistoryError as e:
+        print(f"::error::{e}", file=sys.stderr)
+        return 1
+    if tag:
+        print(f"Found previous tag: {tag}")
+    else:
+        print("No previous tag found.")
+        tag = args.fallback
+    with ActionIO() as io:
+        io.output("tag", tag)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,17 +2,36 @@
 
 from __future__ import annotations
 
+import contextlib
+import functools
 import json
 import os
+import queue
 import re
 import ssl
 import subprocess
+import threading
+import time
 import urllib.error
 import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import certifi
 
+from common.cache import DEFAULT_TTL, ResponseCache, cache_key, latency_percentile, record_latency
+from common.conventional import (
+    SECTIONS,
+    bullet,
+    classify_commits,
+    offline_summary,
+    parse_commit,
+    prefill,
+    split_sections,
+)
+from common.history import HistoryError, find_previous_tag, is_shallow, prepare_range
+
 DEFAULT_TEMPLATE = """# Release v{{VERSION}}
 
 ## Summary
@@ -39,54 +58,134 @@ class ReleaseNotesError(Exception):
     pass
 
 
+class ProviderError(ReleaseNotesError):
+    """A provider call failed; retryable for 429, 5xx, network failures and stalled streams."""
+
+    def __init__(self, message: str, *, retryable: bool = False) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+# One `git log` record per commit: \x1e, then \x1f-separated fields; -z ends each record (and each
+# --numstat path) with NUL. Records are split on \x1e as chunks arrive, so memory stays bounded.
+_LOG_FIELDS = ("sha", "author", "email", "date", "refs", "message", "trailers")
+_LOG_FORMAT = "%x1e%H%x1f%an%x1f%ae%x1f%aI%x1f%D%x1f%B%x1f%(trailers:only,unfold)%x1f"
+_LOG_CHUNK = 64 * 1024
+
+
+def _parse_numstat(tail: str) -> list[dict]:
+    """Files from the -z --numstat block: "added\\tdeleted\\tpath", or an empty path then old and new for renames."""
+    tokens = tail.lstrip("\0\n").split("\0")
+    files = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        i += 1
+        if not token:
+            continue
+        added, deleted, path = token.split("\t", 2)
+        entry = {
+            "added": int(added) if added.isdigit() else None,  # "-" for binary files
+            "deleted": int(deleted) if deleted.isdigit() else None,
+        }
+        if not path:
+            entry["old_path"], path = tokens[i], tokens[i + 1]
+            i += 2
+        files.append({"path": path, **entry})
+    return files
+
+
+def _parse_log_record(record: str, numstat: bool) -> dict:
+    head, _, tail = record.rpartition("\x1f")
+    fields = dict(zip(_LOG_FIELDS, head.split("\x1f", len(_LOG_FIELDS) - 1), strict=False))
+    message = fields.pop("message", "").strip()
+    paragraph, _, body = message.partition("\n\n")
+    trailers = []
+    for line in fields.pop("trailers", "").splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            trailers.append((key.strip(), value.strip()))
+    refs = fields.pop("refs", "")
+    commit = {
+        **fields,
+        "subject": " ".join(paragraph.split("\n")),  # same as %s
+        "body": body.strip(),
+        "trailers": trailers,
+        "tags": [r.removeprefix("tag: ") for r in refs.split(", ") if r.startswith("tag: ")],
+    }
+    if numstat:
+        commit["files"] = _parse_numstat(tail)
+    return commit
+
+
+def iter_commits(project_root: Path, since: str | None = None, *, numstat: bool = False, until: str = "HEAD"):
+    """Yield commits newest first from one streamed `git log` as dicts.
+
+    Keys: sha, author, email, date, subject, body, trailers ((key, value) pairs), tags (tags
+    pointing at the commit) and, with numstat, files ({path, added, deleted[, old_path]}).
+    since limits the range to since..until (until defaults to HEAD); "v0.0.0" means the whole
+    history when that tag does not exist. Without since, all of until's history is walked; stop
+    iterating to stop git. Raises ReleaseNotesError if since is not a valid ref.
+    """
+    if since is None:
+        revs = [until]
+    elif since == "v0.0.0":
+        # The default fallback: exclude it when it exists, else log from the start of history.
+        # The [0] keeps --glob from implying a trailing /*.
+        revs = [until, "--not", "--glob=refs/tags/v0.0.[0]"]
+    else:
+        revs = [f"{since}..{until}"]
+    cmd = ["git", "log", "-z", "--decorate-refs=refs/tags/", f"--format={_LOG_FORMAT}"]
+    if numstat:
+        cmd.append("--numstat")
+    proc = subprocess.Popen([*cmd, *revs, "--"], cwd=project_root, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    buf = b""
+    try:
+        while chunk := proc.stdout.read(_LOG_CHUNK):
+            *records, buf = (buf + chunk).split(b"\x1e")
+            for record in records:
+                if record:
+                    yield _parse_log_record(record.decode("utf-8", errors="replace"), numstat)
+        if buf:
+            yield _parse_log_record(buf.decode("utf-8", errors="replace"), numstat)
+        stderr = proc.stderr.read().decode(errors="replace").strip()
+        if proc.wait() != 0 and since is not None:
+            hint = f" {stderr}" if stderr else ""
+            raise ReleaseNotesError(f"Invalid git ref for since_tag: {since!r}. Check the tag or commit exists.{hint}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
 def get_previous_tag(project_root: Path) -> str | None:
-    """Return the most recent tag that is an ancestor of HEAD, or None if none."""
+    """Return the highest-version tag in HEAD's history (HEAD's own included), or None if none."""
     try:
-        out = subprocess.run(
-            ["git", "describe", "--tags", "--abbrev=0"],
-            cwd=project_root,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return out.stdout.strip() or None
-    except subprocess.CalledProcessError:
+        return find_previous_tag(project_root, include_head=True)
+    except HistoryError:
         return None
 
 
+def _base_ref(project_root: Path, since_tag: str | None) -> str | None:
+    """
+    since_tag or the previous tag (get_previous_tag's rule in full and shallow clones alike);
+    a shallow checkout first fetches just the commits since it.
+    """
+    if not is_shallow(project_root):
+        return since_tag or get_previous_tag(project_root)
+    try:
+        return prepare_range(project_root, since_tag, include_head=True)
+    except HistoryError as e:
+        raise ReleaseNotesError(f"Could not fetch the history since the previous tag: {e}") from e
+
+
 def get_commits_since(project_root: Path, ref: str) -> list[str]:
     """Return list of commit subject lines from ref..HEAD (excluding ref, including HEAD).
     Raises ReleaseNotesError if ref is invalid.
     """
-    cmd = ["git", "log", f"{ref}..HEAD", "--pretty=format:%s"]
-
-    # Special case: If ref is v0.0.0 (default fallback) and it doesn't exist, log from start.
-    if ref == "v0.0.0":
-        try:
-            subprocess.run(
-                ["git", "rev-parse", "--verify", ref],
-                cwd=project_root,
-                check=True,
-                capture_output=True,
-            )
-        except subprocess.CalledProcessError:
-            # v0.0.0 does not exist, assume start of history
-            cmd = ["git", "log", "HEAD", "--pretty=format:%s"]
-
-    try:
-        out = subprocess.run(
-            cmd,
-            cwd=project_root,
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-    except subprocess.CalledProcessError as e:
-        hint = f" {e.stderr.strip()}" if (e.stderr and e.stderr.strip()) else ""
-        raise ReleaseNotesError(f"Invalid git ref for since_tag: {ref!r}. Check the tag or commit exists.{hint}") from e
-    if not out.stdout.strip():
-        return []
-    return [s for s in out.stdout.strip().split("\n") if s]
+    return [c["subject"] for c in iter_commits(project_root, ref) if c["subject"]]
 
 
 def load_template(path: Path | None) -> str:
@@ -96,37 +195,195 @@ def load_template(path: Path | None) -> str:
     return DEFAULT_TEMPLATE
 
 
-def _call_openai(commits: list[str], format_instructions: str, version: str, model: str) -> str:
-    """Call OpenAI chat completions. Returns the generated markdown."""
-    key = os.environ.get("OPENAI_API_KEY", "").strip()
-    if not key:
-        raise ReleaseNotesError("OPENAI_API_KEY is not set. Add it as a repository secret for release notes.")
+SYSTEM_PROMPT = (
+    "You generate release notes in Markdown from a list of commit messages. "
+    "Follow the structure provided. Be concise. Use the exact section headers given. "
+    "Do not invent commits; only use the provided list. "
+    "Output only the release note body as Markdown, no extra text or code fences."
+)
 
+
+def build_prompt(commits: list[str], format_instructions: str, version: str) -> tuple[str, str]:
+    """Return (system, user) prompt text sent to either provider."""
     user_content = (
         f"Follow this format for the release note:\n\n{format_instructions}\n\n"
         f"Version to use in the title: {version}\n\n"
         "Commit messages (one per line):\n" + "\n".join(commits)
     )
+    return SYSTEM_PROMPT, user_content
+
+
+HYBRID_SYSTEM_PROMPT = (
+    "You complete release notes whose changes were already sorted from conventional commits. "
+    "First write a 2-3 sentence summary of the release as plain text, without a heading. "
+    "Then, only if commits to sort are given, list them as bullets under the headings "
+    "### Features, ### Fixes and ### Other: one bullet per user-visible change, no invented changes. "
+    "Output only Markdown, no extra text or code fences."
+)
+
+
+def build_hybrid_prompt(sections: dict[str, list[dict]], unclassified: list[str], version: str) -> tuple[str, str]:
+    """(system, user) prompt for hybrid mode: sorted changes in brief (for the summary) plus unsorted commits."""
+    features = [c["description"] for c in sections["Features"]]
+    breaking = [c["description"] for entries in sections.values() for c in entries if c["breaking"]]
+    lines = [
+        f"Version: {version}",
+        "",
+        "Already sorted (for the summary only):",
+        f"- Features ({len(features)}): " + ("; ".join(features) or "none"),
+        f"- Fixes: {len(sections['Fixes'])}",
+        f"- Other changes: {len(sections['Other'])}",
+    ]
+    if breaking:
+        lines.append("- Breaking changes: " + "; ".join(breaking))
+    lines += ["", "Commits to sort (one per line):" if unclassified else "Commits to sort: none", *unclassified]
+    return HYBRID_SYSTEM_PROMPT, "\n".join(lines)
+
+
+def _merge_hybrid(format_instructions: str, bullets: dict[str, list[str]], completion: str) -> str:
+    """Template filled with the local bullets plus the provider's summary and sorted commits."""
+    summary, extra = split_sections(completion)
+    bullets = {name: list(lines) for name, lines in bullets.items()}
+    for title, lines in extra.items():
+        name = next((s for s in SECTIONS if s.lower() == title.lower()), "Other")
+        bullets[name].extend(lines)
+    return prefill(format_instructions, {"Summary": [summary], **bullets})
+
+
+def _combine_completions(previous: str, new: str) -> str:
+    """A draft's provider output extended by a newer one: the newer summary, the bullets of both."""
+    previous_summary, merged = split_sections(previous)
+    summary, sections = split_sections(new)
+    for title, lines in sections.items():
+        name = next((t for t in merged if t.lower() == title.lower()), title)
+        merged.setdefault(name, []).extend(lines)
+    parts = [summary or previous_summary, *(f"### {t}\n" + "\n".join(lines) for t, lines in merged.items() if lines)]
+    return "\n\n".join(parts)
+
+
+def _strip_fences(content: str) -> str:
+    if content.startswith("```"):
+        content = re.sub(r"^```(?:markdown)?\n?", "", content)
+        content = re.sub(r"\n?```\s*$", "", content)
+    return content.strip()
+
+
+OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
+ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
+DEFAULT_IDLE_TIMEOUT = 60.0
+
+
+def _open(req: urllib.request.Request, timeout: float, label: str):
+    """urlopen with the provider's errors mapped to ReleaseNotesError. With streaming, timeout is per read (idle)."""
+    ctx = ssl.create_default_context(cafile=certifi.where())
+    try:
+        return urllib.request.urlopen(req, timeout=timeout, context=ctx)
+    except urllib.error.HTTPError as e:
+        body = e.read().decode() if e.fp else ""
+        raise ProviderError(f"{label} API error {e.code}: {body}", retryable=e.code == 429 or e.code >= 500) from e
+    except urllib.error.URLError as e:
+        raise ProviderError(f"{label} request failed: {e.reason}", retryable=True) from e
+
+
+def iter_sse(resp):
+    """Yield (event, data) for each server-sent event read line by line from resp."""
+    event, data = "", []
+    for raw in resp:
+        line = raw.decode("utf-8").rstrip("\r\n")
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "", []
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].removeprefix(" "))
+    if data:
+        yield event, "\n".join(data)
+
+
+def _stream(req: urllib.request.Request, idle_timeout: float, label: str, delta, on_text) -> str:
+    """Read an SSE completion, passing each text delta to on_text as it arrives; returns the full text.
+
+    delta(event, data) returns the text in one event ("" for none, None at end of stream). A gap
+    longer than idle_timeout between reads fails the call, however long the whole generation takes.
+    """
+    parts: list[str] = []
+    try:
+        with _open(req, idle_timeout, label) as resp:
+            for event, data in iter_sse(resp):
+                text = delta(event, data)
+                if text is None:
+                    break
+                if text:
+                    parts.append(text)
+                    on_text(text)
+    except TimeoutError as e:
+        raise ProviderError(f"{label} stream stalled: no data for {idle_timeout:g}s", retryable=True) from e
+    return "".join(parts)
+
+
+def _sse_json(data: str, label: str) -> dict:
+    """One SSE data payload; a malformed one (e.g. a proxy truncating the stream) is a retryable ProviderError."""
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError as e:
+        raise ProviderError(f"{label} stream sent malformed data: {data[:200]!r}", retryable=True) from e
+
+
+def _openai_delta(event: str, data: str) -> str | None:
+    if data == "[DONE]":
+        return None
+    chunk = _sse_json(data, "OpenAI")
+    if "error" in chunk:
+        raise ReleaseNotesError(f"OpenAI stream error: {chunk['error']}")
+    return ((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content") or ""
+
+
+def _anthropic_delta(event: str, data: str) -> str | None:
+    chunk = _sse_json(data, "Anthropic")
+    kind = chunk.get("type", event)
+    if kind == "error":
+        raise ReleaseNotesError(f"Anthropic stream error: {chunk.get('error')}")
+    if kind == "message_stop":
+        return None
+    if kind == "content_block_delta":
+        return (chunk.get("delta") or {}).get("text") or ""
+    return ""
+
+
+def _request_openai(
+    system: str,
+    user_content: str,
+    model: str,
+    max_tokens: int | None = None,
+    *,
+    on_text=None,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+) -> str:
+    """POST one chat completion to OpenAI. Returns the generated markdown.
+
+    With on_text, the completion is streamed (SSE) and each delta is passed to it as it arrives.
+    """
+    key = os.environ.get("OPENAI_API_KEY", "").strip()
+    if not key:
+        raise ReleaseNotesError("OPENAI_API_KEY is not set. Add it as a repository secret for release notes.")
 
     payload = {
         "model": model,
         "messages": [
-            {
-                "role": "system",
-                "content": (
-                    "You generate release notes in Markdown from a list of commit messages. "
-                    "Follow the structure provided. Be concise. Use the exact section headers given. "
-                    "Do not invent commits; only use the provided list. "
-                    "Output only the release note body as Markdown, no extra text or code fences."
-                ),
-            },
+            {"role": "system", "content": system},
             {"role": "user", "content": user_content},
         ],
         "temperature": 0.3,
     }
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    if on_text is not None:
+        payload["stream"] = True
 
     req = urllib.request.Request(
-        "https://api.openai.com/v1/chat/completions",
+        OPENAI_API_URL,
         data=json.dumps(payload).encode(),
         headers={
             "Content-Type": "application/json",
@@ -135,50 +392,41 @@ def _call_openai(commits: list[str], format_instructions: str, version: str, mod
         method="POST",
     )
 
-    ctx = ssl.create_default_context(cafile=certifi.where())
-    try:
-        with urllib.request.urlopen(req, timeout=60, context=ctx) as resp:
-            data = json.loads(resp.read())
-    except urllib.error.HTTPError as e:
-        body = e.read().decode() if e.fp else ""
-        raise ReleaseNotesError(f"OpenAI API error {e.code}: {body}") from e
-    except urllib.error.URLError as e:
-        raise ReleaseNotesError(f"OpenAI request failed: {e.reason}") from e
+    if on_text is not None:
+        return _strip_fences(_stream(req, idle_timeout, "OpenAI", _openai_delta, on_text))
+    with _open(req, 60, "OpenAI") as resp:
+        data = json.loads(resp.read())
+    return _strip_fences((data.get("choices") or [{}])[0].get("message", {}).get("content") or "")
 
-    content = (data.get("choices") or [{}])[0].get("message", {}).get("content") or ""
-    if content.startswith("```"):
-        content = re.sub(r"^```(?:markdown)?\n?", "", content)
-        content = re.sub(r"\n?```\s*$", "", content)
-    return content.strip()
 
+def _request_anthropic(
+    system: str,
+    user_content: str,
+    model: str,
+    max_tokens: int = 2048,
+    *,
+    on_text=None,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+) -> str:
+    """POST one message to Anthropic. Returns the generated markdown.
 
-def _call_anthropic(commits: list[str], format_instructions: str, version: str, model: str) -> str:
-    """Call Anthropic messages API. Returns the generated markdown."""
+    With on_text, the message is streamed (SSE) and each text delta is passed to it as it arrives.
+    """
     key = os.environ.get("ANTHROPIC_API_KEY", "").strip()
     if not key:
         raise ReleaseNotesError("ANTHROPIC_API_KEY is not set. Add it as a repository secret for release notes.")
 
-    user_content = (
-        f"Follow this format for the release note:\n\n{format_instructions}\n\n"
-        f"Version to use in the title: {version}\n\n"
-        "Commit messages (one per line):\n" + "\n".join(commits)
-    )
-    system = (
-        "You generate release notes in Markdown from a list of commit messages. "
-        "Follow the structure provided. Be concise. Use the exact section headers given. "
-        "Do not invent commits; only use the provided list. "
-        "Output only the release note body as Markdown, no extra text or code fences."
-    )
-
     payload = {
         "model": model,
-        "max_tokens": 2048,
+        "max_tokens": max_tokens,
         "system": system,
         "messages": [{"role": "user", "content": user_content}],
     }
+    if on_text is not None:
+        payload["stream"] = True
 
     req = urllib.request.Request(
-        "https://api.anthropic.com/v1/messages",
+        ANTHROPIC_API_URL,
         data=json.dumps(payload).encode(),
         headers={
             "Content-Type": "application/json",
@@ -188,66 +436,747 @@ def _call_anthropic(commits: list[str], format_instructions: str, version: str,
         method="POST",
     )
 
-    ctx = ssl.create_default_context(cafile=certifi.where())
-    try:
-        with urllib.request.urlopen(req, timeout=60, context=ctx) as resp:
-            data = json.loads(resp.read())
-    except urllib.error.HTTPError as e:
-        body = e.read().decode() if e.fp else ""
-        raise ReleaseNotesError(f"Anthropic API error {e.code}: {body}") from e
-    except urllib.error.URLError as e:
-        raise ReleaseNotesError(f"Anthropic request failed: {e.reason}") from e
+    if on_text is not None:
+        return _strip_fences(_stream(req, idle_timeout, "Anthropic", _anthropic_delta, on_text))
+    with _open(req, 60, "Anthropic") as resp:
+        data = json.loads(resp.read())
 
     content = ""
     for block in data.get("content") or []:
         if block.get("type") == "text":
             content = block.get("text") or ""
             break
-    if content.startswith("```"):
-        content = re.sub(r"^```(?:markdown)?\n?", "", content)
-        content = re.sub(r"\n?```\s*$", "", content)
-    return content.strip()
+    return _strip_fences(content)
 
 
-def run(
-    project_root: Path,
+def _complete(provider: str, model: str, system: str, user_content: str, **stream) -> str:
+    """One completion of a ready-made prompt from either provider. stream: on_text/idle_timeout."""
+    request = _request_anthropic if provider == "anthropic" else _request_openai
+    return request(system, user_content, model, **stream)
+
+
+def _call_openai(commits: list[str], format_instructions: str, version: str, model: str, **stream) -> str:
+    """Call OpenAI chat completions. Returns the generated markdown. stream: on_text/idle_timeout."""
+    return _request_openai(*build_prompt(commits, format_instructions, version), model, **stream)
+
+
+def _call_anthropic(commits: list[str], format_instructions: str, version: str, model: str, **stream) -> str:
+    """Call Anthropic messages API. Returns the generated markdown. stream: on_text/idle_timeout."""
+    return _request_anthropic(*build_prompt(commits, format_instructions, version), model, **stream)
+
+
+# --- Map-reduce for large commit ranges ---
+
+# Rough chars-per-token ratio for English commit text; only used to size batches.
+CHARS_PER_TOKEN = 4
+DEFAULT_CHUNK_TOKENS = 8000
+DEFAULT_MAP_WORKERS = 4
+MAP_MAX_TOKENS = 1024
+
+MAP_SYSTEM_PROMPT = (
+    "You condense a batch of commit messages into release-note bullet points. "
+    "Group them under the headings Features, Fixes and Other. One bullet per user-visible change; "
+    "merge duplicates and drop noise (merges, version bumps). Do not invent changes. "
+    "Output only the headings and bullets as Markdown."
+)
+REDUCE_SYSTEM_PROMPT = (
+    "You generate release notes in Markdown from partial notes, each summarizing one slice of the commits. "
+    "Merge them into the structure provided: deduplicate, keep the most informative wording. "
+    "Be concise. Use the exact section headers given. Do not invent changes; only use the partial notes. "
+    "Output only the release note body as Markdown, no extra text or code fences."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_commits(commits: list[str], max_tokens: int) -> list[list[str]]:
+    """Split commits, in order, into batches whose estimated size stays within max_tokens."""
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    size = 0
+    for commit in commits:
+        tokens = estimate_tokens(commit)
+        if batch and size + tokens > max_tokens:
+            batches.append(batch)
+            batch, size = [], 0
+        batch.append(commit)
+        size += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _map_reduce(
+    commits: list[str],
+    format_instructions: str,
+    version: str,
+    model: str,
+    provider: str,
+    chunk_tokens: int,
+    max_workers: int,
+    **stream,
+) -> str:
+    """Summarize token-bounded batches concurrently, then merge the partial notes in one reduce call.
+
+    Map calls run in parallel, so wall time is about one map call plus the reduce call,
+    however many batches the range needs.
+    """
+    request = _request_anthropic if provider == "anthropic" else _request_openai
+    batches = chunk_commits(commits, chunk_tokens)
+
+    # Map calls stream too when the reduce does (idle rather than total timeout), into no sink. Each
+    # chunk still calls on_text with "" (nothing written) so a cancelled hedge attempt stops its maps.
+    on_text = stream.get("on_text")
+    map_stream = {**stream, "on_text": lambda _text: on_text("")} if on_text else {}
+
+    def summarize(batch: list[str]) -> str:
+        user_content = "Commit messages (one per line):\n" + "\n".join(batch)
+        return request(MAP_SYSTEM_PROMPT, user_content, model, MAP_MAX_TOKENS, **map_stream)
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        partials = list(pool.map(summarize, batches))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)  # on failure, queued batches never start
+
+    user_content = (
+        f"Follow this format for the release note:\n\n{format_instructions}\n\n"
+        f"Version to use in the title: {version}\n\n"
+        f"Partial notes ({len(partials)} slices of {len(commits)} commits):\n\n" + "\n\n---\n\n".join(partials)
+    )
+    return request(REDUCE_SYSTEM_PROMPT, user_content, model, **stream)
+
+
+# --- Pull request enrichment ---
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+PULL_REQUESTS_PER_QUERY = 100
+
+# "Merge pull request #12 from ..." (merge commits) or "Title (#12)" (squash merges).
+_PR_REF = re.compile(r"^Merge pull request #(?P<merge>\d+)\b|\(#(?P<squash>\d+)\)\s*$")
+_PR_FIELDS = (
+    "number title labels(first: 20) { nodes { name } } closingIssuesReferences(first: 10) { nodes { number title } }"
+)
+
+
+def pull_request_number(subject: str) -> int | None:
+    m = _PR_REF.search(subject)
+    return int(m.group("merge") or m.group("squash")) if m else None
+
+
+def _query_pull_requests(repository: str, numbers: list[int], token: str, api_url: str) -> dict[int, dict]:
+    """One GraphQL query for up to PULL_REQUESTS_PER_QUERY pull requests (one aliased field each)."""
+    owner, _, name = repository.partition("/")
+    fields = " ".join(f"pr{n}: pullRequest(number: {n}) {{ {_PR_FIELDS} }}" for n in numbers)
+    query = "query($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { " + fields + " } }"
+    req = urllib.request.Request(
+        api_url,
+        data=json.dumps({"query": query, "variables": {"owner": owner, "name": name}}).encode(),
+        headers={"Content-Type": "application/json", "Authorization": f"Bearer {token}"},
+        method="POST",
+    )
+    with _open(req, 30, "GitHub") as resp:
+        data = json.loads(resp.read())
+    repo = (data.get("data") or {}).get("repository")
+    if repo is None:
+        raise ReleaseNotesError(f"GitHub GraphQL query failed: {data.get('errors')}")
+    found = {}
+    for node in repo.values():
+        if node:  # null for numbers that are not pull requests of this repository
+            found[node["number"]] = {
+                "number": node["number"],
+                "title": node["title"],
+                "labels": [label["name"] for label in (node.get("labels") or {}).get("nodes") or []],
+                "issues": [
+                    {"number": i["number"], "title": i["title"]}
+                    for i in (node.get("closingIssuesReferences") or {}).get("nodes") or []
+                ],
+            }
+    return found
+
+
+def fetch_pull_requests(
+    repository: str,
+    numbers: list[int],
+    token: str,
+    *,
+    cache_dir: Path | None = None,
+    api_url: str = GITHUB_GRAPHQL_URL,
+) -> dict[int, dict]:
+    """Title, labels and closing issues of pull requests in repository ("owner/name"), by number.
+
+    Numbers not cached in cache_dir (one entry per pull request) are resolved in batched
+    GraphQL queries of PULL_REQUESTS_PER_QUERY, so the request count stays bounded however
+    long the range. Numbers that are not pull requests are left out.
+    """
+    cache = ResponseCache(cache_dir) if cache_dir is not None else None
+    found: dict[int, dict] = {}
+    missing = []
+    for number in dict.fromkeys(numbers):
+        value = cache.get(cache_key("pull-request", repository, str(number))) if cache is not None else None
+        if value is not None:
+            found[number] = json.loads(value)
+        else:
+            missing.append(number)
+    for i in range(0, len(missing), PULL_REQUESTS_PER_QUERY):
+        batch = _query_pull_requests(repository, missing[i : i + PULL_REQUESTS_PER_QUERY], token, api_url)
+        if cache is not None:
+            for number, pr in batch.items():
+                cache.put(cache_key("pull-request", repository, str(number)), json.dumps(pr), kind="pull-request")
+        found.update(batch)
+    return found
+
+
+def enrich_commits(commits: list[dict], pull_requests: dict[int, dict]) -> list[dict]:
+    """Commits whose subject references a known pull request, with the PR title, labels and
+    closed issues as subject ("Title (#12) [label] (closes #4: Issue)"); others unchanged.
+    """
+    enriched = []
+    for commit in commits:
+        pr = pull_requests.get(pull_request_number(commit["subject"]) or 0)
+        if pr is None:
+            enriched.append(commit)
+            continue
+        subject = f"{pr['title']} (#{pr['number']})"
+        if pr["labels"]:
+            subject += f" [{', '.join(pr['labels'])}]"
+        if pr["issues"]:
+            issues = ", ".join(f"#{issue['number']}: {issue['title']}" for issue in pr["issues"])
+            subject += f" (closes {issues})"
+        enriched.append({**commit, "subject": subject, "pull_request": pr})
+    return enriched
+
+
+# --- Prompt budget ---
+
+# Bot and merge commits that carry nothing for release notes (dependabot, renovate, merge commits).
+_NOISE = re.compile(
+    r"^(?:Merge (?:pull request|branch|remote-tracking branch)\b"
+    r"|\w+\(deps(?:-dev)?\)!?:"
+    r"|Bump (?:\S+ from \S+ to \S+|the \S+ group\b)"
+    r"|Update (?:dependency|module) \S+ to\b"
+    r"|Update \S+ action to\b"
+    r"|Lock file maintenance\b)",
+    re.IGNORECASE,
+)
+
+
+def is_noise(subject: str) -> bool:
+    """True for merge commits and dependency-bot bumps."""
+    return bool(_NOISE.match(subject.strip()))
+
+
+def compact_commits(commits: list[str], budget_tokens: int | None = None) -> tuple[list[str], dict]:
+    """Shrink commit subjects for a prompt; returns (lines, stats).
+
+    Noise is dropped, duplicate subjects collapse into one line with an `(xN)` count, and
+    non-breaking commits sharing a `type(scope)` are joined into one line. With budget_tokens,
+    lines stop once their estimated size would exceed it and a `+N more` line counts the
+    commits left out. stats: commits, noise, lines, omitted.
+    """
+    kept = [c.strip() for c in commits if c.strip() and not is_noise(c)]
+    # Each line keeps the position of its first commit: key -> [scope prefix, texts, commits].
+    grouped: dict[str, list] = {}
+    for subject, n in Counter(kept).items():
+        parsed = parse_commit(subject)
+        if parsed is None or parsed["scope"] is None or parsed["breaking"]:
+            key, prefix, text = subject, None, subject
+        else:
+            key = prefix = f"{parsed['type']}({parsed['scope']})"
+            text = parsed["description"]
+        line = grouped.setdefault(key, [prefix, [], 0])
+        line[1].append(text if n == 1 else f"{text} (x{n})")
+        line[2] += n
+    lines = [(f"{prefix}: {'; '.join(texts)}" if prefix else texts[0], n) for prefix, texts, n in grouped.values()]
+
+    out: list[str] = []
+    used = 0
+    omitted = 0
+    for i, (text, _n) in enumerate(lines):
+        tokens = estimate_tokens(text)
+        if budget_tokens is not None and used + tokens > budget_tokens:
+            omitted = sum(count for _text, count in lines[i:])
+            out.append(f"+{omitted} more")
+            break
+        out.append(text)
+        used += tokens
+    stats = {"commits": len(commits), "noise": len(commits) - len(kept), "lines": len(out), "omitted": omitted}
+    return out, stats
+
+
+def _default_model(provider: str, model: str | None = None) -> str:
+    if provider == "anthropic":
+        return (model or os.environ.get("ANTHROPIC_MODEL") or "claude-sonnet-4-5-20250929").strip()
+    return (model or os.environ.get("OPENAI_MODEL") or "gpt-4o-mini").strip()
+
+
+def _generate(
+    provider: str,
+    model: str,
+    commits: list[str],
+    format_instructions: str,
+    version: str,
+    chunk_tokens: int,
+    map_workers: int,
+    **stream,
+) -> str:
+    if estimate_tokens("\n".join(commits)) > chunk_tokens:
+        return _map_reduce(commits, format_instructions, version, model, provider, chunk_tokens, map_workers, **stream)
+    if provider == "anthropic":
+        return _call_anthropic(commits, format_instructions, version, model, **stream)
+    return _call_openai(commits, format_instructions, version, model, **stream)
+
+
+# --- Hedged requests ---
+
+DEFAULT_HEDGE_AFTER = 20.0
+DEFAULT_HEDGE_PERCENTILE = 90.0
+
+
+class _CancelledError(Exception):
+    """Raised from a losing hedged attempt's stream callback to drop its connection."""
+
+
+def _hedged(attempt, primary: str, secondary: str, hedge_after: float) -> tuple[str, str]:
+    """Run attempt(provider, cancelled) on primary; also on secondary once primary is slower than
+    hedge_after or fails retryably. Returns (body, provider) of the first success; the other
+    attempt is cancelled. Attempts run on daemon threads so a loser never holds up exit.
+    """
+    results: queue.Queue = queue.Queue()
+    cancels: dict[str, threading.Event] = {}
+    errors: dict[str, ReleaseNotesError] = {}
+
+    def start(provider: str) -> None:
+        cancels[provider] = threading.Event()
+
+        def target() -> None:
+            try:
+                results.put((provider, attempt(provider, cancels[provider]), None))
+            except Exception as e:  # reported through the queue
+                results.put((provider, None, e))
+
+        threading.Thread(target=target, daemon=True).start()
+
+    start(primary)
+    pending = 1
+    try:
+        while pending:
+            try:
+                provider, body, error = results.get(timeout=None if secondary in cancels else hedge_after)
+            except queue.Empty:
+                start(secondary)  # primary is in its latency tail: hedge
+                pending += 1
+                continue
+            pending -= 1
+            if error is None:
+                return body, provider
+            if not isinstance(error, ReleaseNotesError):
+                error = ReleaseNotesError(f"{provider} request failed: {error}")
+            errors[provider] = error
+            if secondary not in cancels and getattr(error, "retryable", False):
+                start(secondary)  # 429 / 5xx / network: fall back now
+                pending += 1
+    finally:
+        for cancelled in cancels.values():
+            cancelled.set()
+    if len(errors) == 1:
+        raise next(iter(errors.values()))
+    raise ReleaseNotesError("; ".join(f"{p}: {e}" for p, e in errors.items()))
+
+
+NOTES_MODES = ("ai", "hybrid", "offline")
+
+
+def _notes_mode(mode: str | None) -> str:
+    mode = (mode or "ai").strip().lower()
+    if mode not in NOTES_MODES:
+        raise ReleaseNotesError(f"Invalid mode {mode!r}; must be one of {', '.join(NOTES_MODES)}.")
+    return mode
+
+
+def run(project_root: Path, version: str, *, since_tag: str | None = None, **options) -> str:
+    """
+    Generate release notes for the commits since since_tag (default: the previous tag) and
+    write them to options["output_path"]. Returns the body string on success; options are
+    those of generate_notes. Raises ReleaseNotesError on failure (no previous tag, invalid ref,
+    provider or API error, empty body).
+
+    In hybrid mode with a cache_dir, a draft saved there by update_draft is finalized. In a
+    shallow checkout, only the commits since the base are fetched first (see common.history).
+    """
+    mode = _notes_mode(options.get("mode"))
+    ref = _base_ref(project_root, since_tag)
+    if not ref:
+        raise ReleaseNotesError("Could not find a previous tag. Use since_tag for the first release.")
+    if mode == "ai":
+        commits = [{"subject": subject, "body": ""} for subject in get_commits_since(project_root, ref)]
+    else:
+        commits = list(iter_commits(project_root, ref))
+    draft = None
+    if mode == "hybrid" and options.get("cache_dir") is not None:
+        # Finalize the draft kept by update_draft: only commits it has not seen go to the provider.
+        draft = load_draft(options["cache_dir"], ref, commits, options.get("cache_ttl", DEFAULT_TTL))
+    return generate_notes(commits, version, draft=draft, **options)
+
+
+def generate_notes(
+    commits: list[dict],
     version: str,
     *,
-    since_tag: str | None = None,
     template_path: Path | None = None,
     output_path: Path | None = None,
     model: str | None = None,
     provider: str | None = None,
+    cache_dir: Path | None = None,
+    cache_ttl: float = DEFAULT_TTL,
+    cache_bypass: bool = False,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+    map_workers: int = DEFAULT_MAP_WORKERS,
+    stream: bool = False,
+    idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+    fallback_provider: str | None = None,
+    hedge_after: float | None = None,
+    hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+    mode: str = "ai",
+    prompt_budget: int | None = None,
+    stats: dict | None = None,
+    draft: dict | None = None,
+    github_repository: str | None = None,
+    github_token: str | None = None,
+    github_api_url: str = GITHUB_GRAPHQL_URL,
 ) -> str:
     """
-    Generate release notes: commits since previous tag -> OpenAI or Anthropic -> write to file.
-    Returns the body string on success.
-    Raises ReleaseNotesError on failure (no previous tag, invalid provider, API error, empty body).
-    """
-    ref = since_tag or get_previous_tag(project_root)
-    if not ref:
-        raise ReleaseNotesError("Could not find a previous tag. Use since_tag for the first release.")
+    Generate release notes for commits (iter_commits records, newest first; only subject and
+    body are read) -> OpenAI or Anthropic -> write to file. Returns the body string on success.
+    Raises ReleaseNotesError on failure (invalid provider, API error, empty body).
+
+    With cache_dir, responses are cached by (provider, model, rendered prompt): a re-run with the
+    same commits, template and model returns the stored body without calling the provider.
+    cache_bypass skips the lookup (the fresh response is still stored).
+
+    Commit lists estimated above chunk_tokens are summarized map-reduce style: batches of at
+    most chunk_tokens in parallel (map_workers at a time), then one call merging them.
+
+    With stream, completions are read as server-sent events and written to output_path as they
+    arrive; a call fails only when no data arrives for idle_timeout seconds. If generation fails
+    midway, the partial body stays in output_path for diagnostics.
+
+    With fallback_provider, the request is hedged: if the primary has not answered within
+    hedge_after seconds (default: the hedge_percentile of its recorded latencies in cache_dir,
+    else 20s), or fails with 429/5xx/network errors, the same prompt goes to the fallback and the
+    first success wins; the loser is cancelled. Hedged attempts always stream (so they can be
+    cancelled), and the winning body is written to output_path at the end.
+
+    mode "hybrid" sorts conventional commits (feat, fix, chore, ...) into the Features, Fixes
+    and Other sections locally and drops commits reverted within the range; only the summary
+    and the commits that do not parse go to the provider. mode "offline" calls no provider:
+    unparsed commits are listed under Other and the summary is counted from the sections.
 
-    commits = get_commits_since(project_root, ref)
+    Merge commits and dependency-bot bumps are dropped in every mode. Before a prompt is built,
+    the commits it lists are compacted (duplicates collapsed, repeated scopes grouped) and, with
+    prompt_budget (estimated tokens), truncated with a `+N more` line. A given stats dict is
+    filled with commits, noise, lines, omitted and the estimated prompt_tokens.
+
+    draft (hybrid mode) is the state of an incremental draft, updated in place: with a
+    previous completion, only commits missing from its shas go to the provider and its
+    bullets are kept; with no new commits, no provider is called. See update_draft.
+
+    With github_repository ("owner/name") and github_token, commits referencing a pull request
+    (merge commits, squash merges) are described by its title, labels and closed issues,
+    fetched in batched GraphQL queries and cached per pull request in cache_dir. A failed
+    lookup leaves the commits as they are (stats gets pull_requests_error).
+    """
+    mode = _notes_mode(mode)
+    if github_repository and github_token:
+        numbers = [n for c in commits if (n := pull_request_number(c["subject"]))]
+        try:
+            pulls = fetch_pull_requests(
+                github_repository, numbers, github_token, cache_dir=cache_dir, api_url=github_api_url
+            )
+        except ReleaseNotesError as e:
+            if stats is not None:
+                stats["pull_requests_error"] = str(e)
+        else:
+            commits = enrich_commits(commits, pulls)
+            if stats is not None:
+                stats["pull_requests"] = len(pulls)
+    # A draft holds a hybrid completion; other modes generate from scratch.
+    previous = (draft or {}).get("completion") if mode == "hybrid" else None
+    fresh = commits
     template = load_template(template_path)
     format_instructions = template.replace("{{VERSION}}", version)
+    if mode == "ai":
+        commits = [c["subject"] for c in commits if c["subject"]]
+    else:
+        messages = [f"{c['subject']}\n\n{c['body']}".strip() for c in commits if not is_noise(c["subject"])]
+        sections, unclassified = classify_commits(messages)
+        bullets = {name: [bullet(c) for c in entries] for name, entries in sections.items()}
+        if mode == "offline":
+            bullets["Other"] += [f"- {subject}" for subject in unclassified]
+            summary = offline_summary(sections, unclassified)
+            body = prefill(format_instructions, {"Summary": [summary], **bullets})
+            _write_body(output_path, body)
+            return body
+        if previous is not None:
+            covered = set(draft["shas"])
+            fresh = [c for c in commits if c.get("sha") not in covered]
+            _sections, unclassified = classify_commits(
+                [f"{c['subject']}\n\n{c['body']}".strip() for c in fresh if not is_noise(c["subject"])]
+            )
 
     provider = (provider or os.environ.get("RELEASE_NOTES_PROVIDER") or "anthropic").strip().lower()
     if provider not in ("openai", "anthropic"):
         raise ReleaseNotesError(f"Invalid provider {provider!r}; must be 'openai' or 'anthropic'.")
 
-    if provider == "anthropic":
-        model = (model or os.environ.get("ANTHROPIC_MODEL") or "claude-sonnet-4-5-20250929").strip()
-        body = _call_anthropic(commits, format_instructions, version, model)
+    model = _default_model(provider, model)
+    fallback_provider = (fallback_provider or "").strip().lower() or None
+    if fallback_provider is not None and fallback_provider not in ("openai", "anthropic"):
+        raise ReleaseNotesError(f"Invalid fallback provider {fallback_provider!r}; must be 'openai' or 'anthropic'.")
+    if fallback_provider == provider:
+        fallback_provider = None
+
+    if mode == "ai":
+        commits, prompt_stats = compact_commits(commits, prompt_budget)
+        prompt = build_prompt(commits, format_instructions, version)
+        generate = functools.partial(
+            _generate,
+            commits=commits,
+            format_instructions=format_instructions,
+            version=version,
+            chunk_tokens=chunk_tokens,
+            map_workers=map_workers,
+        )
+    else:
+        unclassified, prompt_stats = compact_commits(unclassified, prompt_budget)
+        prompt = build_hybrid_prompt(sections, unclassified, version)
+        generate = functools.partial(_complete, system=prompt[0], user_content=prompt[1])
+    if stats is not None:
+        stats.update(prompt_stats, prompt_tokens=estimate_tokens("".join(prompt)))
+
+    cache = ResponseCache(cache_dir, ttl=cache_ttl) if cache_dir is not None else None
+    models = {provider: model}
+    if fallback_provider is not None:
+        models[fallback_provider] = _default_model(fallback_provider)
+    # Responses are stored under the provider that wrote them, so a hedge winner is found by its own key.
+    keys = {name: cache_key(name, models[name], *prompt) for name in models}
+    winner = provider
+    body = None
+    if previous is not None and not fresh:
+        body, cached = previous, True  # nothing new since the draft
     else:
-        model = (model or os.environ.get("OPENAI_MODEL") or "gpt-4o-mini").strip()
-        body = _call_openai(commits, format_instructions, version, model)
+        if cache is not None and not cache_bypass:
+            body = next((hit for name in keys if (hit := cache.get(keys[name])) is not None), None)
+        cached = body is not None
+    if not cached and fallback_provider is not None:
+        started: dict[str, float] = {}
+        finished: set[str] = set()
+
+        def attempt(name: str, cancelled: threading.Event) -> str:
+            def on_text(_text: str) -> None:
+                if cancelled.is_set():
+                    raise _CancelledError
+
+            started[name] = time.monotonic()
+            try:
+                result = generate(name, models[name], on_text=on_text, idle_timeout=idle_timeout)
+            except Exception:
+                finished.add(name)  # a failure says nothing about how long an answer takes
+                raise
+            if cache_dir is not None and not cancelled.is_set():
+                finished.add(name)
+                record_latency(cache_dir, f"{name}/{models[name]}", time.monotonic() - started[name])
+            return result
+
+        if hedge_after is None:
+            observed = latency_percentile(cache_dir, f"{provider}/{model}", hedge_percentile) if cache_dir else None
+            hedge_after = observed or DEFAULT_HEDGE_AFTER
+        body, winner = _hedged(attempt, provider, fallback_provider, hedge_after)
+        if cache_dir is not None:
+            # A loser still running took at least this long; without it the percentile only sees fast winners.
+            now = time.monotonic()
+            for name in started.keys() - finished:
+                record_latency(cache_dir, f"{name}/{models[name]}", now - started[name])
+    elif not cached:
+        with contextlib.ExitStack() as stack:
+            stream_args = {}
+            if stream:
+                sink = None
+                # Hybrid completions are merged into the template afterwards; only direct bodies stream to disk.
+                if output_path is not None and mode == "ai":
+                    output_path = Path(output_path)
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    sink = stack.enter_context(output_path.open("w", encoding="utf-8"))
+
+                def on_text(text: str) -> None:
+                    if sink is not None:
+                        sink.write(text)
+                        sink.flush()
 
-    if not (body or "").strip():
-        raise ReleaseNotesError("Release notes generation produced empty output.")
+                stream_args = {"on_text": on_text, "idle_timeout": idle_timeout}
+            began = time.monotonic()
+            body = generate(provider, model, **stream_args)
+            if cache_dir is not None:
+                record_latency(cache_dir, f"{provider}/{model}", time.monotonic() - began)
 
+    if not cached:
+        if not (body or "").strip():
+            raise ReleaseNotesError("Release notes generation produced empty output.")
+        if cache is not None:
+            cache.put(keys[winner], body, provider=winner, model=models[winner])
+
+    if mode == "hybrid":
+        if draft is not None:
+            if previous is not None and fresh:
+                body = _combine_completions(previous, body)
+            draft.update(completion=body, shas=[c["sha"] for c in commits])
+        body = _merge_hybrid(format_instructions, bullets, body)
+    _write_body(output_path, body)
+    return body
+
+
+def _write_body(output_path: Path | None, body: str) -> None:
     if output_path is not None:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         output_path.write_text(body, encoding="utf-8")
+
+
+# --- Drafts ---
+
+DRAFT_VERSION = "Unreleased"
+
+
+def _draft_key(base: str, sha: str) -> str:
+    return cache_key("draft", base, sha)
+
+
+def load_draft(cache_dir: Path, base: str, commits: list[dict], ttl: float = DEFAULT_TTL) -> dict:
+    """The draft for base saved at the newest of commits that has one, else an empty draft."""
+    cache = ResponseCache(cache_dir, ttl=ttl)
+    for commit in commits:
+        value = cache.get(_draft_key(base, commit["sha"]))
+        if value is not None:
+            return json.loads(value)
+    return {}
+
+
+def save_draft(cache_dir: Path, base: str, draft: dict, ttl: float = DEFAULT_TTL) -> None:
+    """Store draft keyed by base and the last sha it covers (its newest)."""
+    ResponseCache(cache_dir, ttl=ttl).put(_draft_key(base, draft["shas"][0]), json.dumps(draft), kind="draft")
+
+
+def _draft_commits(project_root: Path, since_tag: str | None, options: dict) -> tuple[str, list[dict], dict]:
+    """(base ref, commits since it, draft loaded from options["cache_dir"]); mode defaults to hybrid."""
+    if options.get("cache_dir") is None:
+        raise ReleaseNotesError("Draft release notes need cache_dir to persist the draft between runs.")
+    if _notes_mode(options.get("mode")) == "ai":
+        options["mode"] = "hybrid"
+    base = _base_ref(project_root, since_tag) or "v0.0.0"
+    commits = list(iter_commits(project_root, base))
+    draft = load_draft(options["cache_dir"], base, commits, options.get("cache_ttl", DEFAULT_TTL))
+    return base, commits, draft
+
+
+def update_draft(project_root: Path, version: str = DRAFT_VERSION, *, since_tag: str | None = None, **options) -> str:
+    """
+    Bring the draft notes for the commits since the previous tag (or since_tag) up to HEAD; for
+    every push to the main branch. Returns the draft body (written to options["output_path"]).
+
+    Commits are classified locally (hybrid mode; offline mode keeps no state) and only the ones
+    the last saved draft has not seen go to the provider. The draft is saved in
+    options["cache_dir"], keyed by the previous tag and the last processed sha, so it rides on
+    actions/cache; run() with the same cache_dir finalizes it at tag time.
+    """
+    base, commits, draft = _draft_commits(project_root, since_tag, options)
+    if not commits:
+        return ""
+    body = generate_notes(commits, version, draft=draft, **options)
+    if draft:
+        save_draft(options["cache_dir"], base, draft, options.get("cache_ttl", DEFAULT_TTL))
     return body
+
+
+# --- Backfill ---
+
+DEFAULT_BACKFILL_JOBS = 4
+
+
+def _history_tags(project_root: Path) -> list[str]:
+    """Tags in HEAD's history, newest first in topological order (one tag per tagged commit)."""
+    result = subprocess.run(
+        ["git", "log", "--topo-order", "--simplify-by-decoration", "--decorate-refs=refs/tags/", "--format=%D", "HEAD"],
+        cwd=project_root,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise ReleaseNotesError(f"git log failed: {result.stderr.strip()}")
+    tags = []
+    for refs in result.stdout.splitlines():
+        names = [r.removeprefix("tag: ") for r in refs.split(", ") if r.startswith("tag: ")]
+        if names:
+            tags.append(names[0])
+    return tags
+
+
+def tag_ranges(project_root: Path, limit: int | None = None) -> list[dict]:
+    """Per-tag ranges of HEAD's history, newest first: [{tag, since, commits}].
+
+    A range is since..tag by reachability: its tagged commit and every commit it reaches that
+    the next older tag (since; None for the first release, which runs to the root) does not,
+    so a branch started before since and merged before tag lands in this range. Commits newer
+    than the latest tag are not released and are skipped. With limit, only the newest `limit`
+    ranges are walked.
+    """
+    tags = _history_tags(project_root)
+    ranges = []
+    for i, tag in enumerate(tags[:limit]):
+        since = tags[i + 1] if i + 1 < len(tags) else None
+        revs = {"since": f"refs/tags/{since}"} if since else {}
+        commits = list(iter_commits(project_root, until=f"refs/tags/{tag}", **revs))
+        ranges.append({"tag": tag, "since": since, "commits": commits})
+    return ranges
+
+
+def _tag_version(tag: str) -> str:
+    return tag[1:] if tag[:1] in ("v", "V") and tag[1:2].isdigit() else tag
+
+
+def backfill(
+    project_root: Path,
+    output_dir: Path,
+    *,
+    limit: int | None = 50,
+    jobs: int = DEFAULT_BACKFILL_JOBS,
+    **options,
+) -> list[dict]:
+    """Generate notes for the last `limit` tags (see tag_ranges); returns the index entries.
+
+    Ranges are generated concurrently, `jobs` at a time, into output_dir/<tag>.md (a `/` in a
+    tag becomes `-`). output_dir/index.json lists {tag, version, since, commits, file} newest
+    first, with error instead of file for a range that failed. options are those of
+    generate_notes (output_path excluded). Raises ReleaseNotesError naming the failed tags
+    after all ranges have run.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ranges = tag_ranges(project_root, limit)
+
+    def generate(r: dict) -> dict:
+        entry = {"tag": r["tag"], "version": _tag_version(r["tag"]), "since": r["since"], "commits": len(r["commits"])}
+        filename = f"{r['tag'].replace('/', '-')}.md"
+        try:
+            generate_notes(r["commits"], entry["version"], output_path=output_dir / filename, **options)
+        except ReleaseNotesError as e:
+            return {**entry, "error": str(e)}
+        return {**entry, "file": filename}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        index = list(pool.map(generate, ranges))
+    (output_dir / "index.json").write_text(json.dumps(index, indent=2) + "\n", encoding="utf-8")
+    failed = [entry["tag"] for entry in index if "error" in entry]
+    if failed:
+        raise ReleaseNotesError(f"Release notes failed for {len(failed)} of {len(index)} tags: {', '.join(failed)}")
+    return index
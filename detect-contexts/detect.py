@@ -1,11 +1,23 @@
+import argparse
+import copy
+import ctypes
+import ctypes.util
+import functools
+import hashlib
 import json
 import os
 import re
+import select
+import struct
 import sys
+import time
 import tomllib  # Requires Python 3.11+
+import xml.etree.ElementTree as ET
 
 import yaml
 
+from common.gha import ActionIO
+
 
 def get_file_content(context_path: str, filename: str) -> str | None:
     try:
@@ -15,6 +27,28 @@ def get_file_content(context_path: str, filename: str) -> str | None:
         return None
 
 
+# Watch mode (`--watch`) keeps per-directory detection results in memory and
+# recomputes only the directories whose marker files changed; skaffold.yaml
+# edits re-run the cheap matrix assembly over the cached probes.
+# None = caching disabled (CI runs).
+_DIR_CACHE: dict[tuple[str, str], object] | None = None
+
+
+def _dir_cached(func):
+    """Memoize a per-directory detector while watch mode is active."""
+
+    @functools.wraps(func)
+    def wrapper(path: str):
+        if _DIR_CACHE is None:
+            return func(path)
+        key = (func.__name__, os.path.normpath(path))
+        if key not in _DIR_CACHE:
+            _DIR_CACHE[key] = func(path)
+        return copy.deepcopy(_DIR_CACHE[key])
+
+    return wrapper
+
+
 def detect_go_version(context: str) -> str:
     content = get_file_content(context, "go.mod")
     if content:
@@ -75,46 +109,105 @@ def detect_python_version(context: str) -> str:
     return ""
 
 
-def detect_java_version(context: str) -> str:
-    # Maven: pom.xml
-    content = get_file_content(context, "pom.xml")
-    if content:
-        match = re.search(r"<java\.version>(.*?)</java\.version>", content)
-        if match:
-            return match.group(1).strip()
-        match = re.search(r"<maven\.compiler\.source>(.*?)</maven\.compiler\.source>", content)
-        if match:
-            return match.group(1).strip()
-        match = re.search(r"<maven\.compiler\.(?:source|target)>(.*?)</maven\.compiler\.(?:source|target)>", content)
-        if match:
-            return match.group(1).strip()
+# Project-level POM properties that carry the Java version, highest precedence first.
+POM_JAVA_PROPERTIES = ("java.version", "maven.compiler.source", "maven.compiler.target")
 
-    # Gradle (Groovy): build.gradle
-    content = get_file_content(context, "build.gradle")
-    if content:
-        match = re.search(r"sourceCompatibility\s*=\s*['\"]?(?:JavaVersion\.)?VERSION_(\d+)['\"]?", content)
-        if match:
-            return match.group(1)
-        match = re.search(r"sourceCompatibility\s*=\s*['\"](\d+)['\"]", content)
-        if match:
-            return match.group(1)
 
-    # Gradle (Kotlin DSL): build.gradle.kts — JavaLanguageVersion.of(17) or jvmTarget = "17"
-    content = get_file_content(context, "build.gradle.kts")
-    if content:
-        match = re.search(r"JavaLanguageVersion\.of\((\d+)\)", content)
-        if match:
-            return match.group(1)
-        match = re.search(r"languageVersion\.set\s*\(\s*JavaLanguageVersion\.of\((\d+)\)", content)
-        if match:
-            return match.group(1)
-        match = re.search(r'jvmTarget\s*=\s*["\'](\d+)["\']', content)
-        if match:
-            return match.group(1)
-        # Gradle Kotlin DSL: JvmTarget.JVM_17
-        match = re.search(r"JvmTarget\.JVM_(\d+)", content)
-        if match:
-            return match.group(1)
+def _xml_local_name(tag: str) -> str:
+    """Strip the `{namespace}` prefix iterparse puts on tags of namespaced POMs."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _pom_java_version(pom_path: str) -> str:
+    """Stream pom.xml and return the Java version from the project-level <properties>.
+
+    Only direct children of <project><properties> count — versions declared in
+    <dependency>, <plugin> or <profile> blocks never leak in. Parsing stops as
+    soon as the project's <properties> element closes, so the (often huge)
+    generated remainder of the file is never read.
+    """
+    found: dict[str, str] = {}
+    path: list[str] = []
+    try:
+        # The POM comes from the repository's own checkout, same as every other marker file here.
+        with open(pom_path, "rb") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):  # noqa: S314
+                name = _xml_local_name(elem.tag)
+                if event == "start":
+                    path.append(name)
+                    continue
+                path.pop()
+                if len(path) == 2 and path[1] == "properties" and name in POM_JAVA_PROPERTIES:
+                    found.setdefault(name, (elem.text or "").strip())
+                elif len(path) == 1 and name == "properties":
+                    break
+                if len(path) > 1:
+                    # Keep memory bounded on large POMs: children are consumed on close.
+                    elem.clear()
+    except (ET.ParseError, OSError) as e:
+        sys.stderr.write(f"Error parsing pom.xml: {e}\n")
+    for prop in POM_JAVA_PROPERTIES:
+        if found.get(prop):
+            return found[prop]
+    return ""
+
+
+# One tokenizer for Gradle scripts (Groovy and Kotlin DSL). Comments and string
+# literals are consumed as tokens of their own, so a commented-out
+# `// sourceCompatibility = 8` or a URL inside a string never matches.
+GRADLE_JAVA_TOKENS = re.compile(
+    r"""
+      (?P<comment>//[^\n]*|/\*.*?\*/)
+    | (?P<toolchain>JavaLanguageVersion\.of\(\s*(?P<toolchain_v>\d+)\s*\))
+    | (?P<source_enum>sourceCompatibility\s*=\s*['"]?(?:JavaVersion\.)?VERSION_(?P<source_enum_v>\d+(?:_\d+)?)['"]?)
+    | (?P<source_str>sourceCompatibility\s*=\s*['"](?P<source_str_v>\d+(?:\.\d+)?)['"])
+    | (?P<jvm_target_str>jvmTarget\s*=\s*['"](?P<jvm_target_str_v>\d+)['"])
+    | (?P<jvm_target_enum>JvmTarget\.JVM_(?P<jvm_target_enum_v>\d+(?:_\d+)?))
+    | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*')
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Which tokens count per build script, highest precedence first.
+GRADLE_JAVA_PRECEDENCE = {
+    "build.gradle": ("source_enum", "source_str"),
+    "build.gradle.kts": ("toolchain", "jvm_target_str", "jvm_target_enum"),
+}
+
+
+def _gradle_java_version(content: str, filename: str) -> str:
+    """Single tokenizer pass over a Gradle script; returns the highest-precedence Java version."""
+    precedence = GRADLE_JAVA_PRECEDENCE[filename]
+    found: dict[str, str] = {}
+    for m in GRADLE_JAVA_TOKENS.finditer(content):
+        kind = m.lastgroup
+        if kind not in precedence or kind in found:
+            continue
+        found[kind] = m.group(f"{kind}_v").replace("_", ".")
+        if kind == precedence[0]:
+            break
+    for kind in precedence:
+        if kind in found:
+            return found[kind]
+    return ""
+
+
+def detect_java_version(context: str) -> str:
+    # Maven: pom.xml (streamed; project-level <properties> only)
+    pom_path = os.path.join(context, "pom.xml")
+    if os.path.isfile(pom_path):
+        version = _pom_java_version(pom_path)
+        if version:
+            return version
+
+    # Gradle (Groovy): build.gradle — sourceCompatibility
+    # Gradle (Kotlin DSL): build.gradle.kts — JavaLanguageVersion.of(17), jvmTarget = "17" or JvmTarget.JVM_17
+    for filename in ("build.gradle", "build.gradle.kts"):
+        content = get_file_content(context, filename)
+        if content:
+            version = _gradle_java_version(content, filename)
+            if version:
+                return version
 
     return ""
 
@@ -129,6 +222,7 @@ def _java_version_to_bp_jvm(version: str) -> str:
     return version.split(".")[0]
 
 
+@_dir_cached
 def _gradle_bp_env_from_context(context_abs: str) -> dict[str, str]:
     """
     Extract Paketo/Java Gradle buildpack env vars from a Java/Gradle project directory.
@@ -161,6 +255,7 @@ def _gradle_bp_env_from_context(context_abs: str) -> dict[str, str]:
     return out
 
 
+@_dir_cached
 def detect_helm_charts(repo_root: str) -> list[str]:
     """Find all directories that contain a Chart.yaml (Helm chart)."""
     chart_paths: list[str] = []
@@ -174,6 +269,122 @@ def detect_helm_charts(repo_root: str) -> list[str]:
     return sorted(chart_paths)
 
 
+# Subchart repositories `helm pull` can fetch without a configured repo alias.
+HELM_FETCHABLE_SCHEMES = ("oci://", "https://", "http://")
+
+
+def _load_chart_yaml(chart_dir: str, filename: str) -> dict:
+    content = get_file_content(chart_dir, filename)
+    if not content:
+        return {}
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        sys.stderr.write(f"Error parsing {os.path.join(chart_dir, filename)}: {e}\n")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def detect_helm_dependencies(repo_root: str, chart_paths: list[str]) -> dict:
+    """Prefetch plan for Helm subcharts, parsed once from each chart's Chart.yaml/Chart.lock.
+
+    Lint and the helm test leg restore a shared subchart store (keyed by
+    `cache_key`, derived from the Chart.lock digests), fetch only the archives
+    the store is missing, and copy them into each chart's charts/ dir. A chart
+    is `complete` when every dependency is locked and fetchable from the store;
+    anything else (no Chart.lock, file:// or aliased repositories) still runs
+    `helm dependency build` after the copy.
+    """
+    charts: dict[str, dict] = {}
+    deps_by_key: dict[tuple[str, str, str], dict] = {}
+    digests: list[str] = []
+    for path in chart_paths:
+        chart_dir = os.path.normpath(os.path.join(repo_root, path))
+        declared = _load_chart_yaml(chart_dir, "Chart.yaml").get("dependencies") or []
+        if not declared:
+            continue
+        lock = _load_chart_yaml(chart_dir, "Chart.lock")
+        locked = lock.get("dependencies") or []
+        if lock.get("digest"):
+            digests.append(f"{path}:{lock['digest']}")
+        entries: list[dict] = []
+        for dep in locked:
+            if not isinstance(dep, dict):
+                continue
+            name = str(dep.get("name") or "")
+            version = str(dep.get("version") or "")
+            repository = str(dep.get("repository") or "").rstrip("/")
+            if not (name and version and repository.startswith(HELM_FETCHABLE_SCHEMES)):
+                continue
+            key = (repository, name, version)
+            if key not in deps_by_key:
+                # Namespaced by repository: two repos may publish the same name-version.
+                repo_id = hashlib.sha256(repository.encode()).hexdigest()[:12]
+                deps_by_key[key] = {
+                    "name": name,
+                    "version": version,
+                    "repository": repository,
+                    "store_path": f"{repo_id}/{name}-{version}.tgz",
+                }
+            entries.append(deps_by_key[key])
+        charts[path] = {
+            "dependencies": entries,
+            "complete": bool(lock) and len(entries) == len(declared),
+        }
+        sys.stderr.write(
+            f"Helm chart {path}: {len(entries)}/{len(declared)} dependencies prefetchable"
+            f"{'' if lock else ' (no Chart.lock)'}\n"
+        )
+    cache_key = hashlib.sha256("\n".join(sorted(digests)).encode()).hexdigest()[:16] if digests else ""
+    return {
+        "cache_key": cache_key,
+        "charts": charts,
+        "dependencies": sorted(deps_by_key.values(), key=lambda d: d["store_path"]),
+    }
+
+
+# Test-phase service dependencies (hack/test-deps convention), in the order the
+# test action looks for them.
+TEST_DEPS_COMPOSE_FILES = ("hack/test-deps/docker-compose.yml", "hack/test-deps/compose.yaml")
+
+# ${VAR}, ${VAR:-default}, ${VAR-default} — compose variable interpolation.
+COMPOSE_VARIABLE = re.compile(r"\$\{(\w+)(?::?-([^}]*))?\}")
+
+
+def detect_test_services(repo_root: str) -> dict:
+    """Service images of the repo's hack/test-deps compose file, parsed once.
+
+    The test action pre-pulls them in the background while toolchains are set
+    up, instead of pulling inside `docker compose up`. Images built locally
+    (`build:` without `image:`) are skipped; an image reference whose variables
+    have no compose default is left to compose itself.
+    """
+    for rel in TEST_DEPS_COMPOSE_FILES:
+        content = get_file_content(repo_root, rel)
+        if content is None:
+            continue
+        try:
+            compose = yaml.safe_load(content) or {}
+        except yaml.YAMLError as e:
+            sys.stderr.write(f"Error parsing {rel}: {e}\n")
+            return {"compose_file": rel, "images": []}
+        images: set[str] = set()
+        services = compose.get("services") if isinstance(compose, dict) else None
+        for service in (services or {}).values():
+            image = service.get("image") if isinstance(service, dict) else None
+            if not isinstance(image, str) or not image:
+                continue
+            unresolved = any(m.group(2) is None for m in COMPOSE_VARIABLE.finditer(image))
+            image = COMPOSE_VARIABLE.sub(lambda m: m.group(2) or "", image)
+            if unresolved or "$" in image:
+                continue
+            images.add(image)
+        sys.stderr.write(f"Test-phase services ({rel}): {', '.join(sorted(images)) or 'none to pre-pull'}\n")
+        return {"compose_file": rel, "images": sorted(images)}
+    return {"compose_file": "", "images": []}
+
+
+@_dir_cached
 def detect_project_info(context_path: str) -> dict[str, str | None] | None:
     """Detects language and version based on files in the context directory."""
     if not os.path.exists(context_path):
@@ -255,6 +466,7 @@ def effective_context(context_abs: str, env: dict[str, str]) -> str:
     return context_abs
 
 
+@_dir_cached
 def synthesize_rust_test_command(context_dir: str) -> str | None:
     """Archetype inference: some rust projects need more than a bare `cargo test`.
 
@@ -618,22 +830,39 @@ def build_deliverables_matrix(artifacts: list[dict], repo_root: str) -> list[dic
 
 def build_pipeline_context(config: dict, repo_root: str) -> dict:
     """
-    Build the full pipeline context (matrix, languages, versions, chart_paths, integration_matrix).
+    Build the full pipeline context (matrix, languages, versions, chart_paths, helm_dependencies,
+    test_services, integration_matrix).
     Pure in terms of config; uses filesystem for detect_project_info, detect_helm_charts, and Dockerfile check.
     """
     artifacts = config.get("build", {}).get("artifacts", [])
     matrix_include = build_matrix_include(artifacts, repo_root)
     chart_paths = detect_helm_charts(repo_root)
+    helm_dependencies = detect_helm_dependencies(repo_root, chart_paths)
     for path in chart_paths:
         name = f"helm-{path}" if path != "." else "helm"
-        matrix_include.append({
+        entry = {
             "name": name,
             "context": path,
             "language": "helm",
             "version": "",
             "kind": "test",
             "job_label": f"Test ({path}, helm)",
-        })
+        }
+        # The helm test leg only sees its own matrix item: carry this chart's
+        # slice of the prefetch plan along.
+        if path in helm_dependencies["charts"]:
+            entry["helm_dependencies"] = {
+                "cache_key": helm_dependencies["cache_key"],
+                "charts": {path: helm_dependencies["charts"][path]},
+            }
+        matrix_include.append(entry)
+
+    # Every test leg starts the same hack/test-deps services: each carries the
+    # image list so the test action can pre-pull it in the background.
+    test_services = detect_test_services(repo_root)
+    if test_services["images"]:
+        for entry in matrix_include:
+            entry["service_images"] = test_services["images"]
 
     integration_matrix = build_integration_matrix(artifacts, chart_paths, repo_root)
     deliverables_matrix = build_deliverables_matrix(artifacts, repo_root)
@@ -684,6 +913,8 @@ def build_pipeline_context(config: dict, repo_root: str) -> dict:
         "languages": unique_langs,
         "versions": versions,
         "chart_paths": chart_paths,
+        "helm_dependencies": helm_dependencies,
+        "test_services": test_services,
         "workdirs": workdirs,
         "integration_matrix": integration_matrix,
         "deliverables_matrix": deliverables_matrix,
@@ -699,24 +930,272 @@ def write_outputs(pipeline_context: dict, github_output_path: str | None = None)
     langs_output = ",".join(languages)
     pipeline_context_json = json.dumps(pipeline_context)
 
-    if github_output_path:
-        with open(github_output_path, "a") as f:
-            f.write(f"matrix={json_output}\n")
-            f.write(f"languages={langs_output}\n")
-            f.write(f"pipeline-context={pipeline_context_json}\n")
-            for lang, ver in versions.items():
-                f.write(f"{lang}-version={ver}\n")
-    else:
-        print(f"matrix={json_output}")  # noqa: T201
-        print(f"languages={langs_output}")  # noqa: T201
-        print(f"pipeline-context={pipeline_context_json}")  # noqa: T201
+    # An empty path prints to stdout (ActionIO would otherwise fall back to $GITHUB_OUTPUT).
+    with ActionIO(github_output_path or "") as io:
+        io.output("matrix", json_output)
+        io.output("languages", langs_output)
+        io.output("pipeline-context", pipeline_context_json)
         for lang, ver in versions.items():
-            print(f"{lang}-version={ver}")  # noqa: T201
+            io.output(f"{lang}-version", ver)
+
+
+# ── Watch mode (local iteration: `python detect.py --watch`) ─────────────────
+
+# Files whose content feeds detection, plus the skaffold config itself.
+WATCH_MARKERS = frozenset({
+    "go.mod",
+    "Cargo.toml",
+    "rust-toolchain",
+    "rust-toolchain.toml",
+    "package.json",
+    ".nvmrc",
+    "pyproject.toml",
+    "requirements.txt",
+    "Pipfile",
+    ".python-version",
+    "pom.xml",
+    "build.gradle",
+    "build.gradle.kts",
+    "Dockerfile",
+    "Chart.yaml",
+    "Chart.lock",
+    "config.toml",
+    "openapi.yaml",
+    "docker-compose.yml",
+    "compose.yaml",
+})
+
+
+def invalidate_dir_cache(changed: set[str]) -> None:
+    """Drop cached detections for every directory containing a changed path."""
+    if _DIR_CACHE is None:
+        return
+    charts_changed = any(os.path.basename(p) == "Chart.yaml" for p in changed)
+    for key in list(_DIR_CACHE):
+        func_name, d = key
+        if func_name == "detect_helm_charts":
+            stale = charts_changed
+        else:
+            stale = any(p == d or p.startswith(d + os.sep) for p in changed)
+        if stale:
+            del _DIR_CACHE[key]
+
+
+def watched_dirs(config: dict, repo_root: str, skaffold_file: str) -> set[str]:
+    """Directories whose marker files can change the pipeline context."""
+    dirs = {os.path.dirname(os.path.abspath(skaffold_file)), os.path.join(repo_root, "hack", "test-deps")}
+    for artifact in (config.get("build") or {}).get("artifacts", []) or []:
+        context_abs = os.path.normpath(os.path.join(repo_root, artifact.get("context", ".")))
+        probe_dir = effective_context(context_abs, artifact_env(artifact))
+        for d in (context_abs, probe_dir):
+            dirs.update({d, os.path.join(d, "tests"), os.path.join(d, ".cargo"), os.path.join(d, "examples")})
+    for path in detect_helm_charts(repo_root):
+        dirs.add(os.path.normpath(os.path.join(repo_root, path)))
+    return {d for d in dirs if os.path.isdir(d)}
+
+
+def _is_watched_name(name: str, skaffold_name: str) -> bool:
+    return name in WATCH_MARKERS or name == skaffold_name or name.endswith(".rs")
+
+
+class PollingWatcher:
+    """Fallback watcher: stats the marker files of the watched directories."""
+
+    def __init__(self, dirs: set[str], skaffold_name: str, interval: float = 0.5) -> None:
+        self.dirs = dirs
+        self.skaffold_name = skaffold_name
+        self.interval = interval
+        self._snapshot = self._scan(dirs)
+
+    def _scan(self, dirs: set[str]) -> dict[str, int]:
+        out: dict[str, int] = {}
+        for d in dirs:
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        if _is_watched_name(e.name, self.skaffold_name) and e.is_file():
+                            out[e.path] = e.stat().st_mtime_ns
+            except OSError:
+                continue
+        return out
 
+    def wait(self, timeout: float | None = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan(self.dirs)
+            changed = {p for p in current.keys() | self._snapshot.keys() if current.get(p) != self._snapshot.get(p)}
+            self._snapshot = current
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def update(self, dirs: set[str]) -> None:
+        """Watch dirs from now on; pending changes in directories still watched are kept."""
+        self._snapshot = {p: m for p, m in self._snapshot.items() if os.path.dirname(p) in dirs}
+        self._snapshot.update(self._scan(dirs - self.dirs))
+        self.dirs = dirs
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher (via libc) over the watched directories — no polling."""
+
+    _MASK = 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # CLOSE_WRITE | MOVED_FROM | MOVED_TO | CREATE | DELETE
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, dirs: set[str], skaffold_name: str) -> None:
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.skaffold_name = skaffold_name
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, str] = {}
+        self.update(dirs)
+
+    def update(self, dirs: set[str]) -> None:
+        """Watch dirs from now on; events already queued are kept for the next wait."""
+        for wd, d in list(self._dirs.items()):
+            if d not in dirs:
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self._dirs[wd]
+        for d in dirs - set(self._dirs.values()):
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(d), self._MASK)
+            if wd >= 0:
+                self._dirs[wd] = d
+
+    def _drain(self) -> set[str]:
+        changed: set[str] = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, _mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if wd in self._dirs and _is_watched_name(name, self.skaffold_name):
+                changed.add(os.path.join(self._dirs[wd], name))
+        return changed
+
+    def wait(self, timeout: float | None = None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self._drain()
+            # Editors save in bursts (write, rename, chmod): coalesce them.
+            time.sleep(0.05)
+            changed |= self._drain()
+            if changed:
+                return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(dirs: set[str], skaffold_name: str, *, poll: bool = False, interval: float = 0.5):
+    """inotify where available, polling otherwise (macOS, containers without inotify)."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(dirs, skaffold_name)
+        except (OSError, AttributeError) as e:
+            sys.stderr.write(f"inotify unavailable ({e}); falling back to polling\n")
+    return PollingWatcher(dirs, skaffold_name, interval)
+
+
+def context_diff(old: object, new: object, path: str = "") -> list[str]:
+    """Minimal structural diff of two pipeline contexts: one line per changed leaf."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        lines: list[str] = []
+        for k in sorted(old.keys() | new.keys(), key=str):
+            sub = f"{path}.{k}" if path else str(k)
+            if k not in new:
+                lines.append(f"- {sub}: {json.dumps(old[k])}")
+            elif k not in old:
+                lines.append(f"+ {sub}: {json.dumps(new[k])}")
+            else:
+                lines.extend(context_diff(old[k], new[k], sub))
+        return lines
+    if isinstance(old, list) and isinstance(new, list):
+        lines = []
+        for i in range(max(len(old), len(new))):
+            sub = f"{path}[{i}]"
+            if i >= len(new):
+                lines.append(f"- {sub}: {json.dumps(old[i])}")
+            elif i >= len(old):
+                lines.append(f"+ {sub}: {json.dumps(new[i])}")
+            else:
+                lines.extend(context_diff(old[i], new[i], sub))
+        return lines
+    if old != new:
+        return [f"~ {path}: {json.dumps(old)} -> {json.dumps(new)}"]
+    return []
+
+
+def load_skaffold_config(skaffold_file: str) -> dict:
+    with open(skaffold_file) as f:
+        return yaml.safe_load(f) or {}
 
-def main() -> None:
+
+def watch(skaffold_file: str, *, poll: bool = False, interval: float = 0.5, max_rounds: int | None = None) -> None:
+    """Print the pipeline context once, then a minimal diff after every relevant change."""
+    global _DIR_CACHE
+    _DIR_CACHE = {}
+    repo_root = os.path.dirname(os.path.abspath(skaffold_file))
+    skaffold_name = os.path.basename(skaffold_file)
+    config = load_skaffold_config(skaffold_file)
+    context = build_pipeline_context(config, repo_root)
+    write_outputs(context)
+    rounds = 0
+    # One watcher for the whole session: changes made while a context is being recomputed stay queued
+    # (inotify) or differ from the last snapshot (polling), so the next wait reports them.
+    watcher = make_watcher(watched_dirs(config, repo_root, skaffold_file), skaffold_name, poll=poll, interval=interval)
+    try:
+        while max_rounds is None or rounds < max_rounds:
+            rounds += 1
+            changed = watcher.wait()
+            invalidate_dir_cache(changed)
+            if any(os.path.basename(p) == skaffold_name for p in changed):
+                try:
+                    config = load_skaffold_config(skaffold_file)
+                except Exception as e:
+                    sys.stderr.write(f"Error parsing {skaffold_file}: {e} (keeping previous config)\n")
+            updated = build_pipeline_context(config, repo_root)
+            diff = context_diff(context, updated)
+            rel = sorted(os.path.relpath(p, repo_root) for p in changed)
+            print(f"# changed: {', '.join(rel)}")  # noqa: T201
+            print("\n".join(diff) if diff else "# pipeline-context unchanged")  # noqa: T201
+            sys.stdout.flush()
+            context = updated
+            watcher.update(watched_dirs(config, repo_root, skaffold_file))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        _DIR_CACHE = None
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Detect CI contexts from skaffold.yaml.")
+    parser.add_argument("--watch", action="store_true", help="keep running and print context diffs on change")
+    parser.add_argument("--poll", action="store_true", help="poll instead of inotify in watch mode")
+    parser.add_argument("--interval", type=float, default=0.5, help="poll interval in seconds (default: 0.5)")
+    args = parser.parse_args(argv or [])
     skaffold_file = os.environ.get("SKAFFOLD_FILE", "skaffold.yaml")
 
+    if args.watch:
+        if not os.path.exists(skaffold_file):
+            sys.stderr.write(f"Error: {skaffold_file} not found.\n")
+            sys.exit(1)
+        watch(skaffold_file, poll=args.poll, interval=args.interval)
+        return
+
     if not os.path.exists(skaffold_file):
         sys.stderr.write(f"Error: {skaffold_file} not found.\n")
         empty_context = {
@@ -724,6 +1203,8 @@ def main() -> None:
             "languages": [],
             "versions": {},
             "chart_paths": [],
+            "helm_dependencies": {"cache_key": "", "charts": {}, "dependencies": []},
+            "test_services": {"compose_file": "", "images": []},
             "integration_matrix": [],
             "deliverables_matrix": [],
         }
@@ -743,4 +1224,4 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
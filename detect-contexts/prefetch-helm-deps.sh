@@ -0,0 +1,71 @@
+#!/usr/bin/env bash
+# Populate each chart's charts/ dir from a shared subchart store, fetching only
+# the archives the store is missing (concurrently), per the helm_dependencies
+# plan detect-contexts puts in the pipeline-context. Charts the plan cannot
+# fully cover (no Chart.lock, file:// or aliased repositories) still run
+# `helm dependency build` afterwards — as do all charts when the
+# pipeline-context predates the plan.
+#
+# Usage: prefetch-helm-deps.sh CHART_DIR...
+# Env:   PIPELINE_CONTEXT  full pipeline-context JSON (or a single matrix item without the plan)
+#        HELM_DEPS_STORE   store dir (default: ~/.cache/octopilot/helm-deps) — restore it with actions/cache
+#        HELM_DEPS_JOBS    max concurrent pulls (default: 8)
+set -euo pipefail
+
+STORE="${HELM_DEPS_STORE:-$HOME/.cache/octopilot/helm-deps}"
+JOBS="${HELM_DEPS_JOBS:-8}"
+PLAN="$(echo "${PIPELINE_CONTEXT:-}" | jq -c '.helm_dependencies // {}' 2>/dev/null || true)"
+[[ -n "$PLAN" ]] || PLAN='{}'
+mkdir -p "$STORE"
+
+pull() {
+  local repository="$1" name="$2" version="$3" store_path="$4" tmp
+  tmp="$(mktemp -d)"
+  if [[ "$repository" == oci://* ]]; then
+    helm pull "$repository/$name" --version "$version" -d "$tmp" >/dev/null
+  else
+    helm pull "$name" --repo "$repository" --version "$version" -d "$tmp" >/dev/null
+  fi
+  mkdir -p "$(dirname "$STORE/$store_path")"
+  mv "$tmp/$name-$version.tgz" "$STORE/$store_path"
+  rm -rf "$tmp"
+  echo "Fetched $name $version from $repository"
+}
+
+# 1. Fetch what the store lacks, only for the charts being processed. A failed
+#    pull just leaves its archive missing; step 2 then falls back to a build.
+mapfile -t wanted < <(
+  for dir in "$@"; do
+    chart="$(realpath --relative-to="${GITHUB_WORKSPACE:-.}" "$dir")"
+    echo "$PLAN" | jq -r --arg c "$chart" '.charts[$c].dependencies[]? | [.repository, .name, .version, .store_path] | @tsv'
+  done | sort -u
+)
+for line in "${wanted[@]}"; do
+  IFS=$'\t' read -r repository name version store_path <<<"$line"
+  [[ -f "$STORE/$store_path" ]] && continue
+  while [[ "$(jobs -rp | wc -l)" -ge "$JOBS" ]]; do wait -n || true; done
+  pull "$repository" "$name" "$version" "$store_path" &
+done
+while [[ -n "$(jobs -rp)" ]]; do wait -n || true; done
+
+# 2. Copy from the store; build only charts the plan does not fully cover.
+for dir in "$@"; do
+  chart="$(realpath --relative-to="${GITHUB_WORKSPACE:-.}" "$dir")"
+  complete="$(echo "$PLAN" | jq -r --arg c "$chart" '.charts[$c].complete // false')"
+  mkdir -p "$dir/charts"
+  while IFS=$'\t' read -r name version store_path; do
+    [[ -z "$store_path" ]] && continue
+    if [[ -f "$STORE/$store_path" ]]; then
+      cp "$STORE/$store_path" "$dir/charts/$name-$version.tgz"
+    else
+      complete=false
+    fi
+  done < <(echo "$PLAN" | jq -r --arg c "$chart" '.charts[$c].dependencies[]? | [.name, .version, .store_path] | @tsv')
+  if [[ "$complete" == "true" ]]; then
+    echo "Chart $chart: all dependencies restored from the shared store"
+  elif [[ -f "$dir/Chart.yaml" ]] && grep -q '^dependencies:' "$dir/Chart.yaml"; then
+    echo "Chart $chart: running helm dependency build"
+    # Per chart: one failing build must not stop the remaining charts.
+    (cd "$dir" && helm dependency build .) || echo "::warning::Chart $chart: helm dependency build failed"
+  fi
+done
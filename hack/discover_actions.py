@@ -1,6 +1,8 @@
 import json
 import os
 
+from common.gha import ActionIO
+
 
 def main():
     actions = []
@@ -22,13 +24,9 @@ def main():
 
     print(f"Found containerizable actions: {actions}")
 
-    # Write to GITHUB_OUTPUT
-    if "GITHUB_OUTPUT" in os.environ:
-        with open(os.environ["GITHUB_OUTPUT"], "a") as f:
-            f.write(f"actions={json.dumps(actions)}\n")
-    else:
-        # Fallback for local testing
-        print(f"::set-output name=actions::{json.dumps(actions)}")
+    # Written to GITHUB_OUTPUT; printed for local testing
+    with ActionIO() as io:
+        io.output("actions", json.dumps(actions))
 
 
 if __name__ == "__main__":
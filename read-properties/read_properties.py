@@ -1,6 +1,7 @@
 import os
 import sys
-from contextlib import nullcontext
+
+from common.gha import ActionIO
 
 
 def read_properties():
@@ -27,8 +28,8 @@ def read_properties():
         with open(file_path) as f:
             lines = f.readlines()
 
-        # If github_env is empty, use stdout/dummy, but logic below handles 'if github_env'
-        with open(github_env, "a") if github_env else nullcontext(sys.stdout) as output_file:
+        # Without GITHUB_ENV the entries are printed to stdout instead
+        with ActionIO() as io:
             for line in lines:
                 line = line.strip()
                 # Ignore comments and empty lines
@@ -43,21 +44,10 @@ def read_properties():
                 else:
                     continue
 
-                key = key.strip()
-                value = value.strip()
-
-                if github_env:
-                    # Handle multiline if needed, but properties are usually single line
-                    # For simplicity, we assume single line values for now, or use EOF delimiter for safety
-                    delimiter = "EOF"
-                    output_file.write(f"{key}<<{delimiter}\n")
-                    output_file.write(f"{value}\n")
-                    output_file.write(f"{delimiter}\n")
-                else:
-                    print(f"{key}={value}")
+                io.env(key.strip(), value.strip())
 
-            if not github_env:
-                print("Properties exported successfully.")
+        if not github_env:
+            print("Properties exported successfully.")
 
     except Exception as e:
         print(f"Error reading properties file: {e}", file=sys.stderr)
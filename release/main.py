@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
-"""Entrypoint for release-notes GitHub Action: read INPUT_*, run common.notes.run(), set GITHUB_OUTPUT."""
+"""Entrypoint for release-notes GitHub Action: read INPUT_*, run common.notes.run(), set outputs via common.gha."""
 
 import os
 import sys
 from pathlib import Path
 
-from common.notes import ReleaseNotesError
+from common.gha import ActionIO
+from common.notes import GITHUB_GRAPHQL_URL, ReleaseNotesError, update_draft
+from common.notes import backfill as backfill_notes
 from common.notes import run as run_notes
 
 
@@ -30,7 +32,9 @@ def main() -> None:
         print(f"Warning: Failed to set safe.directory: {e}", file=sys.stderr)
 
     version = _input("version")
-    if not version:
+    backfill = int(_input("backfill") or "0")
+    draft = _input("draft").lower() in ("true", "1", "yes")
+    if not version and not backfill and not draft:
         print("Input 'version' is required.", file=sys.stderr)
         sys.exit(1)
 
@@ -40,6 +44,18 @@ def main() -> None:
     provider = _input("provider") or "anthropic"
     model = _input("model") or None
     output_filename = _input("output_filename") or "release_notes.md"
+    cache_dir = _input("cache_dir")
+    cache_ttl_hours = float(_input("cache_ttl_hours") or "168")
+    cache_bypass = _input("cache_bypass").lower() in ("true", "1", "yes")
+    chunk_tokens = int(_input("chunk_tokens") or "8000")
+    map_workers = int(_input("map_workers") or "4")
+    stream = (_input("stream") or "true").lower() in ("true", "1", "yes")
+    idle_timeout = float(_input("idle_timeout") or "60")
+    fallback_provider = _input("fallback_provider") or None
+    hedge_after = float(_input("hedge_after")) if _input("hedge_after") else None
+    hedge_percentile = float(_input("hedge_percentile") or "90")
+    mode = _input("mode") or "ai"
+    prompt_budget = int(_input("prompt_budget")) if _input("prompt_budget") else None
 
     template_path_resolved: Path | None = None
     if template_path:
@@ -51,30 +67,83 @@ def main() -> None:
             f.write(template_inline)
             template_path_resolved = Path(f.name)
 
+    options = {
+        "template_path": template_path_resolved,
+        "model": model,
+        "provider": provider,
+        "cache_dir": (project_root / cache_dir) if cache_dir else None,
+        "cache_ttl": cache_ttl_hours * 3600,
+        "cache_bypass": cache_bypass,
+        "chunk_tokens": chunk_tokens,
+        "map_workers": map_workers,
+        "stream": stream,
+        "idle_timeout": idle_timeout,
+        "fallback_provider": fallback_provider,
+        "hedge_after": hedge_after,
+        "hedge_percentile": hedge_percentile,
+        "mode": mode,
+        "prompt_budget": prompt_budget,
+    }
+    if (_input("pull_requests") or "true").lower() in ("true", "1", "yes"):
+        options["github_repository"] = os.environ.get("GITHUB_REPOSITORY") or None
+        options["github_token"] = _input("github_token") or None
+        options["github_api_url"] = os.environ.get("GITHUB_GRAPHQL_URL") or GITHUB_GRAPHQL_URL
+    if backfill:
+        _backfill(project_root, backfill, options)
+
     output_path = project_root / output_filename
+    stats: dict = {}
 
     try:
-        body = run_notes(
-            project_root,
-            version,
-            since_tag=since_tag,
-            template_path=template_path_resolved,
-            output_path=output_path,
-            model=model,
-            provider=provider,
-        )
+        if draft:
+            body = update_draft(
+                project_root,
+                version or "Unreleased",
+                since_tag=since_tag,
+                output_path=output_path,
+                stats=stats,
+                **options,
+            )
+        else:
+            body = run_notes(
+                project_root, version, since_tag=since_tag, output_path=output_path, stats=stats, **options
+            )
     except ReleaseNotesError as e:
         print(str(e), file=sys.stderr)
         sys.exit(1)
 
-    github_output = os.environ.get("GITHUB_OUTPUT")
-    if github_output:
-        with open(github_output, "a") as f:
-            f.write(f"body_file={output_filename}\n")
-            f.write("body<<EOF\n")
-            f.write(body)
-            f.write("\nEOF\n")
+    if "pull_requests" in stats:
+        print(f"Pull requests: {stats['pull_requests']} resolved", file=sys.stderr)
+    if "pull_requests_error" in stats:
+        print(f"Warning: pull request lookup failed: {stats['pull_requests_error']}", file=sys.stderr)
+    if "prompt_tokens" in stats:
+        print(
+            f"Prompt: {stats['commits']} commits ({stats['noise']} bot/merge dropped, {stats['omitted']} over budget) "
+            f"in {stats['lines']} lines, ~{stats['prompt_tokens']} tokens",
+            file=sys.stderr,
+        )
+
+    # The body is already in output_filename; it is repeated as `body` only while it is small.
+    with ActionIO(fallback=sys.stderr) as io:
+        io.output("prompt_tokens", stats.get("prompt_tokens", 0))
+        io.body("body", body, path=output_filename)
+
+    sys.exit(0)
+
+
+def _backfill(project_root: Path, count: int, options: dict) -> None:
+    """Notes for the last `count` tags into backfill_dir, one file per tag plus index.json; exits."""
+    backfill_dir = _input("backfill_dir") or "release-notes"
+    jobs = int(_input("backfill_jobs") or "4")
+    try:
+        index = backfill_notes(project_root, project_root / backfill_dir, limit=count, jobs=jobs, **options)
+    except ReleaseNotesError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
+    print(f"Backfilled release notes for {len(index)} tags into {backfill_dir}", file=sys.stderr)
 
+    with ActionIO(fallback=sys.stderr) as io:
+        io.output("index_file", f"{backfill_dir}/index.json")
     sys.exit(0)
 
 
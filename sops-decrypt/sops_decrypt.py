@@ -3,6 +3,8 @@ import os
 import subprocess
 import sys
 
+from common.gha import ActionIO
+
 
 def setup_keys():
     """Import GPG or AGE keys from environment variables."""
@@ -59,60 +61,49 @@ def decrypt_file():
         result = subprocess.run(cmd, capture_output=True, check=True, text=True)
         decrypted_data = result.stdout
 
-        # Write to GITHUB_OUTPUT
-        if "GITHUB_OUTPUT" in os.environ:
-            # Multi-line string handling for GITHUB_OUTPUT
-            delimiter = "EOF"
-            with open(os.environ["GITHUB_OUTPUT"], "a") as f:
-                f.write(f"data<<{delimiter}\n")
-                f.write(decrypted_data)
-                f.write(f"\n{delimiter}\n")
-        else:
-            print(decrypted_data)
-
-        # Handle export_envs
-        export_envs = os.environ.get("INPUT_EXPORT_ENVS", "false").lower() == "true"
-        if export_envs and "GITHUB_ENV" in os.environ:
-            print("Exporting secrets to GITHUB_ENV...")
-            env_file = os.environ["GITHUB_ENV"]
-
-            if output_type == "dotenv":
-                # Dotenv is already KEY=VALUE
-                with open(env_file, "a") as f:
+        with ActionIO() as io:
+            # Without GITHUB_OUTPUT (local runs) the data is printed instead
+            io.output("data", decrypted_data)
+
+            # Handle export_envs
+            export_envs = os.environ.get("INPUT_EXPORT_ENVS", "false").lower() == "true"
+            if export_envs and "GITHUB_ENV" in os.environ:
+                print("Exporting secrets to GITHUB_ENV...")
+
+                if output_type == "dotenv":
+                    # Dotenv is already KEY=VALUE
                     for line in decrypted_data.splitlines():
                         if line.strip() and not line.strip().startswith("#"):
                             # Simple parsing for dotenv
                             key, value = line.split("=", 1)
-                            f.write(f"{key.strip()}={value.strip()}\n")
+                            io.env(key.strip(), value.strip())
 
-            elif output_type == "json":
-                import json
+                elif output_type == "json":
+                    import json
 
-                try:
-                    data = json.loads(decrypted_data)
-                    with open(env_file, "a") as f:
+                    try:
+                        data = json.loads(decrypted_data)
                         for key, value in data.items():
                             # Handle complex types by converting to string or skipping
                             if isinstance(value, dict | list):
                                 print(f"Warning: Skipping complex type for key {key}", file=sys.stderr)
                                 continue
-                            f.write(f"{key}={value}\n")
-                except json.JSONDecodeError as e:
-                    print(f"Error parsing JSON for export: {e}", file=sys.stderr)
+                            io.env(key, value)
+                    except json.JSONDecodeError as e:
+                        print(f"Error parsing JSON for export: {e}", file=sys.stderr)
 
-            elif output_type == "yaml":
-                import yaml
+                elif output_type == "yaml":
+                    import yaml
 
-                try:
-                    data = yaml.safe_load(decrypted_data)
-                    with open(env_file, "a") as f:
+                    try:
+                        data = yaml.safe_load(decrypted_data)
                         for key, value in data.items():
                             if isinstance(value, dict | list):
                                 print(f"Warning: Skipping complex type for key {key}", file=sys.stderr)
                                 continue
-                            f.write(f"{key}={value}\n")
-                except yaml.YAMLError as e:
-                    print(f"Error parsing YAML for export: {e}", file=sys.stderr)
+                            io.env(key, value)
+                    except yaml.YAMLError as e:
+                        print(f"Error parsing YAML for export: {e}", file=sys.stderr)
 
     except subprocess.CalledProcessError as e:
         print(f"Error decrypting file: {e.stderr}", file=sys.stderr)
@@ -0,0 +1,299 @@
+"""Fingerprint everything a test leg can observe, for the test action's result cache.
+
+Inputs: the leg's matrix item (language, version, workdir, command, ...), the
+toolchain it runs on (the action's default when the item has no version), the
+git tree of its context (where the test steps run), of its workdir and of every
+path dependency reachable from it, the lockfiles and ancestor build configs
+(workspace manifests, go.work, cargo config, toolchain pins) governing it,
+hack/test-deps, the runner image, BP_* env and the test action itself. A green
+result recorded under a fingerprint is reused by any later run presenting the
+same one (rebase-only and docs-only pushes).
+
+Reads PIPELINE_CONTEXT (one matrix item) and RESULT_CACHE_IGNORE (globs); writes `fingerprint=<sha256>` to
+GITHUB_OUTPUT (stdout when unset) and the components to stderr.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tomllib
+from pathlib import Path
+
+# Bump to invalidate every recorded result (fingerprint semantics changed).
+FINGERPRINT_VERSION = "1"
+
+# Matrix item keys that never change what the leg runs: DAG labels, and the
+# helm prefetch plan (derived from Chart.lock, which is hashed with the tree).
+NON_INPUT_KEYS = ("name", "job_label", "helm_dependencies")
+
+LOCKFILES = (
+    "Cargo.lock",
+    "go.sum",
+    "package-lock.json",
+    "npm-shrinkwrap.json",
+    "yarn.lock",
+    "pnpm-lock.yaml",
+    "poetry.lock",
+    "uv.lock",
+    "Pipfile.lock",
+    "gradle.lockfile",
+)
+
+# Manifests and toolchain configs that change a build from an ancestor directory: workspace
+# [profile]s and [patch]es, go.work, cargo config, pinned toolchains, JS workspaces.
+BUILD_CONFIGS = (
+    "Cargo.toml",
+    ".cargo/config.toml",
+    ".cargo/config",
+    "rust-toolchain.toml",
+    "rust-toolchain",
+    "go.work",
+    "go.work.sum",
+    "pyproject.toml",
+    "package.json",
+    "pnpm-workspace.yaml",
+    ".npmrc",
+    ".python-version",
+    ".nvmrc",
+    ".tool-versions",
+)
+
+# Toolchain each Setup step in action.yml installs when the leg has no version: keep in sync.
+DEFAULT_VERSIONS = {"go": "1.24", "rust": "stable", "python": "3.12", "node": "20", "java": "17"}
+
+# Runner properties that change the toolchain or system libraries under the tests.
+RUNNER_ENV = ("RUNNER_OS", "RUNNER_ARCH", "ImageOS", "ImageVersion")
+
+# Directory names never hashed in the non-git fallback walk.
+SKIP_DIRS = frozenset({".git", "target", "node_modules", ".venv", "venv", "__pycache__", "build", "dist"})
+
+
+def tree_entries(repo_root: Path, rel: str) -> list[tuple[str, str]]:
+    """(path, content id) for every file under rel: git blob shas, so no file is read.
+
+    Outside a git checkout (or for untracked trees), falls back to hashing file contents.
+    """
+    try:
+        out = subprocess.run(
+            ["git", "ls-files", "-s", "-z", "--", rel],
+            cwd=repo_root,
+            capture_output=True,
+            check=True,
+        ).stdout
+        # <mode> <blob sha> <stage>\t<path>
+        entries = []
+        for record in out.split(b"\0"):
+            if record:
+                meta, path = record.decode(errors="replace").split("\t", 1)
+                entries.append((path, meta))
+        if entries:
+            return entries
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(repo_root / rel):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+        for fn in sorted(filenames):
+            p = Path(dirpath) / fn
+            try:
+                digest = hashlib.sha256(p.read_bytes()).hexdigest()
+            except OSError:
+                continue
+            entries.append((p.relative_to(repo_root).as_posix(), digest))
+    return entries
+
+
+def _inside(repo_root: Path, path: Path) -> str | None:
+    """Repo-relative posix path, or None when path escapes the repository."""
+    try:
+        return path.resolve().relative_to(repo_root.resolve()).as_posix() or "."
+    except ValueError:
+        return None
+
+
+def _cargo_path_deps(manifest: Path) -> list[Path]:
+    try:
+        data = tomllib.loads(manifest.read_text(encoding="utf-8"))
+    except (OSError, tomllib.TOMLDecodeError):
+        return []
+    tables = [data.get(k) or {} for k in ("dependencies", "dev-dependencies", "build-dependencies")]
+    tables.append((data.get("workspace") or {}).get("dependencies") or {})
+    for target in (data.get("target") or {}).values():
+        if isinstance(target, dict):
+            tables.extend(target.get(k) or {} for k in ("dependencies", "dev-dependencies", "build-dependencies"))
+    return [
+        manifest.parent / spec["path"]
+        for table in tables
+        for spec in table.values()
+        if isinstance(spec, dict) and isinstance(spec.get("path"), str)
+    ]
+
+
+def _go_path_deps(gomod: Path) -> list[Path]:
+    try:
+        content = gomod.read_text(encoding="utf-8")
+    except OSError:
+        return []
+    return [gomod.parent / m.group(1) for m in re.finditer(r"=>\s*(\.{1,2}/\S+)", content)]
+
+
+def _node_path_deps(package_json: Path) -> list[Path]:
+    try:
+        data = json.loads(package_json.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return []
+    out: list[Path] = []
+    for key in ("dependencies", "devDependencies", "optionalDependencies"):
+        for spec in (data.get(key) or {}).values():
+            if isinstance(spec, str) and spec.startswith(("file:", "link:")):
+                out.append(package_json.parent / spec.split(":", 1)[1])
+    return out
+
+
+def _python_path_deps(pyproject: Path) -> list[Path]:
+    try:
+        data = tomllib.loads(pyproject.read_text(encoding="utf-8"))
+    except (OSError, tomllib.TOMLDecodeError):
+        return []
+    tool = data.get("tool") or {}
+    tables = [(tool.get("poetry") or {}).get("dependencies") or {}, (tool.get("uv") or {}).get("sources") or {}]
+    return [
+        pyproject.parent / spec["path"]
+        for table in tables
+        for spec in table.values()
+        if isinstance(spec, dict) and isinstance(spec.get("path"), str)
+    ]
+
+
+PATH_DEP_READERS = {
+    "Cargo.toml": _cargo_path_deps,
+    "go.mod": _go_path_deps,
+    "package.json": _node_path_deps,
+    "pyproject.toml": _python_path_deps,
+}
+
+
+def path_dependencies(repo_root: Path, workdir: str) -> list[str]:
+    """Repo-relative dirs outside workdir that its manifests reference by path (transitively)."""
+    covered = [workdir]
+    queue = [workdir]
+    found: list[str] = []
+    while queue:
+        rel = queue.pop()
+        for path, _id in tree_entries(repo_root, rel):
+            reader = PATH_DEP_READERS.get(Path(path).name)
+            if reader is None:
+                continue
+            for dep in reader(repo_root / path):
+                dep_rel = _inside(repo_root, dep)
+                if dep_rel is None or any(c == "." or dep_rel == c or dep_rel.startswith(f"{c}/") for c in covered):
+                    continue
+                covered.append(dep_rel)
+                found.append(dep_rel)
+                queue.append(dep_rel)
+    return sorted(found)
+
+
+def ancestor_files(repo_root: Path, workdir: str, names: tuple[str, ...]) -> list[str]:
+    """Files named `names` at workdir and every ancestor up to the repo root."""
+    out: list[str] = []
+    current = (repo_root / workdir).resolve()
+    root = repo_root.resolve()
+    while True:
+        for name in names:
+            if (current / name).is_file():
+                out.append((current / name).relative_to(root).as_posix())
+        if current == root or root not in current.parents:
+            break
+        current = current.parent
+    return out
+
+
+def lockfiles(repo_root: Path, workdir: str) -> list[str]:
+    """Lockfiles at workdir and every ancestor up to the repo root (workspace locks live at the root)."""
+    return ancestor_files(repo_root, workdir, LOCKFILES)
+
+
+def _outermost(rels: list[str]) -> list[str]:
+    """rels without those nested in another one ("." covers everything), sorted."""
+    rels = sorted(set(rels))
+    if "." in rels:
+        return ["."]
+    return [r for r in rels if not any(r.startswith(f"{c}/") for c in rels)]
+
+
+def fingerprint(
+    repo_root: Path,
+    item: dict,
+    env: dict[str, str],
+    action_file: Path | None = None,
+    ignore: tuple[str, ...] = (),
+) -> tuple[str, dict]:
+    """Return (sha256 hex, components) for one test leg.
+
+    Tree paths matching an `ignore` glob (fnmatch, `*` spans directories) are
+    left out, e.g. `docs/**` so docs-only pushes reuse the recorded result.
+    """
+    context = item.get("context") or "."
+    workdir = item.get("workdir") or context
+    deps = path_dependencies(repo_root, workdir)
+    locks = lockfiles(repo_root, workdir)
+    # Test steps run (and eval the command) in context, which may hold scripts outside workdir.
+    configs = sorted(
+        set(ancestor_files(repo_root, workdir, BUILD_CONFIGS) + ancestor_files(repo_root, context, BUILD_CONFIGS))
+    )
+    trees = _outermost([context, workdir, *deps])
+    components = {
+        "version": FINGERPRINT_VERSION,
+        "item": {k: v for k, v in sorted(item.items()) if k not in NON_INPUT_KEYS},
+        "toolchain": item.get("version") or DEFAULT_VERSIONS.get(item.get("language") or "", ""),
+        "context": context,
+        "workdir": workdir,
+        "path_dependencies": deps,
+        "lockfiles": locks,
+        "build_configs": configs,
+        "runner": {k: env.get(k, "") for k in RUNNER_ENV},
+        "env": {k: v for k, v in sorted(env.items()) if k.startswith("BP_")},
+        "ignore": sorted(ignore),
+    }
+    h = hashlib.sha256(json.dumps(components, sort_keys=True).encode())
+    for rel in [*trees, "hack/test-deps"]:
+        if (repo_root / rel).exists():
+            for path, content_id in tree_entries(repo_root, rel):
+                if any(fnmatch.fnmatch(path, pat) for pat in ignore):
+                    continue
+                h.update(f"{content_id} {path}\0".encode())
+    for rel in [*locks, *configs]:
+        h.update(hashlib.sha256((repo_root / rel).read_bytes()).digest())
+    if action_file is not None and action_file.is_file():
+        h.update(hashlib.sha256(action_file.read_bytes()).digest())
+    return h.hexdigest(), components
+
+
+def main() -> None:
+    try:
+        item = json.loads(os.environ.get("PIPELINE_CONTEXT") or "{}")
+    except json.JSONDecodeError as e:
+        print(f"Error parsing PIPELINE_CONTEXT: {e}", file=sys.stderr)
+        sys.exit(1)
+    repo_root = Path(os.environ.get("GITHUB_WORKSPACE") or ".")
+    action_file = Path(__file__).resolve().parent / "action.yml"
+    ignore = tuple((os.environ.get("RESULT_CACHE_IGNORE") or "").split())
+    digest, components = fingerprint(repo_root, item, dict(os.environ), action_file, ignore)
+    print(f"Test leg fingerprint {digest}: {json.dumps(components, sort_keys=True)}", file=sys.stderr)
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if github_output:
+        with open(github_output, "a") as f:
+            f.write(f"fingerprint={digest}\n")
+    else:
+        print(f"fingerprint={digest}")
+
+
+if __name__ == "__main__":
+    main()
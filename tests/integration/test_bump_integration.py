@@ -6,14 +6,24 @@ import pytest
 
 # Path to the script under test
 BUMP_SCRIPT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../bump-version/bump_version.py"))
+# The action image installs common/; the script imports common.gha from it
+COMMON_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../common"))
 
 
-def run_bump_action(cwd, mode, bump, file_path=None):
-    env = os.environ.copy()
+def _script_env(**inputs):
+    env = {**os.environ, **inputs}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [COMMON_DIR, env.get("PYTHONPATH")]))
+    return env
+
+
+def run_bump_action(cwd, mode, bump, file_path=None, targets=None):
+    env = _script_env()
     env["INPUT_MODE"] = mode
     env["INPUT_BUMP"] = bump
     if file_path:
         env["INPUT_FILE"] = str(file_path)
+    if targets:
+        env["INPUT_TARGETS"] = targets
 
     # Capture output for debugging
     result = subprocess.run([sys.executable, BUMP_SCRIPT], cwd=cwd, env=env, capture_output=True, text=True)
@@ -67,6 +77,61 @@ def test_integration_rust_workspace(workspace):
     assert 'version="0.2.0"' in (workspace / "a/Cargo.toml").read_text(encoding="utf-8")
 
 
+def test_integration_rust_updates_cargo_lock(workspace):
+    (workspace / "Cargo.toml").write_text(
+        '[workspace]\nmembers = ["a"]\n\n[workspace.package]\nversion = "0.1.0"\n', encoding="utf-8"
+    )
+    (workspace / "a").mkdir()
+    (workspace / "a/Cargo.toml").write_text('[package]\nname = "a"\nversion.workspace = true\n', encoding="utf-8")
+    (workspace / "Cargo.lock").write_text(
+        'version = 4\n\n[[package]]\nname = "a"\nversion = "0.1.0"\n', encoding="utf-8"
+    )
+
+    res = run_bump_action(workspace, "rust", "patch")
+
+    assert res.returncode == 0, res.stderr
+    assert 'name = "a"\nversion = "0.1.1"' in (workspace / "Cargo.lock").read_text(encoding="utf-8")
+
+
+def test_integration_rust_cargo_lock_follows_bumped_manifests(workspace):
+    (workspace / "Cargo.toml").write_text(
+        '[workspace]\nmembers = ["a", "b", "c"]\n\n[workspace.package]\nversion = "0.1.0"\n', encoding="utf-8"
+    )
+    manifests = {
+        "a": "version.workspace = true",
+        "b": "version = { workspace = true }",
+        "c": 'version = "0.1.0-dev"  # released on its own',
+    }
+    for name, version in manifests.items():
+        (workspace / name).mkdir()
+        (workspace / name / "Cargo.toml").write_text(f'[package]\nname = "{name}"\n{version}\n', encoding="utf-8")
+    # c's manifest is not at 0.1.0, so its lock entry (stale or not) must not move.
+    (workspace / "Cargo.lock").write_text(
+        "version = 4\n" + "".join(f'\n[[package]]\nname = "{name}"\nversion = "0.1.0"\n' for name in manifests),
+        encoding="utf-8",
+    )
+
+    res = run_bump_action(workspace, "rust", "patch")
+
+    assert res.returncode == 0, res.stderr
+    lock = (workspace / "Cargo.lock").read_text(encoding="utf-8")
+    assert 'name = "a"\nversion = "0.1.1"' in lock
+    assert 'name = "b"\nversion = "0.1.1"' in lock
+    assert 'name = "c"\nversion = "0.1.0"' in lock
+
+
+def test_integration_bad_sweep_pattern_bumps_nothing(workspace):
+    f = workspace / "VERSION"
+    f.write_text("1.0.0\n", encoding="utf-8")
+    env = _script_env(INPUT_MODE="text", INPUT_BUMP="patch", INPUT_SWEEP="*.md", INPUT_SWEEP_PATTERNS="tag: 1.0.0")
+
+    res = subprocess.run([sys.executable, BUMP_SCRIPT], cwd=workspace, env=env, capture_output=True, text=True)
+
+    assert res.returncode == 1
+    assert "has no {version} placeholder" in res.stderr
+    assert f.read_text(encoding="utf-8") == "1.0.0\n"
+
+
 def test_integration_maven_pom(workspace):
     f = workspace / "pom.xml"
     content = """<project>
@@ -83,6 +148,26 @@ def test_integration_maven_pom(workspace):
     assert "<version>1.0.1</version>" in f.read_text(encoding="utf-8")
 
 
+def test_integration_maven_reactor(workspace):
+    (workspace / "pom.xml").write_text(
+        "<project><groupId>g</groupId><artifactId>root</artifactId><version>1.0.0</version>"
+        "<modules><module>mod</module></modules></project>",
+        encoding="utf-8",
+    )
+    (workspace / "mod").mkdir()
+    (workspace / "mod/pom.xml").write_text(
+        "<project><parent><groupId>g</groupId><artifactId>root</artifactId><version>1.0.0</version></parent>"
+        "<artifactId>mod</artifactId></project>",
+        encoding="utf-8",
+    )
+
+    res = run_bump_action(workspace, "maven", "minor")
+
+    assert res.returncode == 0, res.stderr
+    assert "<version>1.1.0</version>" in (workspace / "pom.xml").read_text(encoding="utf-8")
+    assert "<version>1.1.0</version>" in (workspace / "mod/pom.xml").read_text(encoding="utf-8")
+
+
 def test_integration_gradle_properties(workspace):
     f = workspace / "gradle.properties"
     f.write_text("version=1.2.3", encoding="utf-8")
@@ -158,3 +243,61 @@ def test_integration_text_file(workspace):
     res = run_bump_action(workspace, "text", "patch")
     assert res.returncode == 0
     assert f.read_text(encoding="utf-8") == "1.2.4"
+
+
+def test_integration_multi_target(workspace):
+    (workspace / "Cargo.toml").write_text('[package]\nname = "a"\nversion = "1.4.0"\n', encoding="utf-8")
+    (workspace / "web").mkdir()
+    (workspace / "web/package.json").write_text('{"name": "web", "version": "1.4.0"}\n', encoding="utf-8")
+    (workspace / "charts/app").mkdir(parents=True)
+    (workspace / "charts/app/Chart.yaml").write_text("name: app\nversion: 1.4.0\nappVersion: x\n", encoding="utf-8")
+    (workspace / "VERSION").write_text("1.4.0\n", encoding="utf-8")
+    out = workspace / "out"
+
+    env_targets = "Cargo.toml\nweb/package.json\ncharts/*/Chart.yaml  # glob\ntext:VERSION\n"
+    res = subprocess.run(
+        [sys.executable, BUMP_SCRIPT],
+        cwd=workspace,
+        env=_script_env(INPUT_BUMP="minor", INPUT_TARGETS=env_targets, GITHUB_OUTPUT=str(out)),
+        capture_output=True,
+        text=True,
+    )
+
+    assert res.returncode == 0, res.stderr
+    assert 'version = "1.5.0"' in (workspace / "Cargo.toml").read_text(encoding="utf-8")
+    assert '"version": "1.5.0"' in (workspace / "web/package.json").read_text(encoding="utf-8")
+    assert "version: 1.5.0\n" in (workspace / "charts/app/Chart.yaml").read_text(encoding="utf-8")
+    assert (workspace / "VERSION").read_text(encoding="utf-8") == "1.5.0\n"
+    assert out.read_text(encoding="utf-8") == "old_version=1.4.0\nversion=1.5.0\nbump=minor\n"
+
+
+def test_integration_multi_target_disagreement_writes_nothing(workspace):
+    (workspace / "Cargo.toml").write_text('[package]\nversion = "1.4.0"\n', encoding="utf-8")
+    (workspace / "VERSION").write_text("1.3.0", encoding="utf-8")
+
+    res = run_bump_action(workspace, "go", "patch", targets="Cargo.toml\nVERSION")
+
+    assert res.returncode != 0
+    assert "disagree" in res.stderr
+    assert (workspace / "Cargo.toml").read_text(encoding="utf-8") == '[package]\nversion = "1.4.0"\n'
+    assert (workspace / "VERSION").read_text(encoding="utf-8") == "1.3.0"
+
+
+def _git(cwd, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args], cwd=cwd, check=True, capture_output=True
+    )
+
+
+def test_integration_auto_bump(workspace):
+    (workspace / "VERSION").write_text("1.2.3", encoding="utf-8")
+    _git(workspace, "init", "-q")
+    _git(workspace, "commit", "-q", "--allow-empty", "-m", "feat!: old breaking change before the tag")
+    _git(workspace, "tag", "v1.2.3")
+    _git(workspace, "commit", "-q", "--allow-empty", "-m", "fix(api): handle nulls")
+    _git(workspace, "commit", "-q", "--allow-empty", "-m", "feat: add export")
+
+    res = run_bump_action(workspace, "text", "auto")
+
+    assert res.returncode == 0, res.stderr
+    assert (workspace / "VERSION").read_text(encoding="utf-8") == "1.3.0"
@@ -55,6 +55,22 @@ def test_main_sets_github_output_on_success(tmp_path: Path) -> None:
     assert "Release 1.0.0" in content
 
 
+def test_main_large_body_only_as_file(tmp_path: Path) -> None:
+    """A body over the output size limit is not repeated in GITHUB_OUTPUT; body_file points at it."""
+    output_file = tmp_path / "out"
+    env = {
+        "GITHUB_WORKSPACE": str(tmp_path),
+        "INPUT_VERSION": "1.0.0",
+        "GITHUB_OUTPUT": str(output_file),
+    }
+    with patch.dict(os.environ, env, clear=False):
+        with patch.object(release_main, "run_notes", return_value="- change\n" * 10000):
+            with pytest.raises(SystemExit) as exc_info:
+                release_main.main()
+    assert exc_info.value.code == 0
+    assert output_file.read_text() == "prompt_tokens=0\nbody_file=release_notes.md\n"
+
+
 def test_main_exits_1_on_release_notes_error(tmp_path: Path) -> None:
     """When common.notes raises ReleaseNotesError, main exits 1."""
     from common.notes import ReleaseNotesError
@@ -69,3 +85,68 @@ def test_main_exits_1_on_release_notes_error(tmp_path: Path) -> None:
             with pytest.raises(SystemExit) as exc_info:
                 release_main.main()
     assert exc_info.value.code == 1
+
+
+def test_main_reports_prompt_size(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    """The prompt stats filled in by notes.run are logged and set as the prompt_tokens output."""
+    output_file = tmp_path / "out"
+    env = {
+        "GITHUB_WORKSPACE": str(tmp_path),
+        "INPUT_VERSION": "1.0.0",
+        "INPUT_PROMPT_BUDGET": "500",
+        "GITHUB_OUTPUT": str(output_file),
+    }
+
+    def fake_run(*args, stats, prompt_budget, **kwargs):
+        assert prompt_budget == 500
+        stats.update(commits=40, noise=6, lines=12, omitted=3, prompt_tokens=321)
+        return "Body"
+
+    with patch.dict(os.environ, env, clear=False), patch.object(release_main, "run_notes", side_effect=fake_run):
+        with pytest.raises(SystemExit) as exc_info:
+            release_main.main()
+    assert exc_info.value.code == 0
+    assert "prompt_tokens=321" in output_file.read_text()
+    assert "~321 tokens" in capsys.readouterr().err
+
+
+def test_main_backfill_writes_index_output(tmp_path: Path) -> None:
+    """With INPUT_BACKFILL, main backfills the last N tags instead of one release; version is not needed."""
+    output_file = tmp_path / "out"
+    env = {
+        "GITHUB_WORKSPACE": str(tmp_path),
+        "INPUT_VERSION": "",
+        "INPUT_BACKFILL": "5",
+        "INPUT_BACKFILL_JOBS": "2",
+        "GITHUB_OUTPUT": str(output_file),
+    }
+    with patch.dict(os.environ, env, clear=False):
+        with (
+            patch.object(release_main, "backfill_notes", return_value=[]) as backfill,
+            patch.object(release_main, "run_notes") as run_notes,
+        ):
+            with pytest.raises(SystemExit) as exc_info:
+                release_main.main()
+    assert exc_info.value.code == 0
+    run_notes.assert_not_called()
+    assert backfill.call_args.args == (tmp_path, tmp_path / "release-notes")
+    assert backfill.call_args.kwargs["limit"] == 5
+    assert backfill.call_args.kwargs["jobs"] == 2
+    assert "index_file=release-notes/index.json" in output_file.read_text()
+
+
+def test_main_draft_updates_the_draft(tmp_path: Path) -> None:
+    """With INPUT_DRAFT, main updates the draft notes; version defaults to Unreleased."""
+    env = {
+        "GITHUB_WORKSPACE": str(tmp_path),
+        "INPUT_VERSION": "",
+        "INPUT_DRAFT": "true",
+        "INPUT_BACKFILL": "",
+    }
+    with patch.dict(os.environ, env, clear=False):
+        with patch.object(release_main, "update_draft", return_value="Draft") as update_draft:
+            with pytest.raises(SystemExit) as exc_info:
+                release_main.main()
+    assert exc_info.value.code == 0
+    assert update_draft.call_args.args == (tmp_path, "Unreleased")
+    assert update_draft.call_args.kwargs["output_path"] == tmp_path / "release_notes.md"
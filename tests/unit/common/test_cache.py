@@ -0,0 +1,76 @@
+"""Unit tests for common.common.cache."""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from common.cache import ResponseCache, cache_key, latency_percentile, record_latency
+
+
+class TestCacheKey:
+    def test_parts_are_length_prefixed(self) -> None:
+        assert cache_key("ab", "c") != cache_key("a", "bc")
+        assert cache_key("a", "b") == cache_key("a", "b")
+
+
+class TestResponseCache:
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        cache = ResponseCache(tmp_path)
+        assert cache.get("ab12") is None
+        cache.put("ab12", "# Notes", model="m")
+        assert cache.get("ab12") == "# Notes"
+
+    def test_expired_entry_is_dropped(self, tmp_path: Path) -> None:
+        cache = ResponseCache(tmp_path, ttl=60)
+        cache.put("ab12", "old")
+        path = tmp_path / "ab" / "ab12.json"
+        path.write_text(path.read_text().replace('"created": ', '"created": 1000, "_": '))
+        assert cache.get("ab12") is None
+        assert not path.exists()
+
+    def test_lru_eviction_keeps_recently_used(self, tmp_path: Path) -> None:
+        cache = ResponseCache(tmp_path, max_bytes=10_000)
+        for i, key in enumerate(("aa01", "bb02", "cc03")):
+            cache.put(key, "x" * 3000)
+            past = time.time() - 100 + i
+            os.utime(tmp_path / key[:2] / f"{key}.json", (past, past))
+        assert cache.get("aa01") is not None  # hit refreshes the oldest entry
+
+        cache.put("dd04", "x" * 3000)
+
+        assert cache.get("bb02") is None
+        assert cache.get("aa01") is not None
+        assert cache.get("dd04") is not None
+
+
+class TestLatencyLog:
+    def test_percentile_needs_samples(self, tmp_path: Path) -> None:
+        for seconds in (1.0, 2.0, 3.0, 4.0):
+            record_latency(tmp_path, "anthropic/m", seconds)
+        assert latency_percentile(tmp_path, "anthropic/m", 90) is None
+        for seconds in range(5, 11):
+            record_latency(tmp_path, "anthropic/m", float(seconds))
+        assert latency_percentile(tmp_path, "anthropic/m", 90) == 9.0
+        assert latency_percentile(tmp_path, "openai/m", 90) is None
+
+    def test_keeps_last_samples(self, tmp_path: Path) -> None:
+        for seconds in range(10):
+            record_latency(tmp_path, "x", float(seconds), keep=3)
+        assert latency_percentile(tmp_path, "x", 100, min_samples=1) == 9.0
+        assert latency_percentile(tmp_path, "x", 1, min_samples=1) == 7.0
+
+    def test_concurrent_recorders_keep_every_sample(self, tmp_path: Path) -> None:
+        def record(n: int) -> None:
+            for i in range(20):
+                record_latency(tmp_path, f"p{n % 2}/m", float(i), keep=1000)
+
+        threads = [threading.Thread(target=record, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        samples = json.loads((tmp_path / "latency.json").read_text(encoding="utf-8"))
+        assert {name: len(values) for name, values in samples.items()} == {"p0/m": 80, "p1/m": 80}
+        assert [p.name for p in tmp_path.iterdir()] == ["latency.json"]
@@ -0,0 +1,110 @@
+"""Unit tests for common.common.conventional."""
+
+from common.conventional import (
+    bullet,
+    classify_commits,
+    drop_revert_pairs,
+    offline_summary,
+    parse_commit,
+    prefill,
+    split_sections,
+)
+from common.notes import DEFAULT_TEMPLATE
+
+
+class TestParseCommit:
+    """Tests for parse_commit."""
+
+    def test_type_scope_and_description(self) -> None:
+        parsed = parse_commit("feat(api): add pagination")
+        assert parsed == {
+            "type": "feat",
+            "scope": "api",
+            "breaking": False,
+            "description": "add pagination",
+            "subject": "feat(api): add pagination",
+        }
+
+    def test_bang_marks_breaking(self) -> None:
+        assert parse_commit("refactor!: drop python 3.10")["breaking"] is True
+
+    def test_footer_marks_breaking(self) -> None:
+        parsed = parse_commit("fix: rename flag\n\nBREAKING CHANGE: --old is gone")
+        assert parsed["breaking"] is True
+        assert parsed["scope"] is None
+
+    def test_not_conventional(self) -> None:
+        assert parse_commit("Update README") is None
+        assert parse_commit("wip: half done") is None
+        assert parse_commit("Merge branch 'main' into topic") is None
+
+
+class TestDropRevertPairs:
+    """Tests for drop_revert_pairs."""
+
+    def test_git_revert_cancels_its_commit(self) -> None:
+        messages = ['Revert "feat: risky"', "fix: other", "feat: risky"]
+        assert drop_revert_pairs(messages) == ["fix: other"]
+
+    def test_conventional_revert_cancels_its_commit(self) -> None:
+        assert drop_revert_pairs(["revert: feat: risky", "feat: risky"]) == []
+
+    def test_revert_of_earlier_release_is_kept(self) -> None:
+        assert drop_revert_pairs(['Revert "feat: shipped last time"']) == ['Revert "feat: shipped last time"']
+
+    def test_only_one_occurrence_is_cancelled(self) -> None:
+        assert drop_revert_pairs(['Revert "fix: x"', "fix: x", "fix: x"]) == ["fix: x"]
+
+
+class TestClassifyCommits:
+    """Tests for classify_commits."""
+
+    def test_sorts_into_sections(self) -> None:
+        sections, unclassified = classify_commits(
+            ["feat: a", "fix(cli): b", "docs: c", "Tidy things up", "chore: d", "feat: a"]
+        )
+        assert [c["description"] for c in sections["Features"]] == ["a"]
+        assert [c["description"] for c in sections["Fixes"]] == ["b"]
+        assert [c["description"] for c in sections["Other"]] == ["c", "d"]
+        assert unclassified == ["Tidy things up"]
+
+    def test_unpaired_git_revert_is_unclassified(self) -> None:
+        _sections, unclassified = classify_commits(['Revert "feat: old"'])
+        assert unclassified == ['Revert "feat: old"']
+
+
+class TestRendering:
+    """Tests for bullet, offline_summary, split_sections and prefill."""
+
+    def test_bullet(self) -> None:
+        assert bullet(parse_commit("feat(api)!: new auth")) == "- **Breaking:** **api:** new auth"
+        assert bullet(parse_commit("fix: typo")) == "- typo"
+
+    def test_offline_summary(self) -> None:
+        sections, unclassified = classify_commits(["feat!: a", "feat: b", "fix: c", "Misc"])
+        assert offline_summary(sections, unclassified) == (
+            "This release has 2 new features, 1 fix and 1 other change, including 1 breaking change."
+        )
+
+    def test_offline_summary_without_changes(self) -> None:
+        sections, unclassified = classify_commits([])
+        assert offline_summary(sections, unclassified) == "This release has no changes."
+
+    def test_split_sections(self) -> None:
+        summary, sections = split_sections("Big release.\n\n### Fixes\n- one\n* two\n\n### Other\n- three\n")
+        assert summary == "Big release."
+        assert sections == {"Fixes": ["- one", "- two"], "Other": ["- three"]}
+
+    def test_prefill_default_template(self) -> None:
+        body = prefill(
+            DEFAULT_TEMPLATE.replace("{{VERSION}}", "1.2.0"),
+            {"Summary": ["Short summary."], "Features": ["- a"], "Fixes": [], "Other": ["- b"]},
+        )
+        assert body.startswith("# Release v1.2.0\n\n## Summary\nShort summary.\n\n## Changes\n\n### Features\n- a\n")
+        assert "### Fixes" not in body
+        assert "### Other\n- b\n\n---" in body
+        assert "[" not in body
+
+    def test_prefill_appends_missing_sections(self) -> None:
+        body = prefill("# Notes\n\n### Features\n- [features]", {"Features": ["- a"], "Fixes": ["- b"]})
+        assert body == "# Notes\n\n### Features\n- a\n\n### Fixes\n- b"
@@ -0,0 +1,94 @@
+"""Unit tests for common.common.gha."""
+
+import io
+import re
+from pathlib import Path
+
+import pytest
+
+from common.gha import ActionIO, format_entry
+
+
+def _heredoc(text: str, name: str) -> str:
+    m = re.search(rf"^{re.escape(name)}<<(\S+)\n(.*?)\n\1\n", text, re.MULTILINE | re.DOTALL)
+    assert m, text
+    return m.group(2)
+
+
+class TestFormatEntry:
+    """Tests for format_entry."""
+
+    def test_single_line(self) -> None:
+        assert format_entry("version", "1.2.3") == "version=1.2.3\n"
+        assert format_entry("count", 3) == "count=3\n"
+
+    def test_multi_line_value_containing_eof(self) -> None:
+        value = "line one\nEOF\nline three"
+        entry = format_entry("body", value)
+        assert entry.startswith("body<<ghadelimiter_")
+        assert _heredoc(entry, "body") == value
+
+    @pytest.mark.parametrize("name", ["", "a=b", "a\nb", " a"])
+    def test_invalid_name(self, name: str) -> None:
+        with pytest.raises(ValueError, match="Invalid"):
+            format_entry(name, "x")
+
+
+class TestActionIO:
+    """Tests for ActionIO."""
+
+    def test_flush_writes_each_file_once(self, tmp_path: Path) -> None:
+        output, env = tmp_path / "output", tmp_path / "env"
+        output.write_text("earlier=1\n")
+        with ActionIO(output, env) as gha:
+            gha.output("a", "1")
+            gha.output("b", "x\ny")
+            gha.output("a", "2")
+            gha.env("TOKEN", "secret")
+            assert output.read_text() == "earlier=1\n"
+        text = output.read_text()
+        assert text.startswith("earlier=1\na=2\nb<<")
+        assert _heredoc(text, "b") == "x\ny"
+        assert env.read_text() == "TOKEN=secret\n"
+
+    def test_no_flush_when_block_raises(self, tmp_path: Path) -> None:
+        output, env = tmp_path / "output", tmp_path / "env"
+        with pytest.raises(SystemExit), ActionIO(output, env) as gha:
+            gha.output("status", "partial")
+            gha.env("TOKEN", "secret")
+            raise SystemExit(1)
+        with pytest.raises(RuntimeError), ActionIO(output, env) as gha:
+            gha.output("status", "partial")
+            raise RuntimeError("step failed")
+        assert not output.exists()
+        assert not env.exists()
+
+    def test_fallback_stream_without_paths(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+        stream = io.StringIO()
+        with ActionIO(fallback=stream) as gha:
+            gha.output("a", "1")
+        assert stream.getvalue() == "a=1\n"
+
+    def test_small_body_is_output(self, tmp_path: Path) -> None:
+        output = tmp_path / "output"
+        with ActionIO(output, spill_dir=tmp_path) as gha:
+            assert gha.body("body", "short\nnotes") is None
+        assert _heredoc(output.read_text(), "body") == "short\nnotes"
+        assert not (tmp_path / "body.txt").exists()
+
+    def test_large_body_spills_to_file(self, tmp_path: Path) -> None:
+        output = tmp_path / "output"
+        value = "x" * 20 + "\n" + "y" * 20
+        with ActionIO(output, spill_bytes=16, spill_dir=tmp_path / "spill") as gha:
+            path = gha.body("body", value)
+        assert path == str(tmp_path / "spill" / "body.txt")
+        assert Path(path).read_text() == value
+        assert output.read_text() == f"body_file={path}\n"
+
+    def test_body_already_in_file(self, tmp_path: Path) -> None:
+        output = tmp_path / "output"
+        with ActionIO(output, spill_bytes=16) as gha:
+            gha.body("small", "fits", path="small.md")
+            gha.body("large", "z" * 32, path="large.md")
+        assert output.read_text() == "small=fits\nsmall_file=small.md\nlarge_file=large.md\n"
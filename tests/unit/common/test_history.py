@@ -0,0 +1,190 @@
+"""Unit tests for common.common.history."""
+
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from common.history import (
+    HistoryError,
+    fetch_range,
+    find_previous_tag,
+    is_shallow,
+    list_tags,
+    main,
+    prepare_range,
+    previous_tag,
+)
+from common.notes import _base_ref, run
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def _commit(cwd: Path, message: str) -> None:
+    (cwd / "file.txt").write_text(message)
+    _git(cwd, "add", "-A")
+    _git(cwd, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def origin(tmp_path: Path) -> Path:
+    """Repository with c1 (v1.0.0, annotated), c2, c3 (v1.1.0), c4, c5; serves blobless and shallow fetches."""
+    repo = tmp_path / "origin"
+    repo.mkdir()
+    _git(repo, "init", "-q")
+    for key, value in (
+        ("user.email", "dev@example.com"),
+        ("user.name", "Dev"),
+        ("commit.gpgsign", "false"),
+        ("uploadpack.allowFilter", "true"),
+        ("uploadpack.allowAnySHA1InWant", "true"),
+    ):
+        _git(repo, "config", key, value)
+    for n in range(1, 6):
+        _commit(repo, f"c{n}")
+        if n == 1:
+            _git(repo, "tag", "-a", "v1.0.0", "-m", "v1.0.0")
+        elif n == 3:
+            _git(repo, "tag", "v1.1.0")
+    return repo
+
+
+@pytest.fixture
+def hotfix(origin: Path) -> Path:
+    """origin plus release/1.1 (h1, h2 on top of v1.1.0) and v2.0.0 on main's c5, which release/1.1 lacks."""
+    _git(origin, "tag", "v2.0.0")
+    _git(origin, "checkout", "-q", "-b", "release/1.1", "v1.1.0")
+    _commit(origin, "h1")
+    _commit(origin, "h2")
+    return origin
+
+
+@pytest.fixture
+def shallow(origin: Path, tmp_path: Path) -> Path:
+    """Depth-1 clone of origin, as actions/checkout makes by default."""
+    clone = tmp_path / "clone"
+    _git(tmp_path, "clone", "-q", "--depth=1", "--no-tags", f"file://{origin}", str(clone))
+    return clone
+
+
+def _subjects(cwd: Path, *args: str) -> list[str]:
+    return _git(cwd, "log", "--format=%s", *args).split()
+
+
+class TestListTags:
+    """Tests for list_tags and previous_tag."""
+
+    def test_remote_tags_are_peeled_and_version_sorted(self, origin: Path, shallow: Path) -> None:
+        tags = list_tags(shallow, "origin")
+        assert [tag for tag, _sha in tags] == ["v1.1.0", "v1.0.0"]
+        assert dict(tags)["v1.0.0"] == _git(origin, "rev-parse", "v1.0.0^{commit}").strip()
+
+    def test_local_tags_match_remote(self, origin: Path) -> None:
+        assert list_tags(origin) == list_tags(origin, str(origin))
+
+    def test_previous_tag(self) -> None:
+        tags = [("v1.10.0", "c"), ("v1.9.0", "b"), ("v1.0.0", "a")]
+        assert previous_tag(tags, "d") == "v1.10.0"
+        assert previous_tag(tags, "c") == "v1.9.0"
+        assert previous_tag(tags, "c", include_head=True) == "v1.10.0"
+        assert previous_tag([("v1.0.0", "a")], "a") is None
+        assert previous_tag([], "a") is None
+
+    def test_local_tags_merged_into_head(self, origin: Path) -> None:
+        _git(origin, "checkout", "-q", "v1.1.0")
+        assert [tag for tag, _sha in list_tags(origin, merged="HEAD")] == ["v1.1.0", "v1.0.0"]
+
+
+class TestFetch:
+    """Tests for prepare_range and fetch_range in a shallow clone."""
+
+    def test_is_shallow(self, origin: Path, shallow: Path, tmp_path: Path) -> None:
+        assert is_shallow(shallow) is True
+        assert is_shallow(origin) is False
+        assert is_shallow(tmp_path) is False
+
+    def test_fetches_only_commits_since_previous_tag(self, shallow: Path) -> None:
+        assert prepare_range(shallow) == "v1.1.0"
+        assert _subjects(shallow, "v1.1.0..HEAD") == ["c5", "c4"]
+        assert _subjects(shallow, "HEAD") == ["c5", "c4"]  # nothing before the tag is fetched
+        assert is_shallow(shallow) is True
+
+    def test_since_tag(self, shallow: Path) -> None:
+        assert prepare_range(shallow, "v1.0.0") == "v1.0.0"
+        assert _subjects(shallow, "v1.0.0..HEAD") == ["c5", "c4", "c3", "c2"]
+
+    def test_tag_already_present_is_not_refetched(self, shallow: Path) -> None:
+        head = _git(shallow, "rev-parse", "HEAD").strip()
+        assert fetch_range(shallow, "v1.1.0", head) is True
+        assert fetch_range(shallow, "v1.1.0", head) is False
+
+    def test_unknown_base_fetches_full_history(self, shallow: Path) -> None:
+        assert prepare_range(shallow, "v0.0.0") == "v0.0.0"
+        assert is_shallow(shallow) is False
+        assert _subjects(shallow, "HEAD") == ["c5", "c4", "c3", "c2", "c1"]
+
+    def test_tag_without_the_commits_before_head_is_refetched(self, shallow: Path) -> None:
+        # Like a tag-push checkout: the tag is here, the commits between it and HEAD are not.
+        _git(shallow, "fetch", "-q", "--depth=1", "origin", "+refs/tags/v1.1.0:refs/tags/v1.1.0")
+        assert _subjects(shallow, "v1.1.0..HEAD") == ["c5"]
+        assert prepare_range(shallow) == "v1.1.0"
+        assert _subjects(shallow, "v1.1.0..HEAD") == ["c5", "c4"]
+
+    def test_newer_tag_outside_head_history_is_skipped(self, hotfix: Path, tmp_path: Path) -> None:
+        clone = tmp_path / "hotfix-clone"
+        _git(tmp_path, "clone", "-q", "--depth=1", "--no-tags", "-b", "release/1.1", f"file://{hotfix}", str(clone))
+        assert prepare_range(clone) == "v1.1.0"
+        assert _subjects(clone, "v1.1.0..HEAD") == ["h2", "h1"]
+
+    def test_git_failure_raises(self, shallow: Path) -> None:
+        with pytest.raises(HistoryError, match="ls-remote"):
+            prepare_range(shallow, remote="missing")
+
+
+class TestMain:
+    """Tests for the previous-tag entry point and the release notes integration."""
+
+    def test_writes_tag_output(self, shallow: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        output = tmp_path / "output"
+        monkeypatch.chdir(shallow)
+        monkeypatch.setenv("GITHUB_OUTPUT", str(output))
+        assert main([]) == 0
+        assert output.read_text() == "tag=v1.1.0\n"
+
+    def test_tagged_head_in_full_clone(self, origin: Path) -> None:
+        _git(origin, "tag", "v1.2.0")
+        assert find_previous_tag(origin) == "v1.1.0"
+
+    def test_newer_tag_outside_head_history_in_full_clone(self, hotfix: Path) -> None:
+        assert find_previous_tag(hotfix) == "v1.1.0"
+
+    def test_fallback_without_tags(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        repo = tmp_path / "untagged"
+        repo.mkdir()
+        _git(repo, "init", "-q")
+        _git(repo, "config", "user.email", "dev@example.com")
+        _git(repo, "config", "user.name", "Dev")
+        _commit(repo, "c1")
+        output = tmp_path / "output"
+        monkeypatch.chdir(repo)
+        monkeypatch.setenv("GITHUB_OUTPUT", str(output))
+        assert main(["--fallback", "v0.0.0"]) == 0
+        assert output.read_text() == "tag=v0.0.0\n"
+
+    def test_release_notes_from_shallow_clone(self, shallow: Path) -> None:
+        body = run(shallow, "1.2.0", mode="offline", output_path=shallow / "notes.md")
+        assert "c5" in body and "c4" in body
+        assert "c3" not in body
+
+    def test_same_base_in_full_and_shallow_clones(self, origin: Path, tmp_path: Path) -> None:
+        _git(origin, "tag", "v1.2.0")  # HEAD's own tag counts, whatever the clone depth
+        clone = tmp_path / "tagged-clone"
+        _git(tmp_path, "clone", "-q", "--depth=1", "--no-tags", f"file://{origin}", str(clone))
+        assert _base_ref(origin, None) == _base_ref(clone, None) == "v1.2.0"
+        _git(origin, "tag", "-d", "v1.2.0")
+        _commit(origin, "c6")
+        untagged = tmp_path / "untagged-clone"
+        _git(tmp_path, "clone", "-q", "--depth=1", "--no-tags", f"file://{origin}", str(untagged))
+        assert _base_ref(origin, None) == _base_ref(untagged, None) == "v1.1.0"
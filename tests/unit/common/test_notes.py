@@ -1,68 +1,175 @@
 """Unit tests for common.common.notes."""
 
+import json
+import re
 import subprocess
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
 from common.notes import (
     DEFAULT_TEMPLATE,
+    HYBRID_SYSTEM_PROMPT,
+    MAP_SYSTEM_PROMPT,
+    REDUCE_SYSTEM_PROMPT,
+    ProviderError,
     ReleaseNotesError,
+    _CancelledError,
+    _map_reduce,
+    _request_anthropic,
+    backfill,
+    chunk_commits,
+    compact_commits,
+    enrich_commits,
+    estimate_tokens,
+    fetch_pull_requests,
+    generate_notes,
     get_commits_since,
     get_previous_tag,
+    iter_commits,
     load_template,
     run,
+    tag_ranges,
+    update_draft,
 )
 
 
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+def _commit(cwd: Path, message: str, files: dict[str, str] | None = None) -> None:
+    for name, content in (files or {"file.txt": message}).items():
+        (cwd / name).write_text(content)
+    _git(cwd, "add", "-A")
+    _git(cwd, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def git_repo(repo_root: Path) -> Path:
+    """repo_root initialised as a git repository with a committer identity."""
+    _git(repo_root, "init", "-q")
+    _git(repo_root, "config", "user.email", "dev@example.com")
+    _git(repo_root, "config", "user.name", "Dev")
+    _git(repo_root, "config", "commit.gpgsign", "false")
+    return repo_root
+
+
 class TestGetPreviousTag:
     """Tests for get_previous_tag."""
 
-    def test_returns_tag_when_found(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.return_value = MagicMock(stdout="v1.0.0\n", stderr="", returncode=0)
-            result = get_previous_tag(repo_root)
-        assert result == "v1.0.0"
+    def test_returns_nearest_tag(self, git_repo: Path) -> None:
+        _commit(git_repo, "feat: first")
+        _git(git_repo, "tag", "v1.0.0")
+        _commit(git_repo, "feat: second")
+        _git(git_repo, "tag", "v1.1.0")
+        _commit(git_repo, "fix: third")
+        assert get_previous_tag(git_repo) == "v1.1.0"
+
+    def test_returns_tag_on_head(self, git_repo: Path) -> None:
+        _commit(git_repo, "feat: first")
+        _git(git_repo, "tag", "v2.0.0")
+        assert get_previous_tag(git_repo) == "v2.0.0"
 
-    def test_returns_none_when_no_tag(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.side_effect = subprocess.CalledProcessError(128, "git", stderr="No names found")
-            result = get_previous_tag(repo_root)
-        assert result is None
+    def test_returns_none_when_no_tag(self, git_repo: Path) -> None:
+        _commit(git_repo, "feat: first")
+        assert get_previous_tag(git_repo) is None
 
-    def test_strips_whitespace(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.return_value = MagicMock(stdout="  v2.0.0  \n", stderr="", returncode=0)
-            result = get_previous_tag(repo_root)
-        assert result == "v2.0.0"
+    def test_returns_none_without_commits(self, git_repo: Path) -> None:
+        assert get_previous_tag(git_repo) is None
 
 
 class TestGetCommitsSince:
     """Tests for get_commits_since."""
 
-    def test_returns_commit_subjects(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.return_value = MagicMock(
-                stdout="feat: add x\nfix: y\n",
-                stderr="",
-                returncode=0,
-            )
-            result = get_commits_since(repo_root, "v1.0.0")
-        assert result == ["feat: add x", "fix: y"]
-
-    def test_returns_empty_list_when_no_commits(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.return_value = MagicMock(stdout="\n", stderr="", returncode=0)
-            result = get_commits_since(repo_root, "v1.0.0")
-        assert result == []
-
-    def test_raises_on_invalid_ref(self, repo_root: Path) -> None:
-        with patch("common.notes.subprocess.run") as run_mock:
-            run_mock.side_effect = subprocess.CalledProcessError(128, "git", stderr="fatal: bad ref")
-            with pytest.raises(ReleaseNotesError) as exc_info:
-                get_commits_since(repo_root, "badref")
-        assert "badref" in str(exc_info.value) or "Invalid" in str(exc_info.value)
+    def test_returns_commit_subjects(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v1.0.0")
+        _commit(git_repo, "feat: add x")
+        _commit(git_repo, "fix: y")
+        assert get_commits_since(git_repo, "v1.0.0") == ["fix: y", "feat: add x"]
+
+    def test_returns_empty_list_when_no_commits(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v1.0.0")
+        assert get_commits_since(git_repo, "v1.0.0") == []
+
+    def test_raises_on_invalid_ref(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        with pytest.raises(ReleaseNotesError) as exc_info:
+            get_commits_since(git_repo, "badref")
+        assert "badref" in str(exc_info.value)
+
+    def test_v0_0_0_falls_back_to_whole_history(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        _commit(git_repo, "feat: add x")
+        assert get_commits_since(git_repo, "v0.0.0") == ["feat: add x", "chore: init"]
+
+    def test_v0_0_0_excluded_when_tagged(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v0.0.0")
+        _commit(git_repo, "feat: add x")
+        assert get_commits_since(git_repo, "v0.0.0") == ["feat: add x"]
+
+    def test_subject_joins_first_paragraph(self, git_repo: Path) -> None:
+        _commit(git_repo, "feat: wrapped\nsubject\n\nbody")
+        assert get_commits_since(git_repo, "v0.0.0") == ["feat: wrapped subject"]
+
+
+class TestIterCommits:
+    """Tests for iter_commits."""
+
+    def test_yields_structured_records(self, git_repo: Path) -> None:
+        _commit(git_repo, "feat: one\n\nLonger body.\n\nCloses: #12\nSigned-off-by: Dev <dev@example.com>")
+        _git(git_repo, "tag", "v1.0.0")
+        (commit,) = list(iter_commits(git_repo))
+        assert len(commit["sha"]) == 40
+        assert commit["author"] == "Dev"
+        assert commit["email"] == "dev@example.com"
+        assert commit["subject"] == "feat: one"
+        assert commit["body"].startswith("Longer body.")
+        assert commit["trailers"] == [("Closes", "#12"), ("Signed-off-by", "Dev <dev@example.com>")]
+        assert commit["tags"] == ["v1.0.0"]
+        assert "files" not in commit
+
+    def test_numstat_lists_files_and_renames(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init", {"a.txt": "one\ntwo\n"})
+        _git(git_repo, "mv", "a.txt", "b.txt")
+        _commit(git_repo, "refactor: rename", {"c.txt": "x\n"})
+        latest, first = iter_commits(git_repo, numstat=True)
+        assert first["files"] == [{"path": "a.txt", "added": 2, "deleted": 0}]
+        assert sorted(latest["files"], key=lambda f: f["path"]) == [
+            {"path": "b.txt", "added": 0, "deleted": 0, "old_path": "a.txt"},
+            {"path": "c.txt", "added": 1, "deleted": 0},
+        ]
+
+    def test_records_spanning_chunks(self, git_repo: Path) -> None:
+        for i in range(30):
+            _commit(git_repo, f"fix: change {i}\n\n" + "x" * 5000)
+        with patch("common.notes._LOG_CHUNK", 1024):
+            subjects = [c["subject"] for c in iter_commits(git_repo)]
+        assert subjects == [f"fix: change {i}" for i in reversed(range(30))]
+
+    def test_stopping_early_stops_git(self, git_repo: Path) -> None:
+        _commit(git_repo, "chore: init")
+        _commit(git_repo, "feat: add x")
+        procs = []
+        popen = subprocess.Popen
+
+        def spawn(*args, **kwargs):
+            procs.append(popen(*args, **kwargs))
+            return procs[-1]
+
+        with patch("common.notes.subprocess.Popen", side_effect=spawn):
+            commits = iter_commits(git_repo, "v0.0.0")
+            assert next(commits)["subject"] == "feat: add x"
+            commits.close()
+        assert len(procs) == 1
+        assert procs[0].returncode is not None
 
 
 class TestLoadTemplate:
@@ -85,6 +192,49 @@ class TestLoadTemplate:
         assert "{{VERSION}}" in result
 
 
+class TestChunkCommits:
+    """Tests for chunk_commits."""
+
+    def test_batches_stay_within_budget_and_keep_order(self) -> None:
+        commits = [f"feat: change number {i:04d}" for i in range(100)]
+        batches = chunk_commits(commits, 50)
+        assert [c for b in batches for c in b] == commits
+        assert all(sum(len(c) // 4 + 1 for c in b) <= 50 for b in batches)
+        assert len(batches) > 1
+
+    def test_oversized_commit_gets_own_batch(self) -> None:
+        assert chunk_commits(["x" * 1000, "fix: y"], 10) == [["x" * 1000], ["fix: y"]]
+
+
+class TestCompactCommits:
+    """Tests for compact_commits."""
+
+    def test_drops_bot_and_merge_commits(self) -> None:
+        commits = [
+            "Merge pull request #12 from org/topic",
+            "build(deps): bump requests from 2.31.0 to 2.32.0",
+            "Bump lodash from 4.17.20 to 4.17.21",
+            "chore(deps): update dependency ruff to v0.6.0",
+            "Update actions/checkout action to v4",
+            "feat: real change",
+        ]
+        lines, stats = compact_commits(commits)
+        assert lines == ["feat: real change"]
+        assert stats == {"commits": 6, "noise": 5, "lines": 1, "omitted": 0}
+
+    def test_collapses_duplicates_and_groups_scopes(self) -> None:
+        commits = ["fix: typo", "feat(api): add paging", "fix: typo", "feat(api): add filters", "feat(api)!: drop v1"]
+        lines, _stats = compact_commits(commits)
+        assert lines == ["fix: typo (x2)", "feat(api): add paging; add filters", "feat(api)!: drop v1"]
+
+    def test_truncates_to_budget(self) -> None:
+        commits = [f"fix: issue number {i}" for i in range(100)]
+        lines, stats = compact_commits(commits, budget_tokens=50)
+        assert lines[-1] == f"+{stats['omitted']} more"
+        assert len(lines) - 1 + stats["omitted"] == 100
+        assert sum(estimate_tokens(line) for line in lines[:-1]) <= 50
+
+
 class TestRun:
     """Tests for run() - release notes generation."""
 
@@ -169,3 +319,607 @@ class TestRun:
         format_instructions = call_args[0][1]
         assert "2.0.0" in format_instructions
         assert "Release v2.0.0" in format_instructions or "v2.0.0" in format_instructions
+
+    def test_cache_serves_repeat_runs(self, repo_root: Path) -> None:
+        cache_dir = repo_root / "cache"
+        with patch("common.notes.get_previous_tag", return_value="v0.9.0"):
+            with patch("common.notes.get_commits_since", return_value=["feat: x"]):
+                with patch("common.notes._call_anthropic", return_value="Body") as call_mock:
+                    first = run(repo_root, "1.0.0", provider="anthropic", cache_dir=cache_dir)
+                    second = run(repo_root, "1.0.0", provider="anthropic", cache_dir=cache_dir)
+                    run(repo_root, "1.0.0", provider="anthropic", cache_dir=cache_dir, model="other")
+                    run(repo_root, "1.0.0", provider="anthropic", cache_dir=cache_dir, cache_bypass=True)
+        assert first == second == "Body"
+        assert call_mock.call_count == 3
+
+    def test_prompt_is_compacted_and_reported(self, repo_root: Path) -> None:
+        commits = ["Merge branch 'main' into topic", "fix: typo", "fix: typo", "feat: x"]
+        stats: dict = {}
+        with patch("common.notes.get_previous_tag", return_value="v0.9.0"):
+            with patch("common.notes.get_commits_since", return_value=commits):
+                with patch("common.notes._call_anthropic", return_value="Body") as call_mock:
+                    run(repo_root, "1.0.0", provider="anthropic", prompt_budget=1000, stats=stats)
+        assert call_mock.call_args.args[0] == ["fix: typo (x2)", "feat: x"]
+        assert stats["noise"] == 1
+        assert stats["prompt_tokens"] > 0
+
+    def test_map_reduce_for_large_ranges(self, repo_root: Path) -> None:
+        commits = [f"fix: issue {i}" for i in range(300)]
+        calls = []
+
+        def fake_request(system, user_content, model, max_tokens=2048):
+            calls.append(system)
+            return "### Fixes\n- stuff" if system == MAP_SYSTEM_PROMPT else "# Release v1.0.0\n\nMerged."
+
+        with patch("common.notes.get_previous_tag", return_value="v0.0.0"):
+            with patch("common.notes.get_commits_since", return_value=commits):
+                with patch("common.notes._request_anthropic", side_effect=fake_request):
+                    body = run(repo_root, "1.0.0", provider="anthropic", chunk_tokens=500)
+        assert body == "# Release v1.0.0\n\nMerged."
+        assert calls.count(MAP_SYSTEM_PROMPT) == len(chunk_commits(commits, 500)) > 1
+        assert calls[-1] == REDUCE_SYSTEM_PROMPT
+
+
+class TestModes:
+    """Tests for run() in hybrid and offline modes (local conventional-commit classification)."""
+
+    @pytest.fixture
+    def history(self, git_repo: Path) -> Path:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v1.0.0")
+        _commit(git_repo, "feat(api): add pagination")
+        _commit(git_repo, "fix: handle empty pages")
+        _commit(git_repo, "feat: risky thing")
+        _git(git_repo, "revert", "--no-edit", "HEAD")
+        _commit(git_repo, "Tidy up the build scripts")
+        return git_repo
+
+    def test_offline_needs_no_provider(self, history: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.delenv("ANTHROPIC_API_KEY", raising=False)
+        out = history / "notes.md"
+        with patch("common.notes._request_anthropic") as request:
+            body = run(history, "1.1.0", mode="offline", output_path=out)
+        request.assert_not_called()
+        assert "This release has 1 new feature, 1 fix and 1 other change." in body
+        assert "### Features\n- **api:** add pagination" in body
+        assert "### Fixes\n- handle empty pages" in body
+        assert "### Other\n- Tidy up the build scripts" in body
+        assert "risky" not in body
+        assert out.read_text() == body
+
+    def test_hybrid_sends_only_summary_and_unparsed_commits(self, history: Path) -> None:
+        completion = "A small release.\n\n### Other\n- Tidied the build scripts"
+        with patch("common.notes._request_anthropic", return_value=completion) as request:
+            body = run(history, "1.1.0", mode="hybrid", provider="anthropic")
+        system, user_content, _model = request.call_args.args
+        assert system == HYBRID_SYSTEM_PROMPT
+        assert "Tidy up the build scripts" in user_content
+        assert "fix: handle empty pages" not in user_content
+        assert "risky" not in user_content
+        assert "## Summary\nA small release." in body
+        assert "### Fixes\n- handle empty pages" in body
+        assert "### Other\n- Tidied the build scripts" in body
+
+    def test_hybrid_response_is_cached(self, history: Path, tmp_path: Path) -> None:
+        cache_dir = tmp_path / "cache"
+        with patch("common.notes._request_anthropic", return_value="Summary.") as request:
+            first = run(history, "1.1.0", mode="hybrid", provider="anthropic", cache_dir=cache_dir)
+            second = run(history, "1.1.0", mode="hybrid", provider="anthropic", cache_dir=cache_dir)
+        assert first == second
+        assert request.call_count == 1
+
+    def test_raises_on_invalid_mode(self, repo_root: Path) -> None:
+        with pytest.raises(ReleaseNotesError, match="mode"):
+            run(repo_root, "1.0.0", since_tag="v1.0.0", mode="magic")
+
+
+class TestBackfill:
+    """Tests for tag_ranges and backfill."""
+
+    @pytest.fixture
+    def tagged(self, git_repo: Path) -> Path:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v0.1.0")
+        _commit(git_repo, "feat: a")
+        _commit(git_repo, "fix: b")
+        _git(git_repo, "tag", "v0.2.0")
+        _commit(git_repo, "feat(api): c")
+        _git(git_repo, "tag", "release/v0.3.0")
+        _commit(git_repo, "docs: unreleased")
+        return git_repo
+
+    def test_tag_ranges(self, tagged: Path) -> None:
+        ranges = tag_ranges(tagged)
+        assert [(r["tag"], r["since"]) for r in ranges] == [
+            ("release/v0.3.0", "v0.2.0"),
+            ("v0.2.0", "v0.1.0"),
+            ("v0.1.0", None),
+        ]
+        assert [[c["subject"] for c in r["commits"]] for r in ranges] == [
+            ["feat(api): c"],
+            ["fix: b", "feat: a"],
+            ["chore: init"],
+        ]
+
+    def test_tag_ranges_limit_stops_the_walk(self, tagged: Path) -> None:
+        ranges = tag_ranges(tagged, limit=1)
+        assert [(r["tag"], r["since"]) for r in ranges] == [("release/v0.3.0", "v0.2.0")]
+
+    def test_tag_ranges_follow_merges(self, git_repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        def commit_at(day: int, message: str, files: dict[str, str] | None = None) -> None:
+            monkeypatch.setenv("GIT_AUTHOR_DATE", f"2026-01-{day:02d}T12:00:00Z")
+            monkeypatch.setenv("GIT_COMMITTER_DATE", f"2026-01-{day:02d}T12:00:00Z")
+            _commit(git_repo, message, files)
+
+        commit_at(1, "chore: init")
+        _git(git_repo, "branch", "topic")
+        commit_at(3, "fix: a")
+        _git(git_repo, "tag", "v0.1.0")
+        _git(git_repo, "checkout", "-q", "topic")
+        commit_at(2, "feat: topic", {"topic.txt": "t"})  # older than v0.1.0, merged after it
+        _git(git_repo, "checkout", "-q", "-")
+        monkeypatch.setenv("GIT_COMMITTER_DATE", "2026-01-04T12:00:00Z")
+        _git(git_repo, "merge", "-q", "--no-ff", "-m", "Merge branch topic", "topic")
+        commit_at(5, "fix: b")
+        _git(git_repo, "tag", "v0.2.0")
+
+        ranges = tag_ranges(git_repo)
+        assert [(r["tag"], r["since"]) for r in ranges] == [("v0.2.0", "v0.1.0"), ("v0.1.0", None)]
+        assert [sorted(c["subject"] for c in r["commits"]) for r in ranges] == [
+            ["Merge branch topic", "feat: topic", "fix: b"],
+            ["chore: init", "fix: a"],
+        ]
+
+    def test_backfill_writes_a_file_per_tag_and_an_index(self, tagged: Path, tmp_path: Path) -> None:
+        out = tmp_path / "notes"
+        index = backfill(tagged, out, limit=2, jobs=2, mode="offline")
+        assert index == json.loads((out / "index.json").read_text())
+        assert [(e["tag"], e["version"], e["since"], e["commits"], e["file"]) for e in index] == [
+            ("release/v0.3.0", "release/v0.3.0", "v0.2.0", 1, "release-v0.3.0.md"),
+            ("v0.2.0", "0.2.0", "v0.1.0", 2, "v0.2.0.md"),
+        ]
+        v020 = (out / "v0.2.0.md").read_text()
+        assert v020.startswith("# Release v0.2.0")
+        assert "- a" in v020 and "- b" in v020
+        assert "**api:** c" in (out / "release-v0.3.0.md").read_text()
+
+    def test_backfill_reports_failed_tags(self, tagged: Path, tmp_path: Path) -> None:
+        def flaky(commits, version, **options):
+            if version == "0.2.0":
+                raise ReleaseNotesError("provider down")
+            return "Body"
+
+        with patch("common.notes.generate_notes", side_effect=flaky):
+            with pytest.raises(ReleaseNotesError, match=r"1 of 3 tags: v0\.2\.0"):
+                backfill(tagged, tmp_path / "notes")
+        index = json.loads((tmp_path / "notes" / "index.json").read_text())
+        assert [e.get("error") for e in index] == [None, "provider down", None]
+
+
+class TestDrafts:
+    """Tests for update_draft and finalizing a draft in run()."""
+
+    @pytest.fixture
+    def repo(self, git_repo: Path) -> Path:
+        _commit(git_repo, "chore: init")
+        _git(git_repo, "tag", "v1.0.0")
+        _commit(git_repo, "feat: first")
+        _commit(git_repo, "Tweak the logo")
+        return git_repo
+
+    @staticmethod
+    def _provider(calls: list[str]):
+        def request(system, user_content, model, **kwargs):
+            calls.append(user_content)
+            return f"Summary {len(calls)}.\n\n### Other\n- sorted {len(calls)}"
+
+        return request
+
+    def test_draft_then_finalize_without_new_commits(self, repo: Path, tmp_path: Path) -> None:
+        cache_dir = tmp_path / "cache"
+        calls: list[str] = []
+        with patch("common.notes._request_anthropic", side_effect=self._provider(calls)):
+            draft = update_draft(repo, cache_dir=cache_dir, provider="anthropic")
+            final = run(repo, "1.1.0", mode="hybrid", provider="anthropic", cache_dir=cache_dir)
+        assert len(calls) == 1
+        assert "Tweak the logo" in calls[0]
+        assert draft.startswith("# Release vUnreleased")
+        assert final.startswith("# Release v1.1.0")
+        assert "Summary 1." in final
+        assert "- first" in final
+        assert "- sorted 1" in final
+
+    def test_each_update_sends_only_unseen_commits(self, repo: Path, tmp_path: Path) -> None:
+        cache_dir = tmp_path / "cache"
+        calls: list[str] = []
+        with patch("common.notes._request_anthropic", side_effect=self._provider(calls)):
+            update_draft(repo, cache_dir=cache_dir, provider="anthropic")
+            _commit(repo, "fix: second")
+            _commit(repo, "Polish wording")
+            update_draft(repo, cache_dir=cache_dir, provider="anthropic")
+            _commit(repo, "Rename a variable")
+            final = run(repo, "1.1.0", mode="hybrid", provider="anthropic", cache_dir=cache_dir)
+        assert len(calls) == 3
+        assert "Polish wording" in calls[1] and "Tweak the logo" not in calls[1]
+        assert "Rename a variable" in calls[2] and "Polish wording" not in calls[2]
+        assert "Summary 3." in final
+        assert "### Fixes\n- second" in final
+        assert "- sorted 1\n- sorted 2\n- sorted 3" in final
+
+    def test_ai_mode_ignores_draft(self, tmp_path: Path) -> None:
+        commits = [{"sha": "a1", "subject": "feat: first", "body": ""}]
+        draft = {"completion": "Old summary.", "shas": ["a1"]}
+        with patch("common.notes._request_anthropic", return_value="# Release v1.1.0\n\nFresh.") as request:
+            body = generate_notes(commits, "1.1.0", mode="ai", provider="anthropic", stream=False, draft=draft)
+        assert request.call_count == 1
+        assert body == "# Release v1.1.0\n\nFresh."
+
+    def test_draft_needs_cache_dir(self, repo: Path) -> None:
+        with pytest.raises(ReleaseNotesError, match="cache_dir"):
+            update_draft(repo, provider="anthropic")
+
+    def test_offline_draft_keeps_no_state(self, repo: Path, tmp_path: Path) -> None:
+        body = update_draft(repo, cache_dir=tmp_path / "cache", mode="offline")
+        assert "- Tweak the logo" in body
+        assert not (tmp_path / "cache").exists()
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    """Replays `server.events` as an SSE stream; a float entry is a pause in seconds, a callable a probe."""
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        self.server.requests.append(json.loads(self.rfile.read(length)))
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"error": "stub"}')
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for item in self.server.events:
+            if isinstance(item, float):
+                time.sleep(item)
+                continue
+            if callable(item):
+                item()
+                continue
+            self.wfile.write(item.encode())
+            self.wfile.flush()
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def sse_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SSEHandler)
+    server.requests = []
+    server.events = []
+    server.status = 200
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _anthropic_event(kind: str, **fields) -> str:
+    return f"event: {kind}\ndata: {json.dumps({'type': kind, **fields})}\n\n"
+
+
+class TestStreaming:
+    """Tests for SSE streaming against a local stub server."""
+
+    def test_anthropic_stream_writes_incrementally(self, repo_root: Path, sse_server) -> None:
+        out = repo_root / "notes.md"
+        mid_stream = []
+
+        def delta(text: str) -> str:
+            return _anthropic_event("content_block_delta", index=0, delta={"type": "text_delta", "text": text})
+
+        sse_server.events = [
+            _anthropic_event("message_start", message={}),
+            delta("# Release v1.0.0\n"),
+            0.1,
+            lambda: mid_stream.append(out.read_text()),
+            delta("\n- Fixed things"),
+            _anthropic_event("message_stop"),
+        ]
+        url = f"http://127.0.0.1:{sse_server.server_port}/v1/messages"
+        with patch("common.notes.ANTHROPIC_API_URL", url), patch.dict("os.environ", {"ANTHROPIC_API_KEY": "k"}):
+            with patch("common.notes.get_commits_since", return_value=["fix: things"]):
+                body = run(repo_root, "1.0.0", since_tag="v0.9.0", output_path=out, stream=True)
+
+        assert mid_stream == ["# Release v1.0.0\n"]
+        assert body == "# Release v1.0.0\n\n- Fixed things"
+        assert out.read_text() == body
+        assert sse_server.requests[0]["stream"] is True
+
+    def test_openai_stream(self, repo_root: Path, sse_server) -> None:
+        sse_server.events = [
+            'data: {"choices":[{"delta":{"role":"assistant"}}]}\n\n',
+            'data: {"choices":[{"delta":{"content":"## Summary"}}]}\n\n',
+            'data: {"choices":[{"delta":{"content":"\\nDone."}}]}\n\n',
+            "data: [DONE]\n\n",
+        ]
+        url = f"http://127.0.0.1:{sse_server.server_port}/v1/chat/completions"
+        with patch("common.notes.OPENAI_API_URL", url), patch.dict("os.environ", {"OPENAI_API_KEY": "k"}):
+            with patch("common.notes.get_commits_since", return_value=["docs: x"]):
+                body = run(repo_root, "1.0.0", since_tag="v0.9.0", provider="openai", stream=True)
+        assert body == "## Summary\nDone."
+
+    @pytest.mark.parametrize("provider", ["anthropic", "openai"])
+    def test_malformed_event_is_provider_error(self, repo_root: Path, sse_server, provider: str) -> None:
+        sse_server.events = ['data: {"choices": [\n\n']
+        base = f"http://127.0.0.1:{sse_server.server_port}"
+        env = {"ANTHROPIC_API_KEY": "k", "OPENAI_API_KEY": "k"}
+        with (
+            patch("common.notes.ANTHROPIC_API_URL", f"{base}/v1/messages"),
+            patch("common.notes.OPENAI_API_URL", f"{base}/v1/chat/completions"),
+            patch.dict("os.environ", env),
+            patch("common.notes.get_commits_since", return_value=["fix: x"]),
+        ):
+            with pytest.raises(ProviderError, match="malformed") as exc_info:
+                run(repo_root, "1.0.0", since_tag="v0.9.0", provider=provider, stream=True)
+        assert exc_info.value.retryable is True
+
+    def test_idle_timeout_keeps_partial_body(self, repo_root: Path, sse_server) -> None:
+        out = repo_root / "notes.md"
+        sse_server.events = [
+            _anthropic_event("content_block_delta", delta={"type": "text_delta", "text": "# Partial"}),
+            1.0,
+            _anthropic_event("message_stop"),
+        ]
+        url = f"http://127.0.0.1:{sse_server.server_port}/v1/messages"
+        with patch("common.notes.ANTHROPIC_API_URL", url), patch.dict("os.environ", {"ANTHROPIC_API_KEY": "k"}):
+            with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+                with pytest.raises(ReleaseNotesError, match="stalled"):
+                    run(repo_root, "1.0.0", since_tag="v0.9.0", output_path=out, stream=True, idle_timeout=0.3)
+        assert out.read_text() == "# Partial"
+
+
+class TestHedging:
+    """Tests for hedged requests across providers."""
+
+    @staticmethod
+    def _fake_generate(behaviour):
+        calls = []
+
+        def fake(provider, model, commits, format_instructions, version, chunk_tokens, map_workers, **stream):
+            calls.append(provider)
+            return behaviour[provider](stream["on_text"])
+
+        return fake, calls
+
+    def test_slow_primary_is_hedged_and_cancelled(self, repo_root: Path) -> None:
+        cancelled = threading.Event()
+
+        def slow(on_text):
+            deadline = time.monotonic() + 5
+            while time.monotonic() < deadline:
+                try:
+                    on_text("x")
+                except Exception:
+                    cancelled.set()
+                    raise
+                time.sleep(0.01)
+            return "slow body"
+
+        fake, calls = self._fake_generate({"anthropic": slow, "openai": lambda on_text: "fast body"})
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", side_effect=fake):
+                started = time.monotonic()
+                body = run(repo_root, "1.0.0", since_tag="v1", fallback_provider="openai", hedge_after=0.1)
+        assert body == "fast body"
+        assert calls == ["anthropic", "openai"]
+        assert time.monotonic() - started < 2
+        assert cancelled.wait(1)
+
+    def test_falls_back_immediately_on_overload(self, repo_root: Path) -> None:
+        def overloaded(on_text):
+            raise ProviderError("Anthropic API error 529: overloaded", retryable=True)
+
+        fake, calls = self._fake_generate({"anthropic": overloaded, "openai": lambda on_text: "fallback body"})
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", side_effect=fake):
+                body = run(repo_root, "1.0.0", since_tag="v1", fallback_provider="openai", hedge_after=30)
+        assert body == "fallback body"
+        assert calls == ["anthropic", "openai"]
+
+    def test_non_retryable_error_is_raised(self, repo_root: Path) -> None:
+        def bad_request(on_text):
+            raise ProviderError("Anthropic API error 400: bad", retryable=False)
+
+        fake, calls = self._fake_generate({"anthropic": bad_request, "openai": lambda on_text: "unused"})
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", side_effect=fake):
+                with pytest.raises(ReleaseNotesError, match="400"):
+                    run(repo_root, "1.0.0", since_tag="v1", fallback_provider="openai", hedge_after=30)
+        assert calls == ["anthropic"]
+
+    def test_fallback_answer_is_cached_under_fallback_provider(self, repo_root: Path, tmp_path: Path) -> None:
+        def overloaded(on_text):
+            raise ProviderError("Anthropic API error 529: overloaded", retryable=True)
+
+        fake, calls = self._fake_generate({"anthropic": overloaded, "openai": lambda on_text: "fallback body"})
+        options = {"since_tag": "v1", "fallback_provider": "openai", "hedge_after": 30, "cache_dir": tmp_path}
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", side_effect=fake):
+                run(repo_root, "1.0.0", **options)
+                assert run(repo_root, "1.0.0", **options) == "fallback body"
+        assert calls == ["anthropic", "openai"]
+        entries = [json.loads(p.read_text()) for p in tmp_path.glob("*/*.json")]
+        assert [(e["provider"], e["value"]) for e in entries] == [("openai", "fallback body")]
+
+    def test_cancelled_primary_latency_is_recorded(self, repo_root: Path, tmp_path: Path) -> None:
+        def slow(on_text):
+            time.sleep(0.5)
+            on_text("x")
+            return "slow body"
+
+        fake, _calls = self._fake_generate({"anthropic": slow, "openai": lambda on_text: "fast body"})
+        options = {"since_tag": "v1", "fallback_provider": "openai", "hedge_after": 0.1, "cache_dir": tmp_path}
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", side_effect=fake):
+                assert run(repo_root, "1.0.0", **options) == "fast body"
+        samples = json.loads((tmp_path / "latency.json").read_text())
+        anthropic = samples.pop(next(name for name in samples if name.startswith("anthropic/")))
+        assert len(anthropic) == 1 and anthropic[0] >= 0.1  # lower bound: cancelled while still running
+        assert [len(values) for values in samples.values()] == [1]
+
+    def test_unhedged_latency_is_recorded(self, repo_root: Path, tmp_path: Path) -> None:
+        with patch("common.notes.get_commits_since", return_value=["fix: x"]):
+            with patch("common.notes._generate", return_value="body"):
+                run(repo_root, "1.0.0", since_tag="v1", cache_dir=tmp_path)
+        samples = json.loads((tmp_path / "latency.json").read_text())
+        assert [name.split("/")[0] for name in samples] == ["anthropic"]
+
+    def test_cancelled_map_reduce_starts_no_more_batches(self) -> None:
+        requests = []
+
+        def request(system, user_content, model, max_tokens=None, **stream):
+            requests.append(user_content)
+            stream["on_text"]("partial")
+            return "partial"
+
+        def on_text(_text: str) -> None:
+            raise _CancelledError  # the hedge was lost
+
+        commits = [f"fix: change number {n}" for n in range(40)]
+        with patch("common.notes._request_anthropic", side_effect=request):
+            with pytest.raises(_CancelledError):
+                _map_reduce(commits, "fmt", "1.0.0", "m", "anthropic", 20, 1, on_text=on_text)
+        assert len(requests) == 1
+
+    @pytest.mark.parametrize("status, retryable", [(429, True), (503, True), (400, False), (401, False)])
+    def test_http_status_decides_retryable(self, sse_server, status: int, retryable: bool) -> None:
+        sse_server.status = status
+        url = f"http://127.0.0.1:{sse_server.server_port}/v1/messages"
+        with patch("common.notes.ANTHROPIC_API_URL", url), patch.dict("os.environ", {"ANTHROPIC_API_KEY": "k"}):
+            with pytest.raises(ProviderError) as exc_info:
+                _request_anthropic("system", "user", "model")
+        assert exc_info.value.retryable is retryable
+        assert str(status) in str(exc_info.value)
+
+
+class _GraphQLHandler(BaseHTTPRequestHandler):
+    """Answers aliased pullRequest(number: N) fields from `server.pulls` ({number: (title, labels, issues)})."""
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length))
+        self.server.requests.append(request)
+        if self.server.status != 200:
+            self.send_response(self.server.status)
+            self.end_headers()
+            return
+        repository = {}
+        for alias, number in re.findall(r"(\w+): pullRequest\(number: (\d+)\)", request["query"]):
+            pull = self.server.pulls.get(int(number))
+            repository[alias] = pull and {
+                "number": int(number),
+                "title": pull[0],
+                "labels": {"nodes": [{"name": name} for name in pull[1]]},
+                "closingIssuesReferences": {"nodes": [{"number": n, "title": t} for n, t in pull[2]]},
+            }
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(json.dumps({"data": {"repository": repository}}).encode())
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def graphql_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _GraphQLHandler)
+    server.requests = []
+    server.pulls = {}
+    server.status = 200
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/graphql"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestPullRequests:
+    """Tests for pull request enrichment against a local fake GraphQL server."""
+
+    def test_batches_up_to_100_per_query(self, graphql_server) -> None:
+        graphql_server.pulls = {n: (f"PR {n}", [], []) for n in range(1, 251) if n != 42}
+        pulls = fetch_pull_requests("org/repo", list(range(1, 251)), "token", api_url=graphql_server.url)
+        assert len(graphql_server.requests) == 3
+        assert graphql_server.requests[0]["variables"] == {"owner": "org", "name": "repo"}
+        assert len(pulls) == 249
+        assert 42 not in pulls
+        assert pulls[7] == {"number": 7, "title": "PR 7", "labels": [], "issues": []}
+
+    def test_cached_per_pull_request(self, graphql_server, tmp_path: Path) -> None:
+        graphql_server.pulls = {1: ("One", [], []), 2: ("Two", [], [])}
+        fetch_pull_requests("org/repo", [1], "token", cache_dir=tmp_path, api_url=graphql_server.url)
+        pulls = fetch_pull_requests("org/repo", [1, 2], "token", cache_dir=tmp_path, api_url=graphql_server.url)
+        assert sorted(pulls) == [1, 2]
+        assert len(graphql_server.requests) == 2
+        assert "pullRequest(number: 1)" not in graphql_server.requests[1]["query"]
+
+    def test_enrich_commits(self) -> None:
+        pulls = {
+            7: {
+                "number": 7,
+                "title": "Add paging",
+                "labels": ["enhancement"],
+                "issues": [{"number": 3, "title": "Slow"}],
+            },
+            8: {"number": 8, "title": "fix: crash", "labels": [], "issues": []},
+        }
+        commits = [
+            {"subject": "Merge pull request #7 from org/paging", "body": ""},
+            {"subject": "fix: crash on start (#8)", "body": ""},
+            {"subject": "docs: readme", "body": ""},
+        ]
+        subjects = [c["subject"] for c in enrich_commits(commits, pulls)]
+        assert subjects == ["Add paging (#7) [enhancement] (closes #3: Slow)", "fix: crash (#8)", "docs: readme"]
+
+    def test_run_describes_merge_commits_by_pull_request(self, repo_root: Path, graphql_server) -> None:
+        graphql_server.pulls = {7: ("Add paging", ["enhancement"], [])}
+        stats: dict = {}
+        commits = ["Merge pull request #7 from org/paging", "fix: y"]
+        with patch("common.notes.get_previous_tag", return_value="v0.9.0"):
+            with patch("common.notes.get_commits_since", return_value=commits):
+                with patch("common.notes._call_anthropic", return_value="Body") as call_mock:
+                    run(
+                        repo_root,
+                        "1.0.0",
+                        provider="anthropic",
+                        github_repository="org/repo",
+                        github_token="token",
+                        github_api_url=graphql_server.url,
+                        stats=stats,
+                    )
+        assert call_mock.call_args.args[0] == ["Add paging (#7) [enhancement]", "fix: y"]
+        assert stats["pull_requests"] == 1
+
+    def test_failed_lookup_leaves_commits(self, repo_root: Path, graphql_server) -> None:
+        graphql_server.status = 502
+        stats: dict = {}
+        with patch("common.notes.get_previous_tag", return_value="v0.9.0"):
+            with patch("common.notes.get_commits_since", return_value=["Merge pull request #7 from x", "fix: y"]):
+                with patch("common.notes._call_anthropic", return_value="Body") as call_mock:
+                    run(
+                        repo_root,
+                        "1.0.0",
+                        provider="anthropic",
+                        github_repository="org/repo",
+                        github_token="token",
+                        github_api_url=graphql_server.url,
+                        stats=stats,
+                    )
+        assert call_mock.call_args.args[0] == ["fix: y"]
+        assert "502" in stats["pull_requests_error"]
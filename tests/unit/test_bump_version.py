@@ -1,6 +1,9 @@
 import os
 import re
+import subprocess
 import sys
+from pathlib import Path
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -127,6 +130,31 @@ authors = ["me"]
     assert 'version = "0.2.0"' in f.read_text(encoding="utf-8")
 
 
+ROOT_MANIFEST = """[workspace]
+members = ["crates/*"]
+
+[workspace.package]
+version = "1.0.0"
+
+[package]
+name = "root"
+version = "1.0.0"
+
+[dependencies]
+serde = { version = "1.0.0" }
+"""
+
+
+def test_replace_version_in_file_rust_workspace_and_package(tmp_path):
+    f = tmp_path / "Cargo.toml"
+    f.write_text(ROOT_MANIFEST, encoding="utf-8")
+
+    assert bump_version.replace_version_in_file(f, "1.0.0", "1.0.1", "rust") is True
+
+    assert f.read_text(encoding="utf-8") == ROOT_MANIFEST.replace('version = "1.0.0"\n', 'version = "1.0.1"\n')
+    assert 'serde = { version = "1.0.0" }' in f.read_text(encoding="utf-8")
+
+
 def test_replace_version_in_file_rust_member_update(tmp_path):
     f = tmp_path / "Cargo.toml"
     content = """[package]
@@ -210,6 +238,280 @@ def test_cargo_toml_paths_filtering(tmp_path):
     assert "node_modules/Cargo.toml" not in rel_paths
 
 
+def test_cargo_toml_walk_prunes_skipped_dirs(tmp_path, monkeypatch):
+    (tmp_path / "crates/a").mkdir(parents=True)
+    (tmp_path / "crates/a/Cargo.toml").touch()
+    (tmp_path / "target/debug/build").mkdir(parents=True)
+    (tmp_path / "target/debug/build/Cargo.toml").touch()
+
+    visited = []
+    real_scandir = os.scandir
+
+    def recording_scandir(path):
+        visited.append(os.path.relpath(path, tmp_path))
+        return real_scandir(path)
+
+    monkeypatch.setattr(bump_version.os, "scandir", recording_scandir)
+    paths = bump_version._cargo_toml_paths(tmp_path, use_git=False)
+
+    assert [str(p.relative_to(tmp_path)) for p in paths] == ["crates/a/Cargo.toml"]
+    assert not any(v.startswith("target") for v in visited)
+
+
+def test_cargo_toml_paths_from_git_index(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    (tmp_path / ".gitignore").write_text("/target\n")
+    (tmp_path / "Cargo.toml").touch()
+    (tmp_path / "new").mkdir()
+    (tmp_path / "new/Cargo.toml").touch()  # untracked, not ignored: still found
+    (tmp_path / "target").mkdir()
+    (tmp_path / "target/Cargo.toml").touch()
+    (tmp_path / "notCargo.toml").touch()
+    subprocess.run(["git", "add", "Cargo.toml", ".gitignore"], cwd=tmp_path, check=True)
+
+    paths = bump_version._git_cargo_toml_paths(tmp_path)
+    assert sorted(str(p.relative_to(tmp_path)) for p in paths) == ["Cargo.toml", "new/Cargo.toml"]
+
+
+def test_git_cargo_toml_paths_none_outside_repo(tmp_path):
+    assert bump_version._git_cargo_toml_paths(tmp_path) is None
+
+
+CARGO_LOCK = """# This file is automatically @generated by Cargo.
+version = 4
+
+[[package]]
+name = "app"
+version = "0.3.0"
+dependencies = [
+ "core",
+ "serde 1.0.0",
+]
+
+[[package]]
+name = "core"
+version = "0.3.0"
+
+[[package]]
+name = "serde"
+version = "0.3.0"
+source = "registry+https://github.com/rust-lang/crates.io-index"
+checksum = "abc"
+"""
+
+
+def test_update_cargo_lock_members_only(tmp_path):
+    lock = tmp_path / "Cargo.lock"
+    lock.write_text(CARGO_LOCK, encoding="utf-8")
+
+    assert bump_version.update_cargo_lock(lock, {"app", "core", "serde"}, "0.3.0", "0.4.0") is True
+
+    expected = CARGO_LOCK.replace('name = "app"\nversion = "0.3.0"', 'name = "app"\nversion = "0.4.0"').replace(
+        'name = "core"\nversion = "0.3.0"', 'name = "core"\nversion = "0.4.0"'
+    )
+    # The registry crate keeps its version even though its name matches a local one.
+    assert lock.read_text(encoding="utf-8") == expected
+
+
+def test_update_cargo_lock_missing_or_unchanged(tmp_path):
+    lock = tmp_path / "Cargo.lock"
+    assert bump_version.update_cargo_lock(lock, {"app"}, "0.3.0", "0.4.0") is False
+    lock.write_text(CARGO_LOCK, encoding="utf-8")
+    assert bump_version.update_cargo_lock(lock, {"other"}, "0.3.0", "0.4.0") is False
+
+
+# --- Multi-target mode ---
+
+
+def test_parse_targets_infers_modes_and_dedupes(tmp_path):
+    for rel in ("Cargo.toml", "crates/a/Cargo.toml", "target/x/Cargo.toml", "app.csproj", "VERSION"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).touch()
+
+    targets = bump_version.parse_targets("Cargo.toml\n**/Cargo.toml\n\n# comment\napp.csproj\ntext:VERSION\n", tmp_path)
+
+    assert [(m, str(p.relative_to(tmp_path))) for m, p in targets] == [
+        ("rust", "Cargo.toml"),
+        ("rust", "crates/a/Cargo.toml"),
+        ("dotnet", "app.csproj"),
+        ("text", "VERSION"),
+    ]
+
+
+def test_bump_targets_rust_workspace_and_package(tmp_path):
+    f = tmp_path / "Cargo.toml"
+    f.write_text(ROOT_MANIFEST, encoding="utf-8")
+
+    assert bump_version.bump_targets([("rust", f)], "minor")[:2] == ("1.0.0", "1.1.0")
+    assert f.read_text(encoding="utf-8") == ROOT_MANIFEST.replace('version = "1.0.0"\n', 'version = "1.1.0"\n')
+
+
+def test_bump_targets_reports_undecodable_file(tmp_path, capsys):
+    a = tmp_path / "VERSION"
+    b = tmp_path / "package.json"
+    a.write_text("0.1.0\n", encoding="utf-8")
+    b.write_bytes(b'{"version": "0.1.0", "author": "\xff"}')
+
+    with pytest.raises(SystemExit) as exc_info:
+        bump_version.bump_targets([("text", a), ("node", b)], "patch")
+
+    assert exc_info.value.code == 1
+    assert f"Error: Could not read {b}" in capsys.readouterr().err
+    assert a.read_text(encoding="utf-8") == "0.1.0\n"
+
+
+def test_bump_targets_rolls_back_on_write_failure(tmp_path, monkeypatch):
+    a = tmp_path / "Cargo.toml"
+    b = tmp_path / "package.json"
+    a.write_text('[package]\nversion = "0.1.0"\n', encoding="utf-8")
+    b.write_text('{"version": "0.1.0"}', encoding="utf-8")
+
+    real_write = bump_version._write_atomic
+    calls = []
+
+    def flaky_write(path, data):
+        calls.append(path)
+        if path == b and len(calls) == 2:
+            raise OSError("disk full")
+        real_write(path, data)
+
+    monkeypatch.setattr(bump_version, "_write_atomic", flaky_write)
+    with pytest.raises(SystemExit):
+        bump_version.bump_targets([("rust", a), ("node", b)], "patch")
+
+    assert a.read_text(encoding="utf-8") == '[package]\nversion = "0.1.0"\n'
+    assert b.read_text(encoding="utf-8") == '{"version": "0.1.0"}'
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []
+
+
+# --- Version reference sweep ---
+
+
+def test_sweep_version_references(tmp_path):
+    (tmp_path / "charts/app").mkdir(parents=True)
+    (tmp_path / "charts/app/Chart.yaml").write_text(
+        'name: app\nversion: 1.3.0\nappVersion: "1.2.3"\n', encoding="utf-8"
+    )
+    (tmp_path / "charts/app/values.yaml").write_text(
+        "image:\n  repository: ghcr.io/o/app\n  tag: v1.2.3\nsidecar:\n  tag: 1.2.30\n", encoding="utf-8"
+    )
+    (tmp_path / "README.md").write_text(
+        "![v](https://img.shields.io/badge/version-1.2.3-blue)\nUpgrading from 1.2.3 needs a migration.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "logo.md").write_bytes(b"1.2.3\0binary")
+    (tmp_path / "node_modules/x").mkdir(parents=True)
+    (tmp_path / "node_modules/x/README.md").write_text("tag: 1.2.3", encoding="utf-8")
+
+    hits, written = bump_version.sweep_version_references(
+        tmp_path, ["**/Chart.yaml", "**/values.yaml", "*.md"], "1.2.3", "1.3.0"
+    )
+
+    assert sorted(str(p.relative_to(tmp_path)) for p in written) == [
+        "README.md",
+        "charts/app/Chart.yaml",
+        "charts/app/values.yaml",
+    ]
+    assert [(str(p.relative_to(tmp_path)), n, r) for p, n, _line, r in hits] == [
+        ("README.md", 1, True),
+        ("README.md", 2, False),  # prose is reported, not rewritten
+        ("charts/app/Chart.yaml", 3, True),
+        ("charts/app/values.yaml", 3, True),
+    ]
+    assert "tag: 1.2.30" in (tmp_path / "charts/app/values.yaml").read_text(encoding="utf-8")
+    assert "tag: v1.3.0" in (tmp_path / "charts/app/values.yaml").read_text(encoding="utf-8")
+    assert "from 1.2.3 needs" in (tmp_path / "README.md").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize(
+    ("pattern", "error"), [(r"tag:\s*1\.2\.3", "no {version} placeholder"), (r"tag:\s*({version}", "Invalid sweep")]
+)
+def test_main_sweep_rejects_bad_patterns(tmp_path, monkeypatch, capsys, pattern, error):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "values.yaml").write_text("tag: 1.2.3\n", encoding="utf-8")
+    with pytest.raises(SystemExit) as exc_info:
+        bump_version.main_sweep("*.yaml", pattern, "1.2.3", "1.3.0")
+    assert exc_info.value.code == 1
+    assert error in capsys.readouterr().err
+    assert (tmp_path / "values.yaml").read_text(encoding="utf-8") == "tag: 1.2.3\n"
+
+
+def test_sweep_skips_unreadable_directories(tmp_path, monkeypatch, capsys):
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked/values.yaml").write_text("tag: 1.2.3\n", encoding="utf-8")
+    (tmp_path / "values.yaml").write_text("tag: 1.2.3\n", encoding="utf-8")
+    (tmp_path / "dangling.yaml").symlink_to(tmp_path / "missing.yaml")
+    scandir = os.scandir
+
+    def locked_scandir(path):
+        if Path(path).name == "locked":
+            raise PermissionError(13, "Permission denied", str(path))
+        return scandir(path)
+
+    monkeypatch.setattr(bump_version.os, "scandir", locked_scandir)
+    monkeypatch.setattr(bump_version.subprocess, "run", Mock(side_effect=FileNotFoundError("git")))
+    _hits, written = bump_version.sweep_version_references(tmp_path, ["**/*.yaml"], "1.2.3", "1.3.0")
+    assert written == [tmp_path / "values.yaml"]
+    assert "Warning: Could not read" in capsys.readouterr().err
+
+
+# --- Fleet pin rewrite ---
+
+CALLER_WORKFLOW = """jobs:
+  build:
+    uses: octopilot/actions/.github/workflows/pipeline.yml@v1  # keep in step
+    with:
+      actions_ref: "v1"
+  lint:
+    steps:
+      - uses: 'octopilot/actions/lint@v1'
+      - uses: actions/checkout@v4
+      - uses: octopilot/actions/test@main
+"""
+
+
+def test_rewrite_pins_from_ref():
+    text, count = bump_version.rewrite_pins(CALLER_WORKFLOW, "v2", "v1")
+    assert count == 3
+    assert text == CALLER_WORKFLOW.replace("@v1", "@v2").replace('"v1"', '"v2"')
+
+
+def test_rewrite_fleet_pins(tmp_path):
+    for name in ("svc-a", "svc-b"):
+        (tmp_path / name / ".github/workflows").mkdir(parents=True)
+    (tmp_path / "svc-a/.github/workflows/ci.yml").write_text(CALLER_WORKFLOW, encoding="utf-8")
+    (tmp_path / "svc-b/.github/workflows/ci.yaml").write_text("on: push\n", encoding="utf-8")
+
+    summary = bump_version.rewrite_fleet_pins([tmp_path / "svc-a", tmp_path / "svc-b"], "v2", jobs=2)
+
+    assert summary == {
+        str(tmp_path / "svc-a"): {"changed": [".github/workflows/ci.yml"], "pins": 4},
+        str(tmp_path / "svc-b"): {"changed": [], "pins": 0},
+    }
+    assert "actions/checkout@v4" in (tmp_path / "svc-a/.github/workflows/ci.yml").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize(("value", "jobs"), [(" ", 8), ("0", 1), ("-3", 1), ("4", 4)])
+def test_main_pins_jobs(tmp_path, monkeypatch, value, jobs):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("INPUT_PIN_TO", "v2")
+    monkeypatch.setenv("INPUT_JOBS", value)
+    monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+    with patch.object(bump_version, "rewrite_fleet_pins", return_value={}) as rewrite:
+        bump_version.main_pins()
+    assert rewrite.call_args.args[3] == jobs
+
+
+def test_main_pins_invalid_jobs(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("INPUT_PIN_TO", "v2")
+    monkeypatch.setenv("INPUT_JOBS", "many")
+    with pytest.raises(SystemExit) as exc_info:
+        bump_version.main_pins()
+    assert exc_info.value.code == 1
+    assert "Error: Invalid jobs 'many'" in capsys.readouterr().err
+
+
 # --- Maven Logic Tests ---
 
 
@@ -271,6 +573,231 @@ def test_replace_version_in_file_maven(tmp_path):
     assert matches[1].group(1) == "1.0.0"  # Second one (dependency) untouched
 
 
+def test_get_current_version_maven_skips_parent():
+    content = """<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <!-- <version>9.9.9</version> -->
+  <parent>
+    <groupId>org.springframework.boot</groupId>
+    <artifactId>spring-boot-starter-parent</artifactId>
+    <version>3.2.0</version>
+  </parent>
+  <artifactId>app</artifactId>
+  <version>0.4.0</version>
+</project>
+"""
+    assert bump_version.get_current_version_maven(content) == "0.4.0"
+
+
+def test_get_current_version_maven_inherited_raises():
+    content = "<project><parent><version>3.2.0</version></parent><artifactId>app</artifactId></project>"
+    with pytest.raises(ValueError, match="project <version>"):
+        bump_version.get_current_version_maven(content)
+
+
+def test_replace_version_in_file_maven_same_as_parent(tmp_path):
+    f = tmp_path / "pom.xml"
+    f.write_text(
+        "<project>\n  <parent><version>1.0.0</version></parent>\n  <version>1.0.0</version>\n</project>\n",
+        encoding="utf-8",
+    )
+    assert bump_version.replace_version_in_file_maven(f, "1.0.0", "1.0.1") is True
+    assert f.read_text(encoding="utf-8") == (
+        "<project>\n  <parent><version>1.0.0</version></parent>\n  <version>1.0.1</version>\n</project>\n"
+    )
+
+
+# --- Automatic bump ---
+
+
+@pytest.mark.parametrize(
+    "message, expected",
+    [
+        ("feat: add x", "minor"),
+        ("feat(cli): add x", "minor"),
+        ("feat!: drop x", "major"),
+        ("refactor(core)!: rename", "major"),
+        ("fix: y\n\nBREAKING CHANGE: config key renamed", "major"),
+        ("fix: y", "patch"),
+        ("Merge pull request #1", "patch"),
+        ("wip: feat later\n\nBREAKING CHANGE: not conventional", "patch"),
+        ("Feat: capitalised type", "minor"),
+    ],
+)
+def test_classify_commit(message, expected):
+    assert bump_version.classify_commit(message) == expected
+
+
+def _commit(cwd, message):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", "commit", "-q", "--allow-empty", "-m", message],
+        cwd=cwd,
+        check=True,
+    )
+
+
+def test_iter_commits_since_tag_stops_at_boundary(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "feat!: before tag")
+    subprocess.run(["git", "tag", "v1.0.0"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "fix: one")
+    _commit(tmp_path, "docs: two")
+    subprocess.run(["git", "tag", "v1.0.1"], cwd=tmp_path, check=True)  # tag on HEAD is not the boundary
+
+    messages = [m.strip() for m in bump_version.iter_commits_since_tag(tmp_path)]
+
+    assert messages == ["docs: two", "fix: one"]
+    assert bump_version.auto_bump("1.0.0", tmp_path) == "patch"
+    assert bump_version.auto_bump("1.1.0-rc.1", tmp_path) == "rc"
+
+
+def test_iter_commits_since_tag_keeps_branch_merged_after_tag(tmp_path):
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@example.com"]
+    subprocess.run(["git", "init", "-q", "-b", "main"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "chore: init")
+    subprocess.run(["git", "checkout", "-q", "-b", "topic"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "feat: made before the tag")
+    subprocess.run(["git", "checkout", "-q", "main"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "fix: released")
+    subprocess.run(["git", "tag", "v1.0.0"], cwd=tmp_path, check=True)
+    _commit(tmp_path, "docs: after the tag")
+    subprocess.run([*git, "merge", "-q", "--no-ff", "-m", "Merge topic", "topic"], cwd=tmp_path, check=True)
+
+    messages = [m.strip() for m in bump_version.iter_commits_since_tag(tmp_path)]
+
+    assert sorted(messages) == ["Merge topic", "docs: after the tag", "feat: made before the tag"]
+    assert bump_version.auto_bump("1.0.0", tmp_path) == "minor"
+
+
+# --- Format-preserving editor ---
+
+
+def test_patch_version_preserves_crlf_and_comments(tmp_path):
+    f = tmp_path / "Cargo.toml"
+    original = b'[package] # main crate\r\nname = "a"\r\nversion = "0.1.0"  # bumped by CI\r\n'
+    f.write_bytes(original)
+    assert bump_version.replace_version_in_file(f, "0.1.0", "0.2.0", "rust") is True
+    assert f.read_bytes() == original.replace(b"0.1.0", b"0.2.0")
+
+
+def test_toml_version_span_skips_dependency_tables():
+    content = '[dependencies]\nversion = "9.9.9"\n\n[package]\nname = "a"\nversion = "0.3.0"\n'
+    start, end = bump_version.toml_version_span(content)
+    assert content[start:end] == "0.3.0"
+
+
+def test_get_current_version_node_top_level_only():
+    content = '{"name": "a", "engines": {"version": "9"}, "private": true, "version": "2.0.0"}'
+    assert bump_version.get_current_version_node(content) == "2.0.0"
+
+
+def test_replace_version_in_file_node_preserves_layout(tmp_path):
+    f = tmp_path / "package.json"
+    original = '{\n\t"config": { "version": "1.0.0" },\n\t"version" : "1.0.0"\n}\n'
+    f.write_text(original, encoding="utf-8")
+    assert bump_version.replace_version_in_file_node(f, "1.0.0", "1.1.0") is True
+    assert f.read_text(encoding="utf-8") == original.replace('"version" : "1.0.0"', '"version" : "1.1.0"')
+
+
+def test_get_current_version_python_project_section():
+    content = '[tool.other]\nversion = "9.9.9"\n\n[project]\nname = "a"\nversion = "0.5.0"\n'
+    assert bump_version.get_current_version_python(content) == "0.5.0"
+
+
+# --- Maven reactor ---
+
+
+def _write_reactor(root):
+    (root / "pom.xml").write_text(
+        """<project>
+  <groupId>com.example</groupId>
+  <artifactId>parent</artifactId>
+  <version>2.0.0</version>
+  <packaging>pom</packaging>
+  <modules>
+    <module>core</module>
+    <module>services</module>
+  </modules>
+</project>
+""",
+        encoding="utf-8",
+    )
+    (root / "core").mkdir()
+    (root / "core/pom.xml").write_text(
+        """<project>
+  <parent>
+    <groupId>com.example</groupId>
+    <artifactId>parent</artifactId>
+    <version>2.0.0</version>
+  </parent>
+  <artifactId>core</artifactId>
+  <dependencies>
+    <dependency><groupId>org.other</groupId><artifactId>lib</artifactId><version>2.0.0</version></dependency>
+  </dependencies>
+</project>
+""",
+        encoding="utf-8",
+    )
+    (root / "services/api").mkdir(parents=True)
+    (root / "services/pom.xml").write_text(
+        """<project>
+  <parent><groupId>com.example</groupId><artifactId>parent</artifactId><version>2.0.0</version></parent>
+  <artifactId>services</artifactId>
+  <packaging>pom</packaging>
+  <modules><module>api</module></modules>
+</project>
+""",
+        encoding="utf-8",
+    )
+    (root / "services/api/pom.xml").write_text(
+        """<project>
+  <parent><groupId>com.example</groupId><artifactId>services</artifactId><version>2.0.0</version></parent>
+  <artifactId>api</artifactId>
+  <version>2.0.0</version>
+  <dependencies>
+    <dependency>
+      <groupId>${project.groupId}</groupId>
+      <artifactId>core</artifactId>
+      <version>2.0.0</version>
+    </dependency>
+  </dependencies>
+</project>
+""",
+        encoding="utf-8",
+    )
+
+
+def test_scan_pom_collects_modules_and_references():
+    model = bump_version.scan_pom(
+        "<project><parent><artifactId>p</artifactId><version>1</version></parent>"
+        "<modules><module> a </module></modules>"
+        "<profiles><profile><modules><module>b</module></modules></profile></profiles></project>"
+    )
+    assert model["modules"] == ["a", "b"]
+    assert [r["kind"] for r in model["references"]] == ["parent"]
+    assert "version" not in model["project"]
+
+
+def test_bump_maven_reactor(tmp_path):
+    _write_reactor(tmp_path)
+
+    updated = bump_version.bump_maven_reactor(tmp_path / "pom.xml", "2.0.0", "2.1.0")
+
+    assert sorted(str(p.relative_to(tmp_path.resolve())) for p in updated) == [
+        "core/pom.xml",
+        "pom.xml",
+        "services/api/pom.xml",
+        "services/pom.xml",
+    ]
+    assert "<version>2.1.0</version>" in (tmp_path / "pom.xml").read_text(encoding="utf-8")
+    core = (tmp_path / "core/pom.xml").read_text(encoding="utf-8")
+    assert "<artifactId>parent</artifactId>\n    <version>2.1.0</version>" in core
+    # Third-party dependency that happens to share the version is untouched.
+    assert "<artifactId>lib</artifactId><version>2.0.0</version>" in core
+    api = (tmp_path / "services/api/pom.xml").read_text(encoding="utf-8")
+    assert "2.0.0" not in api
+    assert api.count("2.1.0") == 3
+
+
 # --- Gradle Logic Tests ---
 
 
@@ -91,6 +91,41 @@ class TestVersionDetectors:
     def test_detect_java_version_missing(self, tmp_path):
         assert detect.detect_java_version(str(tmp_path)) == ""
 
+    def test_detect_java_version_pom_ignores_profiles_and_plugins(self, tmp_path):
+        (tmp_path / "pom.xml").write_text(
+            '<project xmlns="http://maven.apache.org/POM/4.0.0">'
+            "<profiles><profile><properties><java.version>8</java.version></properties></profile></profiles>"
+            "<build><plugins><plugin><configuration><maven.compiler.source>11</maven.compiler.source>"
+            "</configuration></plugin></plugins></build>"
+            "<properties><maven.compiler.target>21</maven.compiler.target></properties>"
+            "</project>"
+        )
+        assert detect.detect_java_version(str(tmp_path)) == "21"
+
+    def test_detect_java_version_pom_stops_after_project_properties(self, tmp_path):
+        # Anything after the project-level <properties> (here: malformed XML) is never parsed.
+        (tmp_path / "pom.xml").write_text(
+            "<project><properties><java.version>17</java.version></properties><dependencies><broken></project>"
+        )
+        assert detect.detect_java_version(str(tmp_path)) == "17"
+
+    def test_detect_java_version_gradle_groovy_legacy_enum(self, tmp_path):
+        (tmp_path / "build.gradle").write_text("sourceCompatibility = JavaVersion.VERSION_1_8")
+        assert detect.detect_java_version(str(tmp_path)) == "1.8"
+
+    def test_detect_java_version_gradle_ignores_comments(self, tmp_path):
+        (tmp_path / "build.gradle.kts").write_text(
+            '// jvmTarget = "11"\n/* JavaLanguageVersion.of(8) */\nval url = "https://x//JvmTarget.JVM_9"\n'
+            'kotlin { jvmTarget = "21" }\n'
+        )
+        assert detect.detect_java_version(str(tmp_path)) == "21"
+
+    def test_detect_java_version_gradle_kts_precedence(self, tmp_path):
+        (tmp_path / "build.gradle.kts").write_text(
+            'jvmTarget = "11"\njava { toolchain { languageVersion.set(JavaLanguageVersion.of(17)) } }'
+        )
+        assert detect.detect_java_version(str(tmp_path)) == "17"
+
 
 class TestJavaVersionToBpJvm:
     def test_major_only(self):
@@ -153,6 +188,100 @@ class TestDetectHelmCharts:
         assert "." in result
 
 
+class TestDetectHelmDependencies:
+    CHART = (
+        "name: app\nversion: 0.1.0\ndependencies:\n"
+        "  - name: redis\n    version: ~18.0\n    repository: oci://registry-1.docker.io/bitnamicharts\n"
+        "  - name: common\n    version: 0.1.0\n    repository: file://../common\n"
+    )
+    LOCK = (
+        "dependencies:\n"
+        "  - name: redis\n    version: 18.0.4\n    repository: oci://registry-1.docker.io/bitnamicharts\n"
+        "  - name: common\n    version: 0.1.0\n    repository: file://../common\n"
+        "digest: sha256:abc\n"
+    )
+
+    def _chart(self, root, path, chart, lock=None):
+        (root / path).mkdir(parents=True)
+        (root / path / "Chart.yaml").write_text(chart)
+        if lock is not None:
+            (root / path / "Chart.lock").write_text(lock)
+
+    def test_dedupes_locked_fetchable_dependencies(self, tmp_path):
+        self._chart(tmp_path, "a", self.CHART, self.LOCK)
+        self._chart(tmp_path, "b", self.CHART, self.LOCK)
+        plan = detect.detect_helm_dependencies(str(tmp_path), ["a", "b"])
+        assert len(plan["dependencies"]) == 1
+        dep = plan["dependencies"][0]
+        assert (dep["name"], dep["version"]) == ("redis", "18.0.4")
+        assert dep["store_path"].endswith("/redis-18.0.4.tgz")
+        assert plan["charts"]["a"]["dependencies"] == [dep]
+        # file:// dependency still needs a `helm dependency build`
+        assert plan["charts"]["a"]["complete"] is False
+        assert len(plan["cache_key"]) == 16
+
+    def test_cache_key_follows_lock_digests(self, tmp_path):
+        self._chart(tmp_path, "a", self.CHART, self.LOCK)
+        key = detect.detect_helm_dependencies(str(tmp_path), ["a"])["cache_key"]
+        (tmp_path / "a" / "Chart.lock").write_text(self.LOCK.replace("sha256:abc", "sha256:def"))
+        assert detect.detect_helm_dependencies(str(tmp_path), ["a"])["cache_key"] != key
+
+    def test_unlocked_chart_is_incomplete(self, tmp_path):
+        self._chart(tmp_path, "a", self.CHART)
+        plan = detect.detect_helm_dependencies(str(tmp_path), ["a"])
+        assert plan["charts"]["a"] == {"dependencies": [], "complete": False}
+        assert plan["cache_key"] == ""
+
+    def test_chart_without_dependencies_is_omitted(self, tmp_path):
+        self._chart(tmp_path, "a", "name: a\nversion: 0.1.0\n")
+        plan = detect.detect_helm_dependencies(str(tmp_path), ["a"])
+        assert plan == {"cache_key": "", "charts": {}, "dependencies": []}
+
+    def test_helm_matrix_entry_carries_its_chart_plan(self, tmp_path):
+        self._chart(tmp_path, "chart", self.CHART, self.LOCK)
+        ctx = detect.build_pipeline_context({"build": {"artifacts": []}}, str(tmp_path))
+        entry = next(e for e in ctx["matrix"] if e["language"] == "helm")
+        assert entry["helm_dependencies"]["cache_key"] == ctx["helm_dependencies"]["cache_key"]
+        assert list(entry["helm_dependencies"]["charts"]) == ["chart"]
+
+
+class TestDetectTestServices:
+    def _compose(self, root, content, name="docker-compose.yml"):
+        (root / "hack" / "test-deps").mkdir(parents=True)
+        (root / "hack" / "test-deps" / name).write_text(content)
+
+    def test_lists_service_images(self, tmp_path):
+        self._compose(
+            tmp_path,
+            "services:\n"
+            "  db:\n    image: postgres:16\n"
+            "  kafka:\n    image: ${KAFKA_IMAGE:-bitnami/kafka:3.7}\n"
+            "  local:\n    build: ./local\n"
+            "  custom:\n    image: ${CUSTOM_IMAGE}\n"
+            "  db2:\n    image: postgres:16\n",
+        )
+        result = detect.detect_test_services(str(tmp_path))
+        assert result == {
+            "compose_file": "hack/test-deps/docker-compose.yml",
+            "images": ["bitnami/kafka:3.7", "postgres:16"],
+        }
+
+    def test_compose_yaml_name(self, tmp_path):
+        self._compose(tmp_path, "services:\n  redis:\n    image: redis:7\n", name="compose.yaml")
+        assert detect.detect_test_services(str(tmp_path))["images"] == ["redis:7"]
+
+    def test_no_compose_file(self, tmp_path):
+        assert detect.detect_test_services(str(tmp_path)) == {"compose_file": "", "images": []}
+
+    def test_images_ride_on_test_matrix_entries(self, tmp_path):
+        self._compose(tmp_path, "services:\n  db:\n    image: postgres:16\n")
+        (tmp_path / "svc").mkdir()
+        (tmp_path / "svc" / "go.mod").write_text("module x\n\ngo 1.22\n")
+        ctx = detect.build_pipeline_context({"build": {"artifacts": [{"image": "a", "context": "svc"}]}}, str(tmp_path))
+        assert ctx["test_services"]["images"] == ["postgres:16"]
+        assert ctx["matrix"][0]["service_images"] == ["postgres:16"]
+
+
 class TestDetectLanguage:
     def test_detect_go(self, tmp_path):
         f = tmp_path / "go.mod"
@@ -465,3 +594,127 @@ build:
         assert chart_image["context"] == "chart"
         assert chart_image["output_key"] == "image_chart"
         assert chart_image["build_method"] == "pack"
+
+
+class TestWatchMode:
+    @pytest.fixture(autouse=True)
+    def _dir_cache(self, monkeypatch):
+        monkeypatch.setattr(detect, "_DIR_CACHE", {})
+
+    def test_context_diff_reports_only_changed_leaves(self):
+        old = {"versions": {"go": "1.21"}, "matrix": [{"name": "a", "version": "1.21"}], "languages": ["go"]}
+        new = {"versions": {"go": "1.22"}, "matrix": [{"name": "a", "version": "1.22"}, {"name": "b"}]}
+        assert detect.context_diff(old, new) == [
+            '- languages: ["go"]',
+            '~ matrix[0].version: "1.21" -> "1.22"',
+            '+ matrix[1]: {"name": "b"}',
+            '~ versions.go: "1.21" -> "1.22"',
+        ]
+
+    def test_context_diff_empty_when_equal(self):
+        assert detect.context_diff({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}) == []
+
+    def test_only_changed_directories_are_recomputed(self, tmp_path):
+        for d, v in (("svc-a", "1.21"), ("svc-b", "1.22")):
+            (tmp_path / d).mkdir()
+            (tmp_path / d / "go.mod").write_text(f"module x\n\ngo {v}\n")
+        config = {"build": {"artifacts": [{"image": "a", "context": "svc-a"}, {"image": "b", "context": "svc-b"}]}}
+        with patch("detect.detect_go_version", wraps=detect.detect_go_version) as probe:
+            detect.build_pipeline_context(config, str(tmp_path))
+            assert probe.call_count == 2
+            (tmp_path / "svc-b" / "go.mod").write_text("module x\n\ngo 1.23\n")
+            detect.invalidate_dir_cache({str(tmp_path / "svc-b" / "go.mod")})
+            ctx = detect.build_pipeline_context(config, str(tmp_path))
+            assert probe.call_count == 3
+            probe.assert_called_with(str(tmp_path / "svc-b"))
+        assert ctx["versions"]["go"] == "1.23"
+
+    def test_watched_dirs_cover_contexts_and_charts(self, tmp_path):
+        (tmp_path / "svc").mkdir()
+        (tmp_path / "svc" / "tests").mkdir()
+        (tmp_path / "chart").mkdir()
+        (tmp_path / "chart" / "Chart.yaml").write_text("name: c\n")
+        config = {"build": {"artifacts": [{"image": "a", "context": "svc"}]}}
+        dirs = detect.watched_dirs(config, str(tmp_path), str(tmp_path / "skaffold.yaml"))
+        assert dirs == {str(tmp_path), str(tmp_path / "svc"), str(tmp_path / "svc" / "tests"), str(tmp_path / "chart")}
+
+    def test_polling_watcher_reports_marker_changes(self, tmp_path):
+        (tmp_path / "go.mod").write_text("go 1.21\n")
+        watcher = detect.PollingWatcher({str(tmp_path)}, "skaffold.yaml", interval=0.01)
+        (tmp_path / "notes.txt").write_text("ignored")
+        assert watcher.wait(timeout=0.05) == set()
+        (tmp_path / "skaffold.yaml").write_text("build: {}\n")
+        assert watcher.wait(timeout=1) == {str(tmp_path / "skaffold.yaml")}
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux-only")
+    def test_inotify_watcher_reports_marker_changes(self, tmp_path):
+        watcher = detect.InotifyWatcher({str(tmp_path)}, "skaffold.yaml")
+        try:
+            (tmp_path / "notes.txt").write_text("ignored")
+            (tmp_path / "Cargo.toml").write_text("[package]\n")
+            assert watcher.wait(timeout=1) == {str(tmp_path / "Cargo.toml")}
+        finally:
+            watcher.close()
+
+    def test_watch_prints_context_then_diff(self, tmp_path, capsys, monkeypatch):
+        (tmp_path / "svc").mkdir()
+        (tmp_path / "svc" / "go.mod").write_text("module x\n\ngo 1.21\n")
+        skaffold = tmp_path / "skaffold.yaml"
+        skaffold.write_text("build:\n  artifacts:\n    - image: app-go\n      context: svc\n")
+
+        class _Watcher:
+            def wait(self, timeout=None):
+                (tmp_path / "svc" / "go.mod").write_text("module x\n\ngo 1.22\n")
+                return {str(tmp_path / "svc" / "go.mod")}
+
+            def update(self, dirs):
+                pass
+
+            def close(self):
+                pass
+
+        monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+        monkeypatch.setattr(detect, "make_watcher", lambda *a, **k: _Watcher())
+        detect.watch(str(skaffold), max_rounds=1)
+        out = capsys.readouterr().out
+        assert "pipeline-context=" in out
+        assert "# changed: svc/go.mod" in out
+        assert '~ versions.go: "1.21" -> "1.22"' in out
+        assert detect._DIR_CACHE is None
+
+    def test_watch_reports_change_made_during_recompute(self, tmp_path, capsys, monkeypatch):
+        (tmp_path / "svc").mkdir()
+        go_mod = tmp_path / "svc" / "go.mod"
+        go_mod.write_text("module x\n\ngo 1.21\n")
+        skaffold = tmp_path / "skaffold.yaml"
+        skaffold.write_text("build:\n  artifacts:\n    - image: app-go\n      context: svc\n")
+
+        def save(version, mtime):
+            go_mod.write_text(f"module x\n\ngo {version}\n")
+            os.utime(go_mod, ns=(mtime, mtime))
+
+        watchers = []
+
+        def make_watcher(dirs, skaffold_name, **kwargs):
+            watchers.append(detect.PollingWatcher(dirs, skaffold_name, interval=0.01))
+            save("1.22", 10**18)
+            return watchers[-1]
+
+        build = detect.build_pipeline_context
+        calls = []
+
+        def build_and_edit(*args):
+            calls.append(args)
+            context = build(*args)
+            if len(calls) == 2:  # saved again after the recompute has read go.mod
+                save("1.23", 2 * 10**18)
+            return context
+
+        monkeypatch.delenv("GITHUB_OUTPUT", raising=False)
+        monkeypatch.setattr(detect, "make_watcher", make_watcher)
+        monkeypatch.setattr(detect, "build_pipeline_context", build_and_edit)
+        detect.watch(str(skaffold), max_rounds=2)
+        out = capsys.readouterr().out
+        assert len(watchers) == 1
+        assert '~ versions.go: "1.21" -> "1.22"' in out
+        assert '~ versions.go: "1.22" -> "1.23"' in out
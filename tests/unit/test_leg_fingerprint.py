@@ -0,0 +1,138 @@
+"""Tests for test/leg_fingerprint.py (test action result-cache fingerprint)."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../../test")))
+
+import leg_fingerprint
+
+
+@pytest.fixture
+def repo(tmp_path: Path) -> Path:
+    (tmp_path / "svc" / "src").mkdir(parents=True)
+    (tmp_path / "svc" / "Cargo.toml").write_text(
+        '[package]\nname = "svc"\n\n[dependencies]\nshared = { path = "../shared" }\n'
+    )
+    (tmp_path / "svc" / "src" / "lib.rs").write_text("pub fn f() {}\n")
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "Cargo.toml").write_text('[package]\nname = "shared"\n')
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "guide.md").write_text("# Guide\n")
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other" / "main.go").write_text("package main\n")
+    (tmp_path / "Cargo.lock").write_text("# lock v1\n")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    return tmp_path
+
+
+ITEM = {
+    "name": "svc",
+    "job_label": "Test (svc, rust)",
+    "language": "rust",
+    "version": "1.80",
+    "context": "svc",
+    "workdir": "svc",
+}
+
+
+def _fp(repo: Path, item: dict = ITEM, env: dict | None = None, **kw) -> str:
+    return leg_fingerprint.fingerprint(repo, item, env or {}, **kw)[0]
+
+
+def _stage(repo: Path) -> None:
+    subprocess.run(["git", "add", "-A"], cwd=repo, check=True)
+
+
+def test_components_cover_path_deps_and_workspace_lockfile(repo: Path) -> None:
+    _, components = leg_fingerprint.fingerprint(repo, ITEM, {"BP_RUST_PACKAGE": "svc", "HOME": "/x"})
+    assert components["path_dependencies"] == ["shared"]
+    assert components["lockfiles"] == ["Cargo.lock"]
+    assert components["env"] == {"BP_RUST_PACKAGE": "svc"}
+    assert "job_label" not in components["item"]
+
+
+def test_unrelated_changes_keep_fingerprint(repo: Path) -> None:
+    before = _fp(repo)
+    (repo / "other" / "main.go").write_text("package main // changed\n")
+    _stage(repo)
+    assert _fp(repo, {**ITEM, "job_label": "Test (renamed, rust)"}) == before
+
+
+def test_ignored_paths_keep_fingerprint(repo: Path) -> None:
+    item = {**ITEM, "context": ".", "workdir": "."}
+    before = _fp(repo, item, ignore=("docs/**",))
+    (repo / "docs" / "guide.md").write_text("# Guide v2\n")
+    _stage(repo)
+    assert _fp(repo, item, ignore=("docs/**",)) == before
+    assert _fp(repo, item) != before
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda r: (r / "svc" / "src" / "lib.rs").write_text("pub fn g() {}\n"),
+        lambda r: (r / "shared" / "Cargo.toml").write_text('[package]\nname = "shared2"\n'),
+        lambda r: (r / "Cargo.lock").write_text("# lock v2\n"),
+    ],
+    ids=["workdir", "path-dependency", "lockfile"],
+)
+def test_observable_changes_change_fingerprint(repo: Path, change) -> None:
+    before = _fp(repo)
+    change(repo)
+    _stage(repo)
+    assert _fp(repo) != before
+
+
+def test_context_outside_workdir_is_fingerprinted(repo: Path) -> None:
+    # BP_RUST_WORKSPACE_DIR-style leg: the command runs in context, the crate lives deeper.
+    (repo / "svc" / "hack").mkdir()
+    (repo / "svc" / "hack" / "test.sh").write_text("cargo test\n")
+    _stage(repo)
+    item = {**ITEM, "workdir": "svc/src"}
+    before = _fp(repo, item)
+    (repo / "svc" / "hack" / "test.sh").write_text("cargo test --release\n")
+    _stage(repo)
+    assert _fp(repo, item) != before
+
+
+@pytest.mark.parametrize("name", [".cargo/config.toml", "rust-toolchain.toml", "Cargo.toml", "go.work"])
+def test_ancestor_build_configs_change_fingerprint(repo: Path, name: str) -> None:
+    (repo / name).parent.mkdir(exist_ok=True)
+    (repo / name).write_text("# v1\n")
+    _, components = leg_fingerprint.fingerprint(repo, ITEM, {})
+    assert name in components["build_configs"]
+    before = _fp(repo)
+    (repo / name).write_text("# v2\n")
+    assert _fp(repo) != before
+
+
+def test_command_version_and_env_change_fingerprint(repo: Path) -> None:
+    before = _fp(repo)
+    assert _fp(repo, {**ITEM, "command": "cargo nextest run"}) != before
+    assert _fp(repo, {**ITEM, "version": "1.81"}) != before
+    assert _fp(repo, env={"BP_TEST_COMMAND": "x"}) != before
+    assert _fp(repo, env={"ImageVersion": "20260101.1"}) != before
+
+
+def test_default_toolchain_is_part_of_fingerprint(repo: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    item = {**ITEM, "version": ""}
+    _, components = leg_fingerprint.fingerprint(repo, item, {})
+    assert components["toolchain"] == "stable"
+    before = _fp(repo, item)
+    monkeypatch.setitem(leg_fingerprint.DEFAULT_VERSIONS, "rust", "1.85")
+    assert _fp(repo, item) != before
+
+
+def test_falls_back_to_content_hashing_outside_git(tmp_path: Path) -> None:
+    (tmp_path / "svc").mkdir()
+    (tmp_path / "svc" / "go.mod").write_text("module x\n")
+    item = {"language": "go", "workdir": "svc"}
+    before = _fp(tmp_path, item)
+    (tmp_path / "svc" / "go.mod").write_text("module y\n")
+    assert _fp(tmp_path, item) != before
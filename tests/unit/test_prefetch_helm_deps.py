@@ -0,0 +1,93 @@
+"""Tests for detect-contexts/prefetch-helm-deps.sh (fake helm on PATH)."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[2] / "detect-contexts" / "prefetch-helm-deps.sh"
+
+pytestmark = pytest.mark.skipif(shutil.which("jq") is None, reason="jq not installed")
+
+# Records each invocation; `helm pull` writes <name>-<version>.tgz into -d.
+# `dependency build` fails in a chart dir containing FAIL.
+FAKE_HELM = """#!/usr/bin/env bash
+echo "$*" >> "$HELM_LOG"
+if [ "$1" = dependency ] && [ -f FAIL ]; then exit 1; fi
+if [ "$1" = pull ]; then
+  ref="$2"; shift 2; ver=""; dir="."
+  while [ $# -gt 0 ]; do
+    case "$1" in --version) ver="$2"; shift ;; -d) dir="$2"; shift ;; esac; shift
+  done
+  echo archive > "$dir/${ref##*/}-$ver.tgz"
+fi
+"""
+
+
+def _plan(complete: bool = True) -> dict:
+    dep = {
+        "name": "redis",
+        "version": "18.0.4",
+        "repository": "oci://registry.example/charts",
+        "store_path": "abc/redis-18.0.4.tgz",
+    }
+    return {"helm_dependencies": {"cache_key": "k", "charts": {"chart": {"dependencies": [dep], "complete": complete}}}}
+
+
+def _run(tmp_path: Path, context: dict, charts: tuple[str, ...] = ("chart",)) -> list[str]:
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    helm = bin_dir / "helm"
+    helm.write_text(FAKE_HELM)
+    helm.chmod(0o755)
+    log = tmp_path / "helm.log"
+    log.touch()
+    for chart in charts:
+        (tmp_path / chart).mkdir(exist_ok=True)
+        (tmp_path / chart / "Chart.yaml").write_text("name: app\ndependencies:\n  - name: redis\n")
+    env = {
+        **os.environ,
+        "PATH": f"{bin_dir}:{os.environ['PATH']}",
+        "HELM_LOG": str(log),
+        "HELM_DEPS_STORE": str(tmp_path / "store"),
+        "GITHUB_WORKSPACE": str(tmp_path),
+        "PIPELINE_CONTEXT": json.dumps(context),
+    }
+    subprocess.run(["bash", str(SCRIPT), *charts], cwd=tmp_path, env=env, check=True, capture_output=True)
+    return log.read_text().splitlines()
+
+
+def test_fetches_missing_archive_into_store_and_chart(tmp_path: Path) -> None:
+    calls = _run(tmp_path, _plan())
+    assert len(calls) == 1
+    assert calls[0].startswith("pull oci://registry.example/charts/redis --version 18.0.4 -d ")
+    assert (tmp_path / "store" / "abc" / "redis-18.0.4.tgz").is_file()
+    assert (tmp_path / "chart" / "charts" / "redis-18.0.4.tgz").is_file()
+
+
+def test_restored_store_skips_pull_and_build(tmp_path: Path) -> None:
+    (tmp_path / "store" / "abc").mkdir(parents=True)
+    (tmp_path / "store" / "abc" / "redis-18.0.4.tgz").write_text("cached")
+    assert _run(tmp_path, _plan()) == []
+    assert (tmp_path / "chart" / "charts" / "redis-18.0.4.tgz").read_text() == "cached"
+
+
+def test_incomplete_plan_falls_back_to_dependency_build(tmp_path: Path) -> None:
+    calls = _run(tmp_path, _plan(complete=False))
+    assert calls[-1] == "dependency build ."
+
+
+def test_context_without_plan_runs_dependency_build(tmp_path: Path) -> None:
+    assert _run(tmp_path, {"language": "helm"}) == ["dependency build ."]
+
+
+def test_failed_dependency_build_does_not_stop_other_charts(tmp_path: Path) -> None:
+    (tmp_path / "bad").mkdir()
+    (tmp_path / "bad" / "FAIL").touch()
+    calls = _run(tmp_path, {"language": "helm"}, charts=("bad", "good"))
+    assert calls == ["dependency build .", "dependency build ."]